@@ -1,4 +1,3 @@
-import websockets
 import uuid
 import struct
 import json
@@ -6,15 +5,51 @@ import io
 import logging
 import asyncio
 import os
+import subprocess
 import sys
+import threading
+import time
+from pathlib import Path
+
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+from tts_cache import TTSCache, normalize_word_times
+
+try:
+    # websockets >= 13
+    from websockets.asyncio.client import connect as websocket_connect
+
+    WEBSOCKET_HEADERS_ARG = "additional_headers"
+except ImportError:
+    from websockets import connect as websocket_connect
+
+    WEBSOCKET_HEADERS_ARG = "extra_headers"
+
+# Sidecar with the TTS word timings, stored next to the generated audio
+TIMESTAMPS_SUFFIX = ".timestamps.json"
+
+# Volcengine TTS endpoint, VOLCENGINE_TTS_ENDPOINT points to another server (e.g. volcengine_mock_server.py)
+DEFAULT_TTS_ENDPOINT = "wss://openspeech.bytedance.com/api/v1/tts/ws_binary"
+
+# Attempts per sentence before voice generation fails
+TTS_MAX_ATTEMPTS = 3
+
+# Volcengine TTS voice and output format
+VOICE_TYPE = "zh_female_shuangkuaisisi_moon_bigtts"
+AUDIO_ENCODING = "mp3"
+
+# Format of the joined narration: the TTS output rate, mono
+JOIN_SAMPLE_RATE = 24000
+JOIN_BITRATE = "128k"
 
 
 class AudioGenerator:
     """Handles all audio generation operations"""
 
-    def __init__(self, logger=None):
-        """Initialize subtitle processor with optional logger"""
+    def __init__(self, logger=None, args=None):
+        """Initialize audio generator with optional logger"""
         self.logger = logger or logging.getLogger(__name__)
+        self.args = args
 
     def generate_audio(self, vg):
         """Generate audio from subtitles using Volcengine TTS"""
@@ -22,36 +57,45 @@ class AudioGenerator:
         if not hasattr(vg, "voice_subtitles") or not vg.voice_subtitles:
             raise ValueError("No voice subtitles available for audio generation")
 
-        # Get Volcengine credentials from environment variables
-        app_id = os.getenv("VOLCENGINE_APP_ID")
-        access_token = os.getenv("VOLCENGINE_ACCESS_TOKEN")
-
-        if not app_id:
-            raise ValueError("VOLCENGINE_APP_ID not found in environment variables")
-        if not access_token:
-            raise ValueError(
-                "VOLCENGINE_ACCESS_TOKEN not found in environment variables"
-            )
+        app_id, access_token = self._volcengine_credentials()
 
-        # Combine all voice subtitles for full audio (with punctuation for natural speech)
+        # Full text of the narration (with punctuation for natural speech)
         full_text = "，".join(vg.voice_subtitles)
 
         try:
             # Generate audio using Volcengine TTS
             audio_path = vg.project_folder / "generated_audio.mp3"
 
-            # Run the async Volcengine TTS function
-            audio_data = asyncio.run(
-                self._generate_audio_volcengine(app_id, access_token, full_text)
+            # Sentences are synthesized one by one, only those missing from the cache
+            cache = TTSCache(VOICE_TYPE, AUDIO_ENCODING, logger=self.logger)
+            missing = [text for text in vg.voice_subtitles if cache.get(text) is None]
+            pending = list(dict.fromkeys(missing))
+            print(
+                f"🔊 {len(vg.voice_subtitles) - len(missing)} of {len(vg.voice_subtitles)} sentences cached, synthesizing {len(pending)}"
             )
+            if pending:
+                asyncio.run(
+                    self._synthesize_sentences(app_id, access_token, pending, cache)
+                )
 
-            if audio_data:
-                with open(audio_path, "wb") as f:
-                    f.write(audio_data)
-                print(f"Audio file saved to: {audio_path}")
-            else:
+            segments = [cache.get(text) for text in vg.voice_subtitles]
+            if any(segment is None for segment in segments):
                 raise Exception("No audio data received from Volcengine TTS")
 
+            durations = self._join_segments(
+                [segment["path"] for segment in segments], audio_path
+            )
+            # Sentences are timed by their decoded length in the joined audio
+            segments = [
+                dict(segment, duration=duration)
+                for segment, duration in zip(segments, durations)
+            ]
+            print(f"Audio file saved to: {audio_path}")
+
+            self.save_timestamps(
+                audio_path, full_text, self._segment_words(segments), segments
+            )
+
             vg.audio_file = audio_path
 
         except Exception as e:
@@ -59,11 +103,301 @@ class AudioGenerator:
             print("Voice generation failed - exiting program")
             sys.exit(1)
 
+    def _volcengine_credentials(self):
+        """Get Volcengine credentials from environment variables"""
+        app_id = os.getenv("VOLCENGINE_APP_ID")
+        access_token = os.getenv("VOLCENGINE_ACCESS_TOKEN")
+
+        if not app_id:
+            raise ValueError("VOLCENGINE_APP_ID not found in environment variables")
+        if not access_token:
+            raise ValueError(
+                "VOLCENGINE_ACCESS_TOKEN not found in environment variables"
+            )
+        return app_id, access_token
+
+    def start_streaming_synthesis(self):
+        """Start synthesizing sentences in the background as soon as they are submitted
+
+        Used to overlap TTS with a streaming LLM response; generate_audio then
+        finds the sentences in the cache and only joins them.
+        """
+        app_id, access_token = self._volcengine_credentials()
+        cache = TTSCache(VOICE_TYPE, AUDIO_ENCODING, logger=self.logger)
+        synthesis = StreamingSynthesis(self, app_id, access_token, cache)
+        synthesis.start()
+        return synthesis
+
+    def _tts_concurrency(self):
+        """Number of concurrent TTS sessions from --tts-concurrency"""
+        concurrency = getattr(self.args, "tts_concurrency", None) or 4
+        return max(1, concurrency)
+
+    async def _synthesize_sentences(self, app_id, access_token, sentences, cache):
+        """Synthesize sentences over a bounded pool of TTS sessions and store them in the cache"""
+        queue = asyncio.Queue()
+        for index, text in enumerate(sentences):
+            queue.put_nowait((index, text))
+
+        session_count = min(self._tts_concurrency(), len(sentences))
+        start_time = time.perf_counter()
+        finished = 0
+
+        async def session():
+            nonlocal finished
+            while not queue.empty():
+                index, text = queue.get_nowait()
+                audio_data, words = await self._synthesize_with_retry(
+                    app_id, access_token, text
+                )
+                # Results go to the cache, the audio is assembled in script order later
+                await asyncio.to_thread(cache.put, text, audio_data, words)
+                finished += 1
+                print(
+                    f"✅ Sentence {index + 1} synthesized ({finished}/{len(sentences)}): {text}"
+                )
+
+        await asyncio.gather(*(session() for _ in range(session_count)))
+        self.logger.info(
+            f"⏱️ Synthesized {len(sentences)} sentences with {session_count} sessions in {time.perf_counter() - start_time:.2f} seconds"
+        )
+
+    async def _synthesize_with_retry(self, app_id, access_token, text):
+        """Synthesize one sentence, retrying with backoff on errors"""
+        for attempt in range(1, TTS_MAX_ATTEMPTS + 1):
+            try:
+                audio_data, words = await self._generate_audio_volcengine(
+                    app_id, access_token, text
+                )
+                if not audio_data:
+                    raise RuntimeError("No audio data received")
+                return audio_data, words
+            except Exception as e:
+                if attempt == TTS_MAX_ATTEMPTS:
+                    raise Exception(f"TTS failed for sentence '{text}': {e}")
+                delay = 2 ** (attempt - 1)
+                self.logger.warning(
+                    f"TTS attempt {attempt}/{TTS_MAX_ATTEMPTS} failed for '{text}': {e}, retrying in {delay}s"
+                )
+                await asyncio.sleep(delay)
+
+    def _decode_segment(self, segment_path):
+        """Samples of a sentence audio file as mono 16-bit PCM at JOIN_SAMPLE_RATE
+
+        Decoding drops the encoder delay and padding of the MP3, so the
+        sample count is the exact length the sentence adds to the joined audio.
+        """
+        result = subprocess.run(
+            [
+                "ffmpeg",
+                "-loglevel",
+                "error",
+                "-i",
+                str(segment_path),
+                "-f",
+                "s16le",
+                "-ac",
+                "1",
+                "-ar",
+                str(JOIN_SAMPLE_RATE),
+                "-",
+            ],
+            capture_output=True,
+        )
+        if result.returncode != 0:
+            raise Exception(
+                f"Failed to decode TTS segment {segment_path}: {result.stderr.decode(errors='ignore')}"
+            )
+        return result.stdout
+
+    def _join_segments(self, segment_paths, audio_path):
+        """Join sentence audio files into one file, returns the duration of every sentence
+
+        Sentences are decoded, their samples concatenated and the result
+        encoded once. Joining the MP3 files by stream copy kept every file's
+        encoder delay, padding and Info frame, which shifted each following
+        sentence against the word timings. The durations are taken from the
+        decoded samples, so they add up to the joined audio exactly.
+        """
+        samples = [self._decode_segment(path) for path in segment_paths]
+        result = subprocess.run(
+            [
+                "ffmpeg",
+                "-y",
+                "-loglevel",
+                "error",
+                "-f",
+                "s16le",
+                "-ac",
+                "1",
+                "-ar",
+                str(JOIN_SAMPLE_RATE),
+                "-i",
+                "-",
+                "-c:a",
+                "libmp3lame",
+                "-b:a",
+                JOIN_BITRATE,
+                str(audio_path),
+            ],
+            input=b"".join(samples),
+            capture_output=True,
+        )
+        if result.returncode != 0:
+            raise Exception(
+                f"Failed to join TTS segments: {result.stderr.decode(errors='ignore')}"
+            )
+        self.logger.info(f"Joined {len(segment_paths)} TTS segments into {audio_path}")
+        # Two bytes per mono 16-bit sample
+        return [len(data) / 2 / JOIN_SAMPLE_RATE for data in samples]
+
+    def _segment_words(self, segments):
+        """Word timings of joined sentences on the timeline of the joined audio
+
+        A sentence without word timings is covered by a single entry spanning
+        the whole sentence, so subtitle timing stays exact per sentence.
+        """
+        words = []
+        offset = 0.0
+        for segment in segments:
+            if segment["words"]:
+                words.extend(
+                    dict(word, start=word["start"] + offset, end=word["end"] + offset)
+                    for word in segment["words"]
+                )
+            else:
+                words.append(
+                    {
+                        "word": segment["text"],
+                        "start": offset,
+                        "end": offset + segment["duration"],
+                    }
+                )
+            offset += segment["duration"]
+        return words
+
+    def timestamps_file(self, audio_path):
+        """Path of the word timing sidecar of an audio file"""
+        audio_path = Path(audio_path)
+        return audio_path.with_name(audio_path.stem + TIMESTAMPS_SUFFIX)
+
+    def save_timestamps(self, audio_path, text, words, segments=None):
+        """Store the audio duration, sentence durations and TTS word timings next to the audio file"""
+        audio_path = Path(audio_path)
+        try:
+            stat = audio_path.stat()
+            duration = ffmpeg_parse_infos(str(audio_path))["duration"]
+
+            timing = {
+                "text": text,
+                "duration": duration,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "words": normalize_word_times(words, duration),
+            }
+            if segments:
+                timing["segments"] = [
+                    {"text": segment["text"], "duration": segment["duration"]}
+                    for segment in segments
+                ]
+            with open(self.timestamps_file(audio_path), "w", encoding="utf-8") as f:
+                json.dump(timing, f, ensure_ascii=False, indent=2)
+            self.logger.info(
+                f"Saved {len(words)} TTS word timestamps to {self.timestamps_file(audio_path)}"
+            )
+        except Exception as e:
+            self.logger.warning(f"Failed to save TTS timestamps: {e}")
+
+    def load_timestamps(self, audio_path, text=None):
+        """Load the timing sidecar of an audio file, None if missing or out of date
+
+        Args:
+            text: The text the audio should speak; a sidecar saved for
+                another text is out of date too
+        """
+        audio_path = Path(audio_path)
+        timestamps_file = self.timestamps_file(audio_path)
+        if not timestamps_file.exists():
+            return None
+        try:
+            with open(timestamps_file, "r", encoding="utf-8") as f:
+                timing = json.load(f)
+            stat = audio_path.stat()
+            if (
+                timing.get("size") != stat.st_size
+                or timing.get("mtime_ns") != stat.st_mtime_ns
+            ):
+                self.logger.info(
+                    f"Ignoring {timestamps_file.name}, the audio file has changed"
+                )
+                return None
+            if text is not None and timing.get("text") != text:
+                self.logger.info(
+                    f"Ignoring {timestamps_file.name}, it was saved for another text"
+                )
+                return None
+            return timing
+        except Exception as e:
+            self.logger.warning(f"Failed to read TTS timestamps {timestamps_file}: {e}")
+            return None
+
+    def get_audio_duration(self, audio_path):
+        """Duration of an audio file from its sidecar, or from its header without decoding"""
+        timing = self.load_timestamps(audio_path)
+        if timing and timing.get("duration"):
+            return timing["duration"]
+        return ffmpeg_parse_infos(str(audio_path))["duration"]
+
+    def _parse_frontend_payload(self, payload):
+        """Extract word timings from a FrontEndResultServer message"""
+        try:
+            data = json.loads(payload.decode("utf-8"))
+        except (UnicodeDecodeError, ValueError) as e:
+            self.logger.debug(f"Unreadable TTS frontend payload: {e}")
+            return []
+        words = []
+        self._collect_timestamp_words(data, words)
+        return words
+
+    def _collect_timestamp_words(self, node, words):
+        """Walk a frontend result and collect {"word", "start", "end"} entries in order"""
+        if isinstance(node, str):
+            # The frontend result is sometimes embedded as a JSON string
+            node = node.strip()
+            if not node.startswith(("{", "[")):
+                return
+            try:
+                node = json.loads(node)
+            except ValueError:
+                return
+
+        if isinstance(node, list):
+            for item in node:
+                self._collect_timestamp_words(item, words)
+        elif isinstance(node, dict):
+            start = node.get("start_time", node.get("startTime"))
+            end = node.get("end_time", node.get("endTime"))
+            text = node.get("word", node.get("text"))
+            if (
+                isinstance(text, str)
+                and start is not None
+                and end is not None
+                and not isinstance(node.get("words"), list)
+            ):
+                words.append({"word": text, "start": float(start), "end": float(end)})
+                return
+            for value in node.values():
+                if isinstance(value, (dict, list, str)):
+                    self._collect_timestamp_words(value, words)
+
     async def _generate_audio_volcengine(
         self, app_id: str, access_token: str, text: str
-    ) -> bytes:
-        """Generate audio using Volcengine TTS WebSocket API"""
-        endpoint = "wss://openspeech.bytedance.com/api/v1/tts/ws_binary"
+    ) -> tuple:
+        """Generate audio using Volcengine TTS WebSocket API
+
+        Returns the audio bytes and the word timings sent in FrontEndResultServer messages.
+        """
+        endpoint = os.getenv("VOLCENGINE_TTS_ENDPOINT", DEFAULT_TTS_ENDPOINT)
 
         # Prepare request payload
         request = {
@@ -76,8 +410,8 @@ class AudioGenerator:
                 "uid": str(uuid.uuid4()),
             },
             "audio": {
-                "voice_type": "zh_female_shuangkuaisisi_moon_bigtts",
-                "encoding": "mp3",
+                "voice_type": VOICE_TYPE,
+                "encoding": AUDIO_ENCODING,
             },
             "request": {
                 "reqid": str(uuid.uuid4()),
@@ -97,31 +431,26 @@ class AudioGenerator:
         }
 
         audio_data = bytearray()
+        words = []
 
         try:
-            # Initialize WebSocket message counter for dot display
-            self._websocket_message_count = 0
-            self._last_dot_print_time = 0
-
             # Connect to Volcengine WebSocket
-            async with websockets.connect(
-                endpoint, additional_headers=headers, max_size=10 * 1024 * 1024
+            async with websocket_connect(
+                endpoint, max_size=10 * 1024 * 1024, **{WEBSOCKET_HEADERS_ARG: headers}
             ) as websocket:
-                print("Connected to Volcengine TTS WebSocket")
+                self.logger.debug("Connected to Volcengine TTS WebSocket")
 
                 # Send the TTS request
                 await self._volcengine_full_client_request(
                     websocket, json.dumps(request).encode()
                 )
 
-                print("Receiving audio data", end="", flush=True)
-
                 # Receive audio data
                 while True:
                     msg = await self._volcengine_receive_message(websocket)
 
                     if msg.type == self._volcengine_msg_type("FrontEndResultServer"):
-                        continue
+                        words.extend(self._parse_frontend_payload(msg.payload))
                     elif msg.type == self._volcengine_msg_type("AudioOnlyServer"):
                         audio_data.extend(msg.payload)
                         if msg.sequence < 0:  # Last message
@@ -129,12 +458,11 @@ class AudioGenerator:
                     else:
                         raise RuntimeError(f"TTS conversion failed: {msg}")
 
-                # Print newline after dots are done
-                print()  # Newline after the dots
-                return bytes(audio_data)
+                self.logger.debug(f"Received {len(words)} word timestamps from TTS")
+                return bytes(audio_data), words
 
         except Exception as e:
-            print(f"Volcengine TTS WebSocket error: {e}")
+            self.logger.warning(f"Volcengine TTS WebSocket error: {e}")
             raise
 
     def _volcengine_msg_type(self, name: str):
@@ -257,31 +585,11 @@ class AudioGenerator:
             if isinstance(data, str):
                 raise ValueError(f"Unexpected text message: {data}")
             elif isinstance(data, bytes):
-                msg = self.VolcengineMessage.from_bytes(data)
-
-                # Show continuous dots instead of detailed log messages
-                if not hasattr(self, "_websocket_message_count"):
-                    self._websocket_message_count = 0
-                    self._last_dot_print_time = 0
-
-                self._websocket_message_count += 1
-
-                # Print dots progressively (every 10 messages)
-                import time
-
-                current_time = time.time()
-                if (
-                    self._websocket_message_count % 10 == 0
-                    or current_time - self._last_dot_print_time > 1.0
-                ):
-                    print(".", end="", flush=True)
-                    self._last_dot_print_time = current_time
-
-                return msg
+                return self.VolcengineMessage.from_bytes(data)
             else:
                 raise ValueError(f"Unexpected message type: {type(data)}")
         except Exception as e:
-            print(f"Failed to receive message: {e}")
+            self.logger.debug(f"Failed to receive message: {e}")
             raise
 
     async def _volcengine_full_client_request(self, websocket, payload: bytes):
@@ -290,7 +598,76 @@ class AudioGenerator:
         msg.payload = payload
 
         data = msg.marshal()
-        print(f"Sending: {msg}")
-        print(f"Raw data length: {len(data)}")
-        print(f"Raw data (hex): {data.hex()}")
+        self.logger.debug(f"Sending: {msg} ({len(data)} bytes)")
         await websocket.send(data)
+
+
+class StreamingSynthesis:
+    """Synthesizes submitted sentences into the TTS cache on a background event loop"""
+
+    def __init__(self, audio_generator, app_id, access_token, cache):
+        self.audio_generator = audio_generator
+        self.logger = audio_generator.logger
+        self.app_id = app_id
+        self.access_token = access_token
+        self.cache = cache
+        self.session_count = audio_generator._tts_concurrency()
+        self.loop = asyncio.new_event_loop()
+        self.queue = None
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.submitted = set()
+        self.synthesized = 0
+        self.errors = []
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        self.thread.start()
+        self.ready.wait()
+
+    def submit(self, text):
+        """Queue a sentence for synthesis, called from any thread"""
+        if text in self.submitted or self.cache.get(text) is not None:
+            return
+        self.submitted.add(text)
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, text)
+
+    def finish(self):
+        """Wait until every submitted sentence is synthesized
+
+        Failed sentences are only logged, generate_audio synthesizes whatever
+        is still missing from the cache.
+        """
+        for _ in range(self.session_count):
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, None)
+        self.thread.join()
+        self.loop.close()
+        self.logger.info(
+            f"⏱️ Streamed {self.synthesized} sentences to TTS with {self.session_count} sessions in {time.perf_counter() - self.start_time:.2f} seconds"
+        )
+        for error in self.errors:
+            self.logger.warning(f"Streaming TTS failed: {error}")
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._serve())
+
+    async def _serve(self):
+        self.queue = asyncio.Queue()
+        self.ready.set()
+        await asyncio.gather(*(self._session() for _ in range(self.session_count)))
+
+    async def _session(self):
+        while True:
+            text = await self.queue.get()
+            if text is None:
+                return
+            try:
+                audio_data, words = await self.audio_generator._synthesize_with_retry(
+                    self.app_id, self.access_token, text
+                )
+                await asyncio.to_thread(self.cache.put, text, audio_data, words)
+                self.synthesized += 1
+                print(f"✅ Sentence synthesized while streaming: {text}")
+            except Exception as e:
+                self.errors.append(e)
@@ -15,8 +15,12 @@ class BackgroundMusicProcessor:
         self.args = args
         self.background_music_info = {}
 
-    def _add_background_music(self, final_clip):
-        """Add background music with fade in/out effects to the final video"""
+    def _add_background_music(self, final_clip, video_duration=None):
+        """Add background music with fade in/out effects to the final video
+
+        video_duration can be given instead of final_clip when the video is not
+        rendered with MoviePy.
+        """
         if not self.args or not getattr(self.args, "mp3", None):
             self.logger.info(
                 "No background music file specified, skipping background music"
@@ -56,7 +60,11 @@ class BackgroundMusicProcessor:
                 "fade_in": fade_in_duration,
                 "fade_out": fade_out_duration,
                 "volume": bgm_volume,
-                "video_duration": final_clip.duration if final_clip else 0,
+                "video_duration": (
+                    video_duration
+                    if video_duration is not None
+                    else (final_clip.duration if final_clip else 0)
+                ),
             }
 
             self.logger.info(
@@ -165,10 +173,16 @@ class BackgroundMusicProcessor:
                 temp_video.unlink()
             return False
 
-    def _build_ffmpeg_audio_filter(self, duration, volume, fade_in, fade_out):
-        """Build FFmpeg audio filter complex string for background music"""
+    def _build_ffmpeg_audio_filter(
+        self, duration, volume, fade_in, fade_out, voice_input="[0:a]", bgm_input="[1:a]"
+    ):
+        """Build FFmpeg audio filter complex string for background music
+
+        voice_input and bgm_input are the filter graph labels of the narration
+        and the background music streams.
+        """
         # Build the background music filter with volume
-        bgm_filter = f"[1:a]volume={volume}[bgm_vol];"
+        bgm_filter = f"{bgm_input}volume={volume}[bgm_vol];"
 
         # Add fade effects as separate filters - use afade for audio
         fade_filters = ""
@@ -184,12 +198,12 @@ class BackgroundMusicProcessor:
                     fade_filters += f"afade=t=out:st={fade_out_start}:d={fade_out}"
             fade_filters += "[bgm];"
         else:
-            fade_filters = "[bgm_vol][bgm];"
+            fade_filters = "[bgm_vol]anull[bgm];"
 
         # Mix the background music with original audio
         # If the video has audio, mix them; otherwise, just use background music
         mix_filter = (
-            "[0:a][bgm]amix=inputs=2:duration=shortest:dropout_transition=2[a_out]"
+            f"{voice_input}[bgm]amix=inputs=2:duration=shortest:dropout_transition=2[a_out]"
         )
 
         return bgm_filter + fade_filters + mix_filter
@@ -116,8 +116,8 @@ class Config:
         return provider_models.get(provider)
 
 
-def parse_args():
-    """Parse command line arguments"""
+def parse_args(argv=None):
+    """Parse command line arguments (sys.argv if argv is None)"""
     parser = argparse.ArgumentParser(description="AI Video Generator")
     parser.add_argument("--folder", required=True, help="Project folder")
     parser.add_argument(
@@ -194,6 +194,30 @@ def parse_args():
         default="qwen",
         help="LLM provider for subtitle generation (default: qwen)",
     )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        default=False,
+        help="With --gen-subtitle and --gen-voice, stream the LLM response and start TTS on each subtitle line as soon as it is complete",
+    )
+    parser.add_argument(
+        "--fresh-subtitle",
+        action="store_true",
+        default=False,
+        help="Ask the LLM for a new subtitle variation instead of reusing a cached response",
+    )
+    parser.add_argument(
+        "--llm-cache-ttl",
+        type=float,
+        default=168,
+        help="Hours a cached LLM subtitle response is reused (0: no reuse, default: 168)",
+    )
+    parser.add_argument(
+        "--clear-llm-cache",
+        action="store_true",
+        default=False,
+        help="Remove all cached LLM subtitle responses before generating subtitles",
+    )
     parser.add_argument(
         "--text",
         help="Text file to use as subtitles (overrides other subtitle sources)",
@@ -243,4 +267,77 @@ def parse_args():
         default="batch",
         help="Clip repeat mode: single (repeat current clip) or batch (cycle through all clips)",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--render-backend",
+        choices=["moviepy", "ffmpeg"],
+        default="moviepy",
+        help="Render backend: moviepy (composite frames in Python) or ffmpeg (single FFmpeg filter graph, falls back to moviepy on failure)",
+    )
+    parser.add_argument(
+        "--render-workers",
+        type=int,
+        default=1,
+        help="Render the video as parallel segments in this many worker processes (0: one per CPU core, default: 1)",
+    )
+    parser.add_argument(
+        "--proxy-cache",
+        action="store_true",
+        help="Read video sources from conformed proxies in the shared proxy cache, creating missing ones",
+    )
+    parser.add_argument(
+        "--proxy-cache-size",
+        type=float,
+        default=50,
+        help="Size limit of the shared proxy cache in GB, least recently used proxies are evicted (default: 50)",
+    )
+    parser.add_argument(
+        "--segment-cache",
+        action="store_true",
+        help="Cache encoded segments and re-encode only the segments that changed (ffmpeg backend)",
+    )
+    parser.add_argument(
+        "--segment-cache-size",
+        type=float,
+        default=20,
+        help="Size limit of the shared segment cache in GB, least recently used segments are evicted (default: 20)",
+    )
+    parser.add_argument(
+        "--raster-cache-size",
+        type=float,
+        default=2,
+        help="Size limit of the shared text bitmap cache in GB, least recently used bitmaps are evicted (default: 2)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="Random seed for clip order, cut points and transitions (default: random, 0 with --segment-cache)",
+    )
+    parser.add_argument(
+        "--draft",
+        action="store_true",
+        help="Render a quick 540x960 preview to output/preview.mp4 and save the render plan for --reuse-plan",
+    )
+    parser.add_argument(
+        "--reuse-plan",
+        action="store_true",
+        help="Render the clip plan saved by the last --draft run instead of planning clips again",
+    )
+    parser.add_argument(
+        "--media-workers",
+        type=int,
+        default=4,
+        help="Maximum number of media files probed or opened at the same time (default: 4)",
+    )
+    parser.add_argument(
+        "--max-readers",
+        type=int,
+        default=8,
+        help="Maximum number of video decoder processes kept open while rendering with MoviePy (default: 8)",
+    )
+    parser.add_argument(
+        "--tts-concurrency",
+        type=int,
+        default=4,
+        help="Maximum number of concurrent TTS sessions when generating voice (default: 4)",
+    )
+    return parser.parse_args(argv)
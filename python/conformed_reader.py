@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Conformed video reader - lets the ffmpeg decoder process cover-scale, center
+crop and frame rate conversion of a video source, so Python only ever
+receives frames at the output canvas size and rate
+
+MoviePy's FFMPEG_VideoReader always pipes frames at the native size (or a
+plain rescale of it) and rate; a 4K60 source would be decoded, piped and
+resized frame by frame in Python only to be shown at 1080x1920, 24 fps.
+
+With a ReaderPool the decoder may be closed while the clip is idle; it is
+reopened at the requested time on the next frame, from the fallback file if
+the file it read from (a proxy) has been removed meanwhile.
+"""
+
+import os
+import subprocess as sp
+import threading
+
+from moviepy import VideoFileClip
+from moviepy.config import FFMPEG_BINARY
+from moviepy.tools import cross_platform_popen_params, ffmpeg_escape_filename
+from moviepy.video.io.ffmpeg_reader import FFMPEG_VideoReader
+
+
+class ConformedVideoReader(FFMPEG_VideoReader):
+    """FFMPEG_VideoReader that outputs frames conformed to a canvas at a fixed fps"""
+
+    def __init__(
+        self, filename, canvas_size, fps, pool=None, fallback_filename=None, **kwargs
+    ):
+        self.canvas_size = tuple(canvas_size)
+        self.output_fps = fps
+        self.pool = pool
+        self.fallback_filename = fallback_filename
+        # Held while decoding, so the pool never closes a decoder mid-frame
+        self.lock = threading.RLock()
+        self.prefetch_pending = False
+        super().__init__(filename, **kwargs)
+
+    def get_frame(self, t):
+        """Read the frame at time t, reopening the decoder if the pool closed it"""
+        with self.lock:
+            if not self.proc:
+                self.initialize(t)
+                return self.last_read
+            if self.pool is not None:
+                self.pool.used(self)
+            return super().get_frame(t)
+
+    def initialize(self, start_time=0):
+        """Open the decoder at start_time, same seeking rules as FFMPEG_VideoReader"""
+        with self.lock:
+            if self.pool is not None:
+                self.pool.opening(self)
+            self._open_decoder(start_time)
+
+    def after_fork(self):
+        """Drop the parent's decoder in a forked worker; it reopens on the next frame"""
+        self.proc = None
+        self.lock = threading.RLock()
+        self.prefetch_pending = False
+        if self.pool is not None:
+            self.pool.after_fork()
+
+    def _open_decoder(self, start_time):
+        # The source size and fps are only known once the parent has parsed the
+        # file; from then on the reader describes the conformed output
+        self.size = self.canvas_size
+        self.fps = self.output_fps
+        self.n_frames = int(self.duration * self.fps)
+        self.bufsize = self.depth * self.size[0] * self.size[1] + 100
+
+        self.close(delete_lastread=False)
+        if self.fallback_filename and not os.path.exists(self.filename):
+            # The frames are conformed either way, only the decoding is slower
+            self.filename = self.fallback_filename
+        self.pos = self.get_frame_number(start_time)
+        if self.pos != 0:
+            start_time = self.pos * (1 / self.fps) - 0.00001
+        else:
+            start_time = 0.0
+
+        if start_time != 0:
+            offset = min(1, start_time)
+            i_arg = [
+                "-ss",
+                "%.06f" % (start_time - offset),
+                "-i",
+                ffmpeg_escape_filename(self.filename),
+                "-ss",
+                "%.06f" % offset,
+            ]
+        else:
+            i_arg = ["-i", ffmpeg_escape_filename(self.filename)]
+
+        width, height = self.size
+        cmd = (
+            [FFMPEG_BINARY]
+            + i_arg
+            + [
+                "-loglevel",
+                "error",
+                "-f",
+                "image2pipe",
+                "-vf",
+                # Same cover-scale and center crop as the Python conform step
+                f"scale={width}:{height}:force_original_aspect_ratio=increase,"
+                f"crop={width}:{height},setsar=1,fps={self.fps}",
+                "-sws_flags",
+                self.resize_algo,
+                "-pix_fmt",
+                self.pixel_format,
+                "-vcodec",
+                "rawvideo",
+                "-",
+            ]
+        )
+
+        popen_params = cross_platform_popen_params(
+            {
+                "bufsize": self.bufsize,
+                "stdout": sp.PIPE,
+                "stderr": sp.PIPE,
+                "stdin": sp.DEVNULL,
+            }
+        )
+        self.proc = sp.Popen(cmd, **popen_params)
+        self.last_read = self.read_frame()
+
+
+def load_conformed_video(
+    file_path, canvas_size, fps, audio=False, pool=None, fallback_path=None
+):
+    """Load a VideoFileClip whose frames are decoded at canvas_size and fps
+
+    With a ReaderPool, the number of open decoders across clips is capped.
+    The pool only manages video decoders, so sources are opened without
+    their audio reader (and its ffmpeg process) unless audio is requested.
+    A reopened decoder reads fallback_path if file_path no longer exists.
+    """
+    clip = VideoFileClip(str(file_path), audio=audio)
+    native_reader = clip.reader
+    clip.reader = ConformedVideoReader(
+        str(file_path),
+        canvas_size,
+        fps,
+        pool=pool,
+        fallback_filename=str(fallback_path) if fallback_path else None,
+    )
+    native_reader.close()
+    clip.size = clip.reader.size
+    clip.fps = clip.reader.fps
+    return clip
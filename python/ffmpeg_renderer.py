@@ -0,0 +1,553 @@
+#!/usr/bin/env python3
+"""
+FFmpeg render backend - renders a planned video timeline with a single ffmpeg
+filter graph, so decoding, scaling, cropping, overlaying and encoding all run
+inside ffmpeg instead of frame by frame in Python
+"""
+
+import logging
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from background_music import BackgroundMusicProcessor
+from overlay_compositor import rasterize_clip
+from segment_renderer import SegmentRenderer, timeline_entries
+
+# Output profiles: "final" for the published video, "draft" for quick previews.
+# scale is applied to the timeline canvas, fps None keeps the timeline fps
+RENDER_PROFILES = {
+    "final": {"scale": 1.0, "fps": None, "preset": "fast", "crf": 23},
+    "draft": {"scale": 0.5, "fps": 12, "preset": "ultrafast", "crf": 30},
+}
+
+
+class FFmpegRenderer:
+    """Compiles a timeline (see VideoGenerator.build_timeline) into one ffmpeg command"""
+
+    def __init__(self, logger=None, args=None, profile="final"):
+        self.logger = logger or logging.getLogger(__name__)
+        self.args = args
+        self.profile = RENDER_PROFILES[profile]
+        self.background_music_processor = BackgroundMusicProcessor(self.logger, args)
+        self.segment_renderer = SegmentRenderer(self.logger, args)
+
+    def render(self, timeline, layers, output_file, background_music_info=None):
+        """Render timeline with its overlay layers to output_file, returns True on success"""
+        if not shutil.which("ffmpeg"):
+            self.logger.error("❌ FFmpeg not found in PATH")
+            return False
+
+        segments = timeline_entries(timeline)
+        if not segments:
+            self.logger.error("❌ Timeline has no clips to render")
+            return False
+
+        # Layers are laid out on the timeline canvas, the output may be smaller
+        render_timeline = self.profile_timeline(timeline)
+
+        with tempfile.TemporaryDirectory(prefix="aivideo_ffmpeg_") as work_dir:
+            overlays = self.rasterize_layers(
+                layers,
+                (timeline["width"], timeline["height"]),
+                Path(work_dir),
+                scale=self.profile["scale"],
+            )
+
+            # Long videos are rendered as parallel segments when workers are enabled
+            rendered = self.segment_renderer.render_ffmpeg(
+                self, render_timeline, overlays, output_file, background_music_info
+            )
+            if rendered is not None:
+                return rendered
+
+            ffmpeg_cmd = self.build_command(
+                render_timeline, segments, overlays, output_file, background_music_info
+            )
+            self.logger.info(f"🔧 Running FFmpeg command: {' '.join(ffmpeg_cmd)}")
+            return self._run(ffmpeg_cmd, timeline["duration"])
+
+    def profile_timeline(self, timeline):
+        """The timeline with canvas size and fps of the output profile"""
+        scale = self.profile["scale"]
+        return dict(
+            timeline,
+            # libx264 with yuv420p needs even dimensions
+            width=2 * round(timeline["width"] * scale / 2),
+            height=2 * round(timeline["height"] * scale / 2),
+            fps=self.profile["fps"] or timeline["fps"],
+        )
+
+    def rasterize_layers(self, layers, canvas_size, work_dir, scale=1.0):
+        """Flatten overlay layers into one RGBA bitmap per visible interval
+
+        Consecutive layers that are shown over the same interval (e.g. a
+        subtitle and its background box) are merged into a single image, so
+        the filter graph needs one overlay per interval instead of one per
+        text clip. Stacking order is preserved. Bitmaps and positions are
+        scaled by scale for smaller output profiles.
+        """
+        groups = []
+        for layer in layers:
+            key = (
+                round(layer["start"], 3),
+                round(layer["end"], 3),
+                layer.get("fade_in", 0.0),
+            )
+            if key[1] <= key[0]:
+                continue
+            if groups and groups[-1][0] == key:
+                groups[-1][1].append(layer)
+            else:
+                groups.append((key, [layer]))
+
+        overlays = []
+        for index, ((start, end, fade_in), group_layers) in enumerate(groups):
+            try:
+                bitmap = self._rasterize_group(group_layers, canvas_size)
+            except Exception as e:
+                self.logger.error(f"Failed to rasterize overlay at {start:.2f}s: {e}")
+                continue
+            if bitmap is None:
+                continue
+
+            image, x, y = bitmap
+            if scale != 1.0:
+                image = image.resize(
+                    (
+                        max(1, round(image.width * scale)),
+                        max(1, round(image.height * scale)),
+                    ),
+                    Image.LANCZOS,
+                )
+                x, y = round(x * scale), round(y * scale)
+            image_path = work_dir / f"overlay_{index:04d}.png"
+            image.save(image_path)
+            overlays.append(
+                {
+                    "path": image_path,
+                    "x": x,
+                    "y": y,
+                    "start": start,
+                    "end": end,
+                    "fade_in": fade_in,
+                }
+            )
+
+        self.logger.info(
+            f"Rasterized {len(layers)} overlay layers into {len(overlays)} bitmaps"
+        )
+        return overlays
+
+    def _rasterize_group(self, layers, canvas_size):
+        """Composite layers onto a transparent bitmap cropped to their bounding box"""
+        canvas_w, canvas_h = canvas_size
+        placed = [rasterize_clip(layer["clip"], canvas_size) for layer in layers]
+
+        # Bounding box of all layers, clipped to the canvas
+        left = max(0, min(x for x, _, _, _ in placed))
+        top = max(0, min(y for _, y, _, _ in placed))
+        right = min(canvas_w, max(x + rgb.shape[1] for x, _, rgb, _ in placed))
+        bottom = min(canvas_h, max(y + rgb.shape[0] for _, y, rgb, _ in placed))
+        if right <= left or bottom <= top:
+            return None
+
+        # Composite with premultiplied alpha ("over" operator)
+        color = np.zeros((bottom - top, right - left, 3), dtype=np.float32)
+        coverage = np.zeros((bottom - top, right - left, 1), dtype=np.float32)
+        for x, y, rgb, alpha in placed:
+            x1, y1 = max(x, left), max(y, top)
+            x2 = min(x + rgb.shape[1], right)
+            y2 = min(y + rgb.shape[0], bottom)
+            if x2 <= x1 or y2 <= y1:
+                continue
+            src_rgb = rgb[y1 - y : y2 - y, x1 - x : x2 - x]
+            src_alpha = alpha[y1 - y : y2 - y, x1 - x : x2 - x, np.newaxis]
+            region = (slice(y1 - top, y2 - top), slice(x1 - left, x2 - left))
+            color[region] = src_rgb * src_alpha + color[region] * (1 - src_alpha)
+            coverage[region] = src_alpha + coverage[region] * (1 - src_alpha)
+
+        straight = np.where(coverage > 0, color / np.maximum(coverage, 1e-6), 0)
+        rgba = np.concatenate([straight, coverage * 255], axis=2)
+        image = Image.fromarray(np.clip(rgba + 0.5, 0, 255).astype(np.uint8), "RGBA")
+        return image, left, top
+
+    def encoder_args(self, fps, threads=4):
+        """Encoder settings of the output profile; the final profile is identical
+        to the MoviePy write_videofile settings
+
+        GOPs are closed so that separately rendered segments can be joined
+        without re-encoding.
+        """
+        return [
+            "-c:v",
+            "libx264",
+            "-preset",
+            self.profile["preset"],
+            "-crf",
+            str(self.profile["crf"]),
+            "-pix_fmt",
+            "yuv420p",
+            "-r",
+            str(fps),
+            "-flags",
+            "+cgop",
+            "-threads",
+            str(threads),
+            "-c:a",
+            "aac",
+            "-ac",
+            "2",
+            "-movflags",
+            "+faststart",
+        ]
+
+    def _segment_filter(self, width, height, fps, frame_count):
+        """Conform one segment to the canvas: cover-scale, center crop, fixed fps and frame count"""
+        return (
+            f"scale={width}:{height}:force_original_aspect_ratio=increase,"
+            f"crop={width}:{height},setsar=1,fps={fps},format=yuv420p,"
+            f"tpad=stop_mode=clone:stop={frame_count},"
+            f"trim=end_frame={frame_count},setpts=PTS-STARTPTS"
+        )
+
+    def build_command(
+        self,
+        timeline,
+        segments,
+        overlays,
+        output_file,
+        background_music_info=None,
+        threads=4,
+    ):
+        """Build the ffmpeg command line for the timeline; video only without narration and music"""
+        fps = timeline["fps"]
+        inputs, filters, input_count, frame_count = self._video_graph(
+            timeline, segments, overlays
+        )
+        audio_inputs, audio_filters, audio_label = self._audio_graph(
+            timeline, background_music_info, input_count
+        )
+
+        ffmpeg_cmd = ["ffmpeg", "-y", "-loglevel", "error", "-progress", "pipe:1"]
+        ffmpeg_cmd += inputs + audio_inputs
+        ffmpeg_cmd += [
+            "-filter_complex",
+            ";".join(filters + audio_filters),
+            "-map",
+            "[v_out]",
+        ]
+        if audio_label:
+            ffmpeg_cmd += ["-map", audio_label]
+        ffmpeg_cmd += self.encoder_args(fps, threads)
+        # Overlay keeps going while any looped input lasts, so stop at the exact frame count
+        ffmpeg_cmd += ["-frames:v", str(frame_count), str(output_file)]
+        return ffmpeg_cmd
+
+    def build_audio_command(self, timeline, background_music_info, output_file):
+        """Build an ffmpeg command that only renders the audio track, None without audio"""
+        inputs, filters, audio_label = self._audio_graph(
+            timeline, background_music_info, 0
+        )
+        if not audio_label:
+            return None
+        return [
+            "ffmpeg",
+            "-y",
+            "-loglevel",
+            "error",
+            *inputs,
+            "-filter_complex",
+            ";".join(filters),
+            "-map",
+            audio_label,
+            "-c:a",
+            "aac",
+            "-ac",
+            "2",
+            str(output_file),
+        ]
+
+    def build_mux_command(self, timeline, background_music_info, video_file, output_file):
+        """Build an ffmpeg command that copies the video of video_file and adds the
+        narration and music mixed in one audio graph, None without audio"""
+        inputs, filters, audio_label = self._audio_graph(
+            timeline, background_music_info, 1
+        )
+        if not audio_label:
+            return None
+        return [
+            "ffmpeg",
+            "-y",
+            "-loglevel",
+            "error",
+            "-i",
+            str(video_file),
+            *inputs,
+            "-filter_complex",
+            ";".join(filters),
+            "-map",
+            "0:v",
+            "-map",
+            audio_label,
+            "-c:v",
+            "copy",
+            "-c:a",
+            "aac",
+            "-b:a",
+            "192k",
+            "-ac",
+            "2",
+            "-movflags",
+            "+faststart",
+            str(output_file),
+        ]
+
+    def mux_audio(self, timeline, background_music_info, video_file, output_file):
+        """Mux the timeline audio into an encoded video-only file, returns True on success"""
+        if not shutil.which("ffmpeg"):
+            self.logger.error("❌ FFmpeg not found in PATH")
+            return False
+
+        ffmpeg_cmd = self.build_mux_command(
+            timeline, background_music_info, video_file, output_file
+        )
+        if ffmpeg_cmd is None:
+            shutil.move(str(video_file), str(output_file))
+            return True
+
+        self.logger.info(f"🔧 Running FFmpeg command: {' '.join(ffmpeg_cmd)}")
+        start_time = time.perf_counter()
+        result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
+        self.logger.info(
+            f"⏱️ FFmpeg audio mux took {time.perf_counter() - start_time:.2f} seconds"
+        )
+        if result.returncode != 0:
+            self.logger.error(f"❌ FFmpeg failed with return code: {result.returncode}")
+            self.logger.error(f"❌ FFmpeg stderr: {result.stderr}")
+            return False
+        return True
+
+    def _video_graph(self, timeline, segments, overlays):
+        """Inputs and filters producing [v_out]: conformed segments with overlays"""
+        width, height, fps = timeline["width"], timeline["height"], timeline["fps"]
+        inputs = []
+        filters = []
+        input_count = 0
+
+        # Video segments, each cut at the input so only the needed part is decoded.
+        # Frame counts come from the absolute frame grid, so rounding never drifts
+        # and separately rendered parts of a timeline line up exactly
+        segment_labels = []
+        elapsed = timeline.get("time_offset", 0.0)
+        total_frames = 0
+        for group in self._loop_groups(segments):
+            entry = group[0]
+            duration = sum(piece["duration"] for piece in group)
+            first_frame = round(elapsed * fps)
+            elapsed += duration
+            frame_count = max(1, round(elapsed * fps) - first_frame)
+            total_frames += frame_count
+            if len(group) > 1:
+                # A source repeated to fill its slot is decoded once and looped by the demuxer
+                inputs += [
+                    "-stream_loop",
+                    str(len(group) - 1),
+                    "-ss",
+                    f"{entry['source_start']:.3f}",
+                    "-t",
+                    f"{duration:.3f}",
+                    "-i",
+                    str(entry["path"]),
+                ]
+            elif entry["kind"] == "image":
+                # Decoded and conformed once, then repeated by the loop filter
+                inputs += ["-i", str(entry["path"])]
+            else:
+                inputs += [
+                    "-ss",
+                    f"{entry['source_start']:.3f}",
+                    "-t",
+                    f"{entry['duration']:.3f}",
+                    "-i",
+                    str(entry["path"]),
+                ]
+            label = f"[seg{input_count}]"
+            if entry["kind"] == "image" and len(group) == 1:
+                segment_filter = self._still_filter(width, height, fps, frame_count)
+            else:
+                segment_filter = self._segment_filter(width, height, fps, frame_count)
+            filters.append(f"[{input_count}:v]{segment_filter}{label}")
+            segment_labels.append(label)
+            input_count += 1
+
+        filters.append(
+            f"{''.join(segment_labels)}concat=n={len(segment_labels)}:v=1:a=0[base]"
+        )
+
+        # Overlays, each enabled only during its interval
+        current = "[base]"
+        duration = timeline["duration"]
+        for index, overlay in enumerate(overlays):
+            start, end = overlay["start"], overlay["end"]
+            if overlay["fade_in"] and start < 0:
+                # Fade started before this segment: fade from the overlay start,
+                # then shift the stream so that it resumes mid-fade at t=0
+                inputs += [
+                    "-loop",
+                    "1",
+                    "-framerate",
+                    str(fps),
+                    "-t",
+                    f"{min(end, duration) - start:.3f}",
+                    "-i",
+                    str(overlay["path"]),
+                ]
+                source = f"[ovl{index}]"
+                filters.append(
+                    f"[{input_count}:v]format=rgba,"
+                    f"fade=t=in:st=0:d={overlay['fade_in']:.3f},"
+                    f"setpts=PTS-{-start:.3f}/TB,trim=start=0{source}"
+                )
+            elif overlay["fade_in"]:
+                inputs += [
+                    "-loop",
+                    "1",
+                    "-framerate",
+                    str(fps),
+                    "-t",
+                    f"{min(end, duration):.3f}",
+                    "-i",
+                    str(overlay["path"]),
+                ]
+                source = f"[ovl{index}]"
+                filters.append(
+                    f"[{input_count}:v]format=rgba,"
+                    f"fade=t=in:st={start:.3f}:d={overlay['fade_in']:.3f}{source}"
+                )
+            else:
+                inputs += ["-i", str(overlay["path"])]
+                source = f"[{input_count}:v]"
+            input_count += 1
+
+            output = f"[ov{index}]"
+            filters.append(
+                f"{current}{source}overlay=x={overlay['x']}:y={overlay['y']}:"
+                f"enable='gte(t,{start:.3f})*lt(t,{end:.3f})'{output}"
+            )
+            current = output
+
+        filters.append(f"{current}format=yuv420p[v_out]")
+        return inputs, filters, input_count, total_frames
+
+    def _still_filter(self, width, height, fps, frame_count):
+        """Conform a single image to the canvas once and repeat it for frame_count frames"""
+        return (
+            # Animated images (GIF) show their first frame, like a MoviePy ImageClip
+            f"trim=end_frame=1,"
+            f"scale={width}:{height}:force_original_aspect_ratio=increase,"
+            f"crop={width}:{height},setsar=1,format=yuv420p,"
+            f"loop=loop={frame_count - 1}:size=1,"
+            f"settb=1/{fps},setpts=N,fps={fps},"
+            f"trim=end_frame={frame_count}"
+        )
+
+    def _loop_groups(self, segments):
+        """Group each video entry with the entries that loop it (see VideoGenerator._plan_entry)"""
+        groups = []
+        for entry in segments:
+            if (
+                groups
+                and entry.get("loop")
+                and entry["kind"] == "video"
+                and groups[-1][-1]["path"] == entry["path"]
+            ):
+                groups[-1].append(entry)
+            else:
+                groups.append([entry])
+        return groups
+
+    def _audio_graph(self, timeline, background_music_info, input_count):
+        """Inputs and filters for narration placed under the main content, optionally mixed with music"""
+        total_duration = timeline["duration"]
+        inputs = []
+        filters = []
+        audio_label = None
+        narration = timeline.get("narration")
+        if narration:
+            inputs += ["-i", str(narration["path"])]
+            delay_ms = int(round(narration["offset"] * 1000))
+            filters.append(
+                f"[{input_count}:a]atrim=end={narration['duration']:.3f},"
+                f"asetpts=PTS-STARTPTS,adelay={delay_ms}:all=1,apad,"
+                f"atrim=end={total_duration:.3f}[voice]"
+            )
+            input_count += 1
+            audio_label = "[voice]"
+
+        if background_music_info:
+            if audio_label is None:
+                filters.append(
+                    f"anullsrc=r=44100:cl=stereo,atrim=end={total_duration:.3f}[voice]"
+                )
+                audio_label = "[voice]"
+            inputs += ["-i", str(background_music_info["file"])]
+            filters.append(
+                self._background_music_filter(
+                    background_music_info, audio_label, f"[{input_count}:a]"
+                )
+            )
+            input_count += 1
+            audio_label = "[a_out]"
+
+        return inputs, filters, audio_label
+
+    def _background_music_filter(self, background_music_info, voice_input, bgm_input):
+        """Reuse the background music mix of BackgroundMusicProcessor"""
+        return self.background_music_processor._build_ffmpeg_audio_filter(
+            background_music_info["video_duration"],
+            background_music_info["volume"],
+            background_music_info["fade_in"],
+            background_music_info["fade_out"],
+            voice_input=voice_input,
+            bgm_input=bgm_input,
+        )
+
+    def _run(self, ffmpeg_cmd, expected_duration):
+        """Run ffmpeg and print progress parsed from its -progress output"""
+        start_time = time.perf_counter()
+        last_report = 0.0
+        process = subprocess.Popen(
+            ffmpeg_cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        for line in process.stdout:
+            key, _, value = line.strip().partition("=")
+            if key != "out_time_us" or not value.isdigit():
+                continue
+            elapsed = time.perf_counter() - start_time
+            if elapsed - last_report < 2:
+                continue
+            last_report = elapsed
+            progress = min(int(value) / 1_000_000 / max(expected_duration, 0.001), 1.0)
+            print(f"Progress: {progress * 100:5.1f}% | Elapsed: {elapsed:4.0f}s")
+
+        stderr = process.stderr.read()
+        process.wait()
+        elapsed_time = time.perf_counter() - start_time
+        self.logger.info(f"⏱️ FFmpeg render took {elapsed_time:.2f} seconds")
+
+        if process.returncode != 0:
+            self.logger.error(f"❌ FFmpeg failed with return code: {process.returncode}")
+            self.logger.error(f"❌ FFmpeg stderr: {stderr}")
+            return False
+
+        self.logger.info("✅ FFmpeg render completed successfully")
+        return True
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Font resolver - finds installed fonts that can draw Chinese text by reading
+the cmap tables of the font files, without rendering anything
+
+The scan result is cached in $AIVIDEO_CACHE_DIR/fonts.json together with the
+modification times of the font directories; it is only scanned again when a
+font directory changes, and then only new or changed files are parsed.
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+from pathlib import Path
+
+from utils_module import default_cache_dir
+
+FONT_CACHE_FILE = "fonts.json"
+FONT_CACHE_VERSION = 2
+
+FONT_EXTENSIONS = {".ttf", ".otf", ".ttc", ".otc"}
+
+FONT_DIRS = [
+    # macOS
+    "/System/Library/Fonts",
+    "/Library/Fonts",
+    "~/Library/Fonts",
+    # Linux
+    "/usr/share/fonts",
+    "/usr/local/share/fonts",
+    "~/.fonts",
+    "~/.local/share/fonts",
+    # Windows
+    os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts"),
+]
+
+# A font must map all of these characters to count as Chinese compatible
+CJK_TEST_TEXT = "测试中文字体"
+
+# Chinese-compatible fonts, in order of preference
+CHINESE_FONT_NAMES = [
+    # Cross-platform Unicode fonts
+    "Arial Unicode MS",
+    "Lucida Sans Unicode",
+    # macOS
+    "Heiti SC",
+    "Heiti TC",
+    "Noto Sans SC",
+    "STHeiti Medium",
+    "STHeiti Light",
+    "PingFang SC",
+    "PingFang HK",
+    "PingFang TC",
+    "Hiragino Sans GB",
+    # Windows
+    "Microsoft YaHei",
+    "SimSun",
+    "SimHei",
+    # Linux
+    "Noto Sans CJK SC",
+    "WenQuanYi Micro Hei",
+    "AR PL UMing CN",
+]
+
+
+def _normalize(name):
+    """Font name without case, spaces, dashes and underscores"""
+    return "".join(char for char in name.lower() if char.isalnum())
+
+
+class FontResolver:
+    """Installed fonts with their family names and Chinese coverage, cached on disk"""
+
+    def __init__(self, cache_file=None, font_dirs=None, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.cache_file = Path(cache_file or default_cache_dir() / FONT_CACHE_FILE)
+        self.font_dirs = [
+            Path(font_dir).expanduser() for font_dir in (font_dirs or FONT_DIRS)
+        ]
+        self._fonts = None
+
+    def _directory_state(self):
+        """Modification time of every font directory, which changes when fonts are added or removed"""
+        state = {}
+        for root in self.font_dirs:
+            if not root.is_dir():
+                continue
+            for dirpath, _, _ in os.walk(root):
+                try:
+                    state[dirpath] = os.stat(dirpath).st_mtime_ns
+                except OSError:
+                    continue
+        return state
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == FONT_CACHE_VERSION:
+                return data
+        except Exception:
+            pass
+        return {"directories": {}, "fonts": {}}
+
+    def _save_cache(self, directories, fonts):
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.cache_file.with_name(
+                f"{self.cache_file.name}.{os.getpid()}.tmp"
+            )
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "version": FONT_CACHE_VERSION,
+                        "directories": directories,
+                        "fonts": fonts,
+                    },
+                    f,
+                    ensure_ascii=False,
+                    indent=2,
+                )
+            temp_file.replace(self.cache_file)
+        except Exception as e:
+            self.logger.warning(f"Failed to save font cache: {e}")
+
+    def fonts(self):
+        """Every installed font file: {path: {size, mtime_ns, families, cjk}}"""
+        if self._fonts is not None:
+            return self._fonts
+
+        cache = self._load_cache()
+        directories = self._directory_state()
+        if directories == cache["directories"]:
+            self._fonts = cache["fonts"]
+            return self._fonts
+
+        self.logger.info("Font directories changed, scanning installed fonts")
+        known = cache["fonts"]
+        fonts = {}
+        for dirpath in directories:
+            try:
+                entries = list(os.scandir(dirpath))
+            except OSError:
+                continue
+            for entry in entries:
+                if Path(entry.name).suffix.lower() not in FONT_EXTENSIONS:
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                previous = known.get(entry.path)
+                if (
+                    previous
+                    and previous["size"] == stat.st_size
+                    and previous["mtime_ns"] == stat.st_mtime_ns
+                ):
+                    fonts[entry.path] = previous
+                    continue
+                families, cjk = read_font_info(entry.path)
+                fonts[entry.path] = {
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "families": families,
+                    "cjk": cjk,
+                }
+
+        self._save_cache(directories, fonts)
+        self.logger.info(
+            f"Found {len(fonts)} fonts, {sum(1 for info in fonts.values() if info['cjk'])} with Chinese coverage"
+        )
+        self._fonts = fonts
+        return fonts
+
+    def find(self, name, cjk_only=False):
+        """Path of the installed font with name as one of its family names or its file name
+
+        Family names in every language match, so "SimHei" and "黑体" find the
+        same font. None if there is none.
+        """
+        wanted = _normalize(name)
+        for path, info in sorted(self.fonts().items()):
+            if cjk_only and not info["cjk"]:
+                continue
+            names = info["families"] + [Path(path).stem]
+            if any(_normalize(candidate) == wanted for candidate in names):
+                return path
+        return None
+
+    def chinese_font(self, preferred=CHINESE_FONT_NAMES):
+        """Path of a font that covers Chinese, the first preferred one if installed"""
+        for name in preferred:
+            path = self.find(name, cjk_only=True)
+            if path:
+                return path
+        cjk_fonts = sorted(path for path, info in self.fonts().items() if info["cjk"])
+        return cjk_fonts[0] if cjk_fonts else None
+
+
+def read_font_info(path):
+    """(family names, covers CJK_TEST_TEXT) of the first face of a font file"""
+    try:
+        # CJK fonts are tens of MB, only the tables that are read get paged in
+        with open(path, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as data:
+            offset = 0
+            if data[:4] == b"ttcf":
+                offset = struct.unpack_from(">I", data, 12)[0]
+            tables = _table_directory(data, offset)
+            families = _family_names(data, tables.get(b"name"))
+            cmap = _cmap_lookup(data, tables.get(b"cmap"))
+            cjk = cmap is not None and all(cmap(ord(char)) for char in CJK_TEST_TEXT)
+            return families, cjk
+    except Exception:
+        return [], False
+
+
+def _table_directory(data, offset):
+    num_tables = struct.unpack_from(">H", data, offset + 4)[0]
+    tables = {}
+    for i in range(num_tables):
+        tag, _, table_offset, _ = struct.unpack_from(">4sIII", data, offset + 12 + 16 * i)
+        tables[tag] = table_offset
+    return tables
+
+
+def _family_names(data, offset):
+    """Every font family name (name ID 1) in the name table, English first
+
+    Records are sorted by language, so localized names such as zh-TW (0x0404)
+    come before en-US (0x0409); the English name is moved to the front.
+    """
+    if offset is None:
+        return []
+    _, count, string_offset = struct.unpack_from(">HHH", data, offset)
+    english, names = [], []
+    for i in range(count):
+        platform, encoding, language, name_id, length, name_offset = struct.unpack_from(
+            ">HHHHHH", data, offset + 6 + 12 * i
+        )
+        if name_id != 1:
+            continue
+        start = offset + string_offset + name_offset
+        raw = data[start : start + length]
+        if platform == 3 or platform == 0:
+            name = raw.decode("utf-16-be", errors="ignore")
+        elif platform == 1 and encoding == 0:
+            name = raw.decode("mac_roman", errors="ignore")
+        else:
+            continue
+        # Windows en-US, or Macintosh English
+        is_english = (platform == 3 and language == 0x0409) or (
+            platform == 1 and language == 0
+        )
+        if name:
+            (english if is_english else names).append(name)
+    return list(dict.fromkeys(english + names))
+
+
+def _cmap_lookup(data, offset):
+    """Function telling whether a code point maps to a glyph, from the best Unicode cmap subtable"""
+    if offset is None:
+        return None
+    num_tables = struct.unpack_from(">H", data, offset + 2)[0]
+    subtables = {}
+    for i in range(num_tables):
+        platform, encoding, sub_offset = struct.unpack_from(">HHI", data, offset + 4 + 8 * i)
+        subtables[(platform, encoding)] = offset + sub_offset
+
+    for key in [(3, 10), (0, 4), (0, 6), (3, 1), (0, 3), (0, 1), (0, 0)]:
+        sub_offset = subtables.get(key)
+        if sub_offset is None:
+            continue
+        table_format = struct.unpack_from(">H", data, sub_offset)[0]
+        if table_format == 12:
+            return _format12_lookup(data, sub_offset)
+        if table_format == 4:
+            return _format4_lookup(data, sub_offset)
+    return None
+
+
+def _format12_lookup(data, offset):
+    num_groups = struct.unpack_from(">I", data, offset + 12)[0]
+    groups = [
+        struct.unpack_from(">III", data, offset + 16 + 12 * i) for i in range(num_groups)
+    ]
+
+    def has_glyph(code):
+        for start, end, start_glyph in groups:
+            if start <= code <= end:
+                return start_glyph + code - start != 0
+        return False
+
+    return has_glyph
+
+
+def _format4_lookup(data, offset):
+    seg_count = struct.unpack_from(">H", data, offset + 6)[0] // 2
+    end_codes = struct.unpack_from(f">{seg_count}H", data, offset + 14)
+    start_offset = offset + 16 + 2 * seg_count
+    start_codes = struct.unpack_from(f">{seg_count}H", data, start_offset)
+    deltas = struct.unpack_from(f">{seg_count}h", data, start_offset + 2 * seg_count)
+    range_offset_base = start_offset + 4 * seg_count
+    range_offsets = struct.unpack_from(f">{seg_count}H", data, range_offset_base)
+
+    def has_glyph(code):
+        for i in range(seg_count):
+            if end_codes[i] < code:
+                continue
+            if start_codes[i] > code:
+                return False
+            if range_offsets[i] == 0:
+                return (code + deltas[i]) & 0xFFFF != 0
+            glyph_offset = (
+                range_offset_base + 2 * i + range_offsets[i] + 2 * (code - start_codes[i])
+            )
+            glyph = struct.unpack_from(">H", data, glyph_offset)[0]
+            return glyph != 0 and (glyph + deltas[i]) & 0xFFFF != 0
+        return False
+
+    return has_glyph
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Frame cache - keeps the decoded frames of short looped video sources in
+memory, so a clip that is repeated to fill its slot is decoded only once
+
+Without it every repetition seeks the MoviePy reader back to the start,
+which restarts ffmpeg and decodes the same frames again. Sources are only
+admitted while all their frames fit in the memory budget, so a loop can
+never evict its own frames before they are reused.
+"""
+
+import logging
+import math
+
+# Memory budget for decoded frames of all looped sources
+FRAME_CACHE_BYTES = 1024 * 1024 * 1024
+
+
+class FrameCache:
+    """Admits whole sources into a fixed memory budget and memoizes their frames"""
+
+    def __init__(self, max_bytes=FRAME_CACHE_BYTES, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.max_bytes = max_bytes
+        self.reserved_bytes = 0
+
+    def wrap(self, clip):
+        """Return clip with memoized frames, or clip itself if it does not fit"""
+        fps = getattr(clip, "fps", None)
+        if not fps or not clip.duration:
+            return clip
+
+        frame_count = math.ceil(clip.duration * fps) + 1
+        clip_bytes = frame_count * clip.w * clip.h * 3
+        if self.reserved_bytes + clip_bytes > self.max_bytes:
+            self.logger.info(
+                f"Looped clip too large for the frame cache ({clip_bytes / 1024 / 1024:.0f}MB), decoding per repetition"
+            )
+            return clip
+        self.reserved_bytes += clip_bytes
+
+        frames = {}
+
+        def cached_frame(get_frame, t):
+            # Same frame index rule as MoviePy's ffmpeg reader
+            index = int(fps * t + 0.00001)
+            frame = frames.get(index)
+            if frame is None:
+                frame = frames[index] = get_frame(t)
+            return frame
+
+        self.logger.info(
+            f"Caching decoded frames of looped clip ({clip_bytes / 1024 / 1024:.0f}MB reserved)"
+        )
+        return clip.transform(cached_frame)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+LLM cache - stores generated subtitles keyed by the request (prompt, system
+prompt, provider and model), so unchanged prompts are not sent to the LLM again
+"""
+
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+
+from utils_module import default_cache_dir
+
+
+class LLMCache:
+    """Subtitle responses on disk with an expiry time"""
+
+    def __init__(self, ttl_hours=168, cache_dir=None, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.ttl_hours = ttl_hours
+        self.cache_dir = Path(cache_dir or default_cache_dir()) / "llm"
+
+    def key(self, provider, model_name, messages):
+        """Hash of everything that determines the LLM response"""
+        content = json.dumps(
+            {"provider": provider, "model": model_name, "messages": messages},
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached entry for key, None if missing, expired or caching is disabled"""
+        if not self.ttl_hours or self.ttl_hours <= 0:
+            return None
+        cache_file = self.cache_dir / f"{key}.json"
+        if not cache_file.exists():
+            return None
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except Exception as e:
+            self.logger.warning(f"Ignoring broken LLM cache entry {cache_file}: {e}")
+            return None
+
+        age_hours = (time.time() - entry["created"]) / 3600
+        if age_hours > self.ttl_hours:
+            self.logger.info(
+                f"LLM cache entry expired ({age_hours:.1f}h old, TTL {self.ttl_hours}h)"
+            )
+            return None
+        self.logger.info(f"LLM cache hit: {cache_file.name} ({age_hours:.1f}h old)")
+        return entry
+
+    def put(self, key, provider, model_name, voice_subtitles):
+        """Store the subtitles of a response"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            entry = {
+                "created": time.time(),
+                "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "provider": provider,
+                "model": model_name,
+                "voice_subtitles": voice_subtitles,
+            }
+            cache_file = self.cache_dir / f"{key}.json"
+            temp_file = cache_file.with_suffix(".tmp")
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False, indent=2)
+            temp_file.replace(cache_file)
+        except Exception as e:
+            self.logger.warning(f"Failed to write LLM cache: {e}")
+
+    def clear(self):
+        """Remove every cached response"""
+        removed = 0
+        for cache_file in self.cache_dir.glob("*.json"):
+            cache_file.unlink()
+            removed += 1
+        self.logger.info(f"Cleared {removed} LLM cache entries")
+        print(f"🧹 Cleared {removed} cached LLM responses")
@@ -12,95 +12,9 @@ from typing import Optional, Dict, Any
 
 # Import configuration module
 from config_module import Config
+from llm_cache import LLMCache
 
-
-class LLMManager:
-    """
-    LLM Manager class - handles all LLM-related operations
-    """
-
-    def __init__(self, config: Config):
-        self.config = config
-        self.logger = config.logger
-
-    def get_llm_model_config(self, provider: str) -> Optional[Dict[str, Any]]:
-        """Get model configuration for specified LLM provider"""
-        return self.config.get_llm_model_config(provider)
-
-    def generate_subtitles(
-        self, args, prompt_folder: Path, subtitle_folder: Path, logger, genStatic
-    ):
-        """Generate subtitles using LLM"""
-        logger.info("Generating subtitles using LLM...")
-
-        # Read prompt file
-        prompt_file = prompt_folder / "prompt.txt"
-        if not prompt_file.exists():
-            raise FileNotFoundError(f"Prompt file not found: {prompt_file}")
-
-        # Read the prompt
-        with open(prompt_file, "r", encoding="utf-8") as f:
-            prompt_content = f.read()
-
-        # Generate subtitles using litellm API
-        llm_config = None
-        model_name = None
-        provider = None
-        try:
-            # Get LLM configuration from command line argument
-            provider = getattr(args, "llm_provider", "qwen")
-            llm_config = self.get_llm_model_config(provider)
-            if llm_config:
-                model_name = llm_config.get("model_name", "unknown")
-
-            # Check if litellm configuration is available
-            api_base = os.getenv("LITELLM_API_BASE_URL", "http://localhost:4000")
-            api_key = os.getenv("LITELLM_MASTER_KEY")
-            if llm_config:
-                model_name = llm_config.get("model", "unknown")
-            else:
-                model_name = "unknown"
-
-            if not api_key:
-                raise ValueError(
-                    "LITELLM_MASTER_KEY not found in environment variables"
-                )
-
-            # Check if provider-specific API key is needed and available
-            if llm_config:
-                provider_env_key = llm_config.get("env_key")
-                if provider_env_key:
-                    provider_api_key = os.getenv(provider_env_key)
-                    if not provider_api_key:
-                        display_name = llm_config.get("display_name", "unknown")
-                        raise ValueError(
-                            f"{provider_env_key} not found in environment variables (required for {display_name})"
-                        )
-
-            if llm_config:
-                display_name = llm_config.get("display_name", "unknown")
-                logger.info(f"Using LLM provider: {display_name} ({provider})")
-            else:
-                logger.info(f"Using LLM provider: {provider}")
-            logger.info(f"Model: {model_name}")
-
-            # Configure OpenAI client to use litellm endpoint
-            original_base_url = openai.base_url
-            original_api_key = openai.api_key
-
-            try:
-                # Temporarily configure OpenAI client for litellm
-                openai.base_url = f"{api_base}/v1/"
-                openai.api_key = api_key
-
-                logger.info(f"Using litellm endpoint: {openai.base_url}")
-
-                response = openai.chat.completions.create(
-                    model=model_name,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": """You are a professional subtitle generator for videos. Your task is to create natural, well-timed subtitles based on the given content.
+SUBTITLE_SYSTEM_PROMPT = """You are a professional subtitle generator for videos. Your task is to create natural, well-timed subtitles based on the given content.
 
 CRITICAL PUNCTUATION REQUIREMENTS:
 1. **RESTRICTED PUNCTUATION**: You may ONLY use these four Chinese punctuation marks:
@@ -158,11 +72,10 @@ Examples of good subtitles:
 "集成管理采用软硬件一体化设计"
 "即插即用便捷体验"
 
-""",
-                        },
-                        {
-                            "role": "user",
-                            "content": f"""{prompt_content}
+"""
+
+# Appended to the project prompt in the user message
+SUBTITLE_PROMPT_RULES = """
 
 IMPORTANT: When generating subtitles for the above content, you MUST follow these punctuation rules:
 
@@ -170,24 +83,196 @@ IMPORTANT: When generating subtitles for the above content, you MUST follow thes
 - NEVER use: em dashes (——), semicolons (；), colons (：), parentheses, quotes, enumeration commas (、), or any English punctuation
 - NO other special characters or symbols allowed
 
-Generate clean, natural subtitles using only the allowed punctuation marks.""",
-                        },
-                    ],
-                )
+Generate clean, natural subtitles using only the allowed punctuation marks."""
+
+
+class LLMManager:
+    """
+    LLM Manager class - handles all LLM-related operations
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.logger = config.logger
+
+    def get_llm_model_config(self, provider: str) -> Optional[Dict[str, Any]]:
+        """Get model configuration for specified LLM provider"""
+        return self.config.get_llm_model_config(provider)
+
+    def _request_subtitles(
+        self,
+        provider,
+        llm_config,
+        model_name,
+        messages,
+        api_base,
+        api_key,
+        logger,
+        on_line=None,
+    ):
+        """Ask the LLM for subtitles, returns one subtitle per line of the response
+
+        With on_line the response is streamed and every subtitle line is passed
+        to on_line as soon as the model has finished it.
+        """
+        if not api_key:
+            raise ValueError("LITELLM_MASTER_KEY not found in environment variables")
+
+        # Check if provider-specific API key is needed and available
+        if llm_config:
+            provider_env_key = llm_config.get("env_key")
+            if provider_env_key:
+                provider_api_key = os.getenv(provider_env_key)
+                if not provider_api_key:
+                    display_name = llm_config.get("display_name", "unknown")
+                    raise ValueError(
+                        f"{provider_env_key} not found in environment variables (required for {display_name})"
+                    )
+
+        if llm_config:
+            display_name = llm_config.get("display_name", "unknown")
+            logger.info(f"Using LLM provider: {display_name} ({provider})")
+        else:
+            logger.info(f"Using LLM provider: {provider}")
+        logger.info(f"Model: {model_name}")
+
+        # Configure OpenAI client to use litellm endpoint
+        original_base_url = openai.base_url
+        original_api_key = openai.api_key
+
+        try:
+            # Temporarily configure OpenAI client for litellm
+            openai.base_url = f"{api_base}/v1/"
+            openai.api_key = api_key
+
+            logger.info(f"Using litellm endpoint: {openai.base_url}")
+
+            if on_line:
+                return self._stream_subtitles(model_name, messages, on_line)
+
+            response = openai.chat.completions.create(
+                model=model_name,
+                messages=messages,
+            )
+
+        finally:
+            # Restore original OpenAI configuration
+            openai.base_url = original_base_url
+            openai.api_key = original_api_key
+
+        # Parse subtitles from response
+        subtitles_text = response.choices[0].message.content
+        if subtitles_text is None:
+            subtitles_text = ""
+        raw_subtitles = [
+            line.strip() for line in subtitles_text.split("\n") if line.strip()
+        ]
+        return raw_subtitles
+
+    def _stream_subtitles(self, model_name, messages, on_line):
+        """Stream the chat completion and hand over each subtitle line as soon as it is complete"""
+        stream = openai.chat.completions.create(
+            model=model_name,
+            messages=messages,
+            stream=True,
+        )
+        raw_subtitles = []
+        pending = ""
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            pending += chunk.choices[0].delta.content or ""
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                if line.strip():
+                    raw_subtitles.append(line.strip())
+                    on_line(line.strip())
+        if pending.strip():
+            raw_subtitles.append(pending.strip())
+            on_line(pending.strip())
+        return raw_subtitles
+
+    def generate_subtitles(
+        self,
+        args,
+        prompt_folder: Path,
+        subtitle_folder: Path,
+        logger,
+        genStatic,
+        on_line=None,
+    ):
+        """Generate subtitles using LLM
+
+        on_line, if given, is called with every subtitle line as soon as it is
+        available (streaming the response), e.g. to start TTS early.
+        """
+        logger.info("Generating subtitles using LLM...")
+
+        # Read prompt file
+        prompt_file = prompt_folder / "prompt.txt"
+        if not prompt_file.exists():
+            raise FileNotFoundError(f"Prompt file not found: {prompt_file}")
+
+        # Read the prompt
+        with open(prompt_file, "r", encoding="utf-8") as f:
+            prompt_content = f.read()
 
-            finally:
-                # Restore original OpenAI configuration
-                openai.base_url = original_base_url
-                openai.api_key = original_api_key
-
-            # Parse subtitles from response
-            subtitles_text = response.choices[0].message.content
-            if subtitles_text is None:
-                subtitles_text = ""
-            raw_subtitles = [
-                line.strip() for line in subtitles_text.split("\n") if line.strip()
+        # Generate subtitles using litellm API
+        llm_config = None
+        model_name = None
+        provider = None
+        try:
+            # Get LLM configuration from command line argument
+            provider = getattr(args, "llm_provider", "qwen")
+            llm_config = self.get_llm_model_config(provider)
+            if llm_config:
+                model_name = llm_config.get("model_name", "unknown")
+
+            # Check if litellm configuration is available
+            api_base = os.getenv("LITELLM_API_BASE_URL", "http://localhost:4000")
+            api_key = os.getenv("LITELLM_MASTER_KEY")
+            if llm_config:
+                model_name = llm_config.get("model", "unknown")
+            else:
+                model_name = "unknown"
+
+            messages = [
+                {"role": "system", "content": SUBTITLE_SYSTEM_PROMPT},
+                {"role": "user", "content": f"{prompt_content}{SUBTITLE_PROMPT_RULES}"},
             ]
 
+            # Reuse the subtitles of an identical earlier request
+            llm_cache = LLMCache(
+                ttl_hours=getattr(args, "llm_cache_ttl", 168), logger=logger
+            )
+            if getattr(args, "clear_llm_cache", False):
+                llm_cache.clear()
+            cache_key = llm_cache.key(provider, model_name, messages)
+            cached = None
+            if getattr(args, "fresh_subtitle", False):
+                logger.info("Fresh subtitles requested, not using the LLM cache")
+            else:
+                cached = llm_cache.get(cache_key)
+
+            if cached:
+                print(f"♻️ Using cached subtitles from {cached['created_at']}")
+                raw_subtitles = cached["voice_subtitles"]
+                if on_line:
+                    for line in raw_subtitles:
+                        on_line(line)
+            else:
+                raw_subtitles = self._request_subtitles(
+                    provider,
+                    llm_config,
+                    model_name,
+                    messages,
+                    api_base,
+                    api_key,
+                    logger,
+                    on_line,
+                )
+                llm_cache.put(cache_key, provider, model_name, raw_subtitles)
+
             # Store original subtitles for voice generation (with punctuation)
             voice_subtitles = raw_subtitles
 
@@ -22,10 +22,10 @@ CompositeVideoClipType = TypeVar("CompositeVideoClipType")
 AudioClipType = TypeVar("AudioClipType")
 
 
-def main():
+def main(argv=None):
     """Main function - let's get this show on the road!"""
     try:
-        args = parse_args()
+        args = parse_args(argv)
 
         # Check if repeatmode is provided (required parameter)
         if not hasattr(args, 'repeatmode') or args.repeatmode is None:
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Media probe index - remembers duration, dimensions, fps, codecs, rotation,
+audio presence and the corruption verdict of every video in a project, so
+repeated runs plan clips without opening a decoder for each media file
+"""
+
+import json
+import logging
+import re
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+# Index file stored in the project folder
+PROBE_INDEX_FILE = "media_probe.json"
+PROBE_INDEX_VERSION = 1
+
+# Videos reported longer than this are treated as corrupted
+MAX_VALID_DURATION = 3600
+
+AUDIO_STREAM_PATTERN = re.compile(r"Stream #0:\d+.*?: Audio: (\w+)")
+
+
+class MediaProbeIndex:
+    """Persistent probe results keyed by path, size and modification time"""
+
+    def __init__(self, project_folder, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.index_file = Path(project_folder) / PROBE_INDEX_FILE
+        self.entries = self._load()
+        self.dirty = False
+        self.lock = threading.Lock()
+
+    def _load(self):
+        """Load the index file, starting empty if it is missing or unreadable"""
+        if not self.index_file.exists():
+            return {}
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != PROBE_INDEX_VERSION:
+                self.logger.info("Media probe index has an old format, rebuilding")
+                return {}
+            return data.get("entries", {})
+        except Exception as e:
+            self.logger.warning(f"Could not read media probe index {self.index_file}: {e}")
+            return {}
+
+    def save(self):
+        """Write the index file if new probe results were added"""
+        if not self.dirty:
+            return
+        try:
+            temp_file = self.index_file.with_suffix(".tmp")
+            with self.lock:
+                with open(temp_file, "w", encoding="utf-8") as f:
+                    json.dump(
+                        {"version": PROBE_INDEX_VERSION, "entries": self.entries},
+                        f,
+                        ensure_ascii=False,
+                        indent=2,
+                    )
+                self.dirty = False
+            temp_file.replace(self.index_file)
+            self.logger.info(
+                f"Saved media probe index with {len(self.entries)} entries: {self.index_file}"
+            )
+        except Exception as e:
+            self.logger.warning(f"Could not save media probe index: {e}")
+
+    def probe(self, file_path):
+        """Return the probe entry of a video, probing it only if it is new or changed"""
+        file_path = Path(file_path)
+        try:
+            stat = file_path.stat()
+        except OSError as e:
+            self.logger.warning(f"Cannot probe {file_path}: {e}")
+            return None
+
+        key = str(file_path.resolve())
+        with self.lock:
+            entry = self.entries.get(key)
+        if (
+            entry
+            and entry["size"] == stat.st_size
+            and entry["mtime_ns"] == stat.st_mtime_ns
+        ):
+            return entry
+
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        entry.update(self._probe_file(file_path))
+        with self.lock:
+            self.entries[key] = entry
+            self.dirty = True
+
+        if entry["corrupt"]:
+            self.logger.warning(f"Probed {file_path.name}: corrupted ({entry['reason']})")
+        else:
+            self.logger.info(
+                f"Probed {file_path.name}: {entry['duration']:.2f}s, "
+                f"{entry['width']}x{entry['height']} @ {entry['fps']}fps, "
+                f"{entry['video_codec']}, audio: {entry['audio_codec'] if entry['has_audio'] else 'none'}"
+            )
+        return entry
+
+    def probe_many(self, file_paths, workers=4):
+        """Probe several videos, at most workers at a time; returns entries in order"""
+        file_paths = list(file_paths)
+        if workers <= 1 or len(file_paths) <= 1:
+            return [self.probe(file_path) for file_path in file_paths]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self.probe, file_paths))
+
+    def _probe_file(self, file_path):
+        """Probe a video file and decide whether it is usable"""
+        result = {
+            "duration": None,
+            "width": None,
+            "height": None,
+            "fps": None,
+            "video_codec": None,
+            "audio_codec": None,
+            "rotation": 0,
+            "has_audio": False,
+            "corrupt": True,
+            "reason": None,
+        }
+
+        try:
+            # Same parser as VideoFileClip, so durations match the decoded clips
+            infos = ffmpeg_parse_infos(str(file_path), check_duration=True)
+        except Exception as e:
+            message = str(e).strip().splitlines()
+            result["reason"] = f"cannot parse file: {message[-1] if message else e}"
+            return result
+
+        if not infos.get("video_found"):
+            result["reason"] = "no video stream"
+            return result
+
+        width, height = infos.get("video_size") or (None, None)
+        result.update(
+            duration=infos.get("video_duration") or infos.get("duration"),
+            width=width,
+            height=height,
+            fps=infos.get("video_fps"),
+            video_codec=infos.get("video_codec_name"),
+            rotation=infos.get("video_rotation", 0) or 0,
+            has_audio=bool(infos.get("audio_found")),
+        )
+
+        duration = result["duration"]
+        if duration is None or duration <= 0:
+            result["reason"] = f"invalid duration: {duration}"
+            return result
+        if duration > MAX_VALID_DURATION:
+            result["reason"] = f"too long ({duration:.2f}s), might be corrupted"
+            return result
+
+        decoded, audio_codec = self._decode_first_frame(file_path)
+        result["audio_codec"] = audio_codec
+        if decoded:
+            result["corrupt"] = False
+        else:
+            result["reason"] = "first frame cannot be decoded"
+        return result
+
+    def _decode_first_frame(self, file_path):
+        """Decode the first video frame; returns (success, audio codec name)"""
+        try:
+            check = subprocess.run(
+                [
+                    "ffmpeg",
+                    "-hide_banner",
+                    "-i",
+                    str(file_path),
+                    "-map",
+                    "0:v:0",
+                    "-frames:v",
+                    "1",
+                    "-f",
+                    "null",
+                    "-",
+                ],
+                capture_output=True,
+                text=True,
+                timeout=60,
+            )
+        except Exception as e:
+            self.logger.debug(f"Frame check failed for {file_path}: {e}")
+            return False, None
+
+        # The stream listing on stderr names the audio codec
+        match = AUDIO_STREAM_PATTERN.search(check.stderr)
+        return check.returncode == 0, match.group(1) if match else None
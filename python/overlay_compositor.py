@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Overlay compositor - blends titles, subtitles and body text onto video frames
+
+Overlay layers (see utils_module.make_overlay_layer) are kept in one flat,
+time-sorted interval index. For every frame only the layers that are visible
+at that time are looked up and blended with premultiplied alpha on the uint8
+frame, instead of MoviePy walking every layer of a CompositeVideoClip.
+"""
+
+import numpy as np
+from moviepy import ImageClip
+from moviepy.tools import compute_position
+
+
+def rasterize_clip(clip, canvas_size, t=0.0):
+    """Return (x, y, rgb, alpha) of a clip placed on a canvas at time t
+
+    rgb is float32 HxWx3 (0-255), alpha float32 HxW (0-1); the position is
+    not clipped to the canvas.
+    """
+    rgb = clip.get_frame(t)[:, :, :3].astype(np.float32)
+    height, width = rgb.shape[:2]
+    if clip.mask is not None:
+        # MoviePy crops or zero-pads a mask that does not match the frame
+        alpha = np.zeros((height, width), dtype=np.float32)
+        mask = clip.mask.get_frame(t)
+        mask_h, mask_w = min(height, mask.shape[0]), min(width, mask.shape[1])
+        alpha[:mask_h, :mask_w] = mask[:mask_h, :mask_w]
+    else:
+        alpha = np.ones((height, width), dtype=np.float32)
+
+    x, y = compute_position((width, height), canvas_size, clip.pos(t), clip.relative_pos)
+    return x, y, rgb, alpha
+
+
+class OverlayCompositor:
+    """Blends the overlay layers active at time t onto a frame"""
+
+    def __init__(self, layers, canvas_size):
+        self.canvas_size = canvas_size
+        self.layers = [layer for layer in layers if layer["end"] > layer["start"]]
+
+        # Still images (TextClip, ColorClip) are rasterized once
+        self._bitmaps = [
+            self._bitmap(layer["clip"], 0.0)
+            if isinstance(layer["clip"], ImageClip)
+            else None
+            for layer in self.layers
+        ]
+
+        # Interval index: layers sorted by start time, stacking order kept in _order
+        starts = np.array([layer["start"] for layer in self.layers], dtype=np.float64)
+        ends = np.array([layer["end"] for layer in self.layers], dtype=np.float64)
+        self._order = np.argsort(starts, kind="stable")
+        self._starts = starts[self._order]
+        self._ends = ends[self._order]
+
+        # Last blend of still layers onto an unchanged frame (e.g. an image clip)
+        self._last_blend = None
+
+    def active_layers(self, t):
+        """Indices of the layers visible at time t, bottom to top"""
+        count = np.searchsorted(self._starts, t, side="right")
+        candidates = self._order[:count]
+        return np.sort(candidates[self._ends[:count] > t])
+
+    def _bitmap(self, clip, t):
+        """Premultiplied uint16 color and inverse alpha of a clip, clipped to the canvas"""
+        canvas_w, canvas_h = self.canvas_size
+        x, y, rgb, alpha = rasterize_clip(clip, self.canvas_size, t)
+        x1, y1 = max(x, 0), max(y, 0)
+        x2 = min(x + rgb.shape[1], canvas_w)
+        y2 = min(y + rgb.shape[0], canvas_h)
+        if x2 <= x1 or y2 <= y1:
+            return None
+
+        rgb = rgb[y1 - y : y2 - y, x1 - x : x2 - x]
+        alpha = np.rint(alpha[y1 - y : y2 - y, x1 - x : x2 - x, np.newaxis] * 255)
+        premultiplied = np.rint(rgb * alpha / 255).astype(np.uint16)
+        inverse_alpha = (255 - alpha).astype(np.uint16)
+        return (slice(y1, y2), slice(x1, x2)), premultiplied, inverse_alpha
+
+    def blend(self, frame, t):
+        """Return a copy of frame with all layers active at time t blended on top
+
+        While the source frame object and the still layers on it stay the same,
+        the previous result is returned instead of blending again.
+        """
+        active = self.active_layers(t)
+        if len(active) == 0:
+            return frame
+
+        static = all(
+            self._bitmaps[index] is not None
+            and not (
+                self.layers[index].get("fade_in")
+                and t - self.layers[index]["start"] < self.layers[index]["fade_in"]
+            )
+            for index in active
+        )
+        key = tuple(active)
+        if static and self._last_blend is not None:
+            last_frame, last_key, last_result = self._last_blend
+            if last_frame is frame and last_key == key:
+                return last_result
+
+        source = frame
+        frame = np.array(frame[:, :, :3], dtype=np.uint8)
+        for index in active:
+            layer = self.layers[index]
+            local_t = t - layer["start"]
+            bitmap = self._bitmaps[index]
+            if bitmap is None:
+                if isinstance(layer["clip"], ImageClip):
+                    continue  # Still image outside of the canvas
+                bitmap = self._bitmap(layer["clip"], local_t)
+                if bitmap is None:
+                    continue
+
+            region, premultiplied, inverse_alpha = bitmap
+            fade_in = layer.get("fade_in")
+            if fade_in and local_t < fade_in:
+                # Same as MoviePy's FadeIn: the color fades in from black, the mask does not
+                premultiplied = (premultiplied * (local_t / fade_in)).astype(np.uint16)
+
+            target = frame[region]
+            frame[region] = premultiplied + (target * inverse_alpha + 127) // 255
+
+        # Holding source keeps its identity unique while it is compared against
+        self._last_blend = (source, key, frame) if static else None
+        return frame
+
+
+def composite_overlays(clip, layers):
+    """Return clip with the overlay layers blended on top, layer times relative to clip"""
+    if not layers:
+        return clip
+
+    compositor = OverlayCompositor(layers, clip.size)
+    return clip.transform(lambda get_frame, t: compositor.blend(get_frame(t), t))
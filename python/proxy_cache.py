@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Proxy cache - shared store of conformed mezzanine copies of video sources
+
+Stock clips are reused across many projects. Every source is transcoded once
+into a proxy that already has the output canvas size, frame rate and pixel
+format, with short closed GOPs and no B-frames so seeking stays cheap. The
+proxy is keyed by a hash of the file content plus the conform parameters, so
+every project that uses the same clip shares it. The cache is bounded in size
+and evicts the least recently used proxies, except those the running job has
+resolved (pinned until release) and those used by any job within the grace
+window, which other renders may still be reading.
+
+Usage:
+    python proxy_cache.py warm /path/to/project/media --jobs 4
+    python proxy_cache.py stats
+    python proxy_cache.py clear
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from utils_module import default_cache_dir
+
+# Conform parameters of the proxies, same as the output canvas
+PROXY_CANVAS_SIZE = (1080, 1920)
+PROXY_FPS = 24
+PROXY_PIXEL_FORMAT = "yuv420p"
+
+# Default size limit of the cache in GB
+DEFAULT_PROXY_CACHE_GB = 50
+
+# Proxies used within this many seconds are never evicted
+EVICTION_GRACE_SECONDS = 6 * 60 * 60
+
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mov", ".mkv", ".wmv", ".flv"}
+
+# Content hashes by path, size and modification time
+HASH_INDEX_FILE = "hashes.json"
+
+
+class ProxyCache:
+    """Conformed proxies keyed by source content and conform parameters"""
+
+    def __init__(
+        self,
+        canvas_size=PROXY_CANVAS_SIZE,
+        fps=PROXY_FPS,
+        pixel_format=PROXY_PIXEL_FORMAT,
+        max_gb=DEFAULT_PROXY_CACHE_GB,
+        cache_dir=None,
+        logger=None,
+    ):
+        self.logger = logger or logging.getLogger(__name__)
+        self.canvas_size = tuple(canvas_size)
+        self.fps = fps
+        self.pixel_format = pixel_format
+        self.max_bytes = int(max_gb * 1024 * 1024 * 1024)
+        self.cache_dir = Path(cache_dir or default_cache_dir()) / "proxy"
+        self.hash_index = self._load_hash_index()
+        self.index_lock = threading.Lock()
+        # Proxies resolved by this job, kept until release()
+        self.pinned = set()
+
+    def _load_hash_index(self):
+        try:
+            with open(self.cache_dir / HASH_INDEX_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _save_hash_index(self):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            index_file = self.cache_dir / HASH_INDEX_FILE
+            temp_file = index_file.with_name(f"{index_file.name}.{os.getpid()}.tmp")
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(self.hash_index, f, indent=2)
+            temp_file.replace(index_file)
+        except Exception as e:
+            self.logger.warning(f"Failed to save proxy hash index: {e}")
+
+    def content_hash(self, file_path):
+        """SHA-256 of the file content, remembered while the file is unchanged"""
+        file_path = Path(file_path).resolve()
+        stat = file_path.stat()
+        with self.index_lock:
+            known = self.hash_index.get(str(file_path))
+        if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+            return known["sha256"]
+
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(4 * 1024 * 1024), b""):
+                digest.update(chunk)
+        with self.index_lock:
+            self.hash_index[str(file_path)] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": digest.hexdigest(),
+            }
+            self._save_hash_index()
+        return digest.hexdigest()
+
+    def key(self, file_path):
+        """Hash of the source content and the conform parameters"""
+        content = json.dumps(
+            {
+                "source": self.content_hash(file_path),
+                "size": self.canvas_size,
+                "fps": self.fps,
+                "pixel_format": self.pixel_format,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get(self, file_path):
+        """Path of the proxy of file_path, transcoded on first use; None if that fails"""
+        try:
+            proxy_file = self.cache_dir / f"{self.key(file_path)}.mp4"
+        except OSError as e:
+            self.logger.warning(f"Cannot hash {file_path} for the proxy cache: {e}")
+            return None
+
+        if proxy_file.exists():
+            try:
+                # The modification time orders the proxies for LRU eviction
+                os.utime(proxy_file)
+                self.pinned.add(proxy_file)
+                return proxy_file
+            except FileNotFoundError:
+                # Evicted by another job in the meantime
+                pass
+        if not self._transcode(file_path, proxy_file):
+            return None
+        self.pinned.add(proxy_file)
+        self.evict()
+        return proxy_file
+
+    def release(self):
+        """Unpin the proxies of the finished job and evict down to the size limit"""
+        self.pinned.clear()
+        self.evict()
+
+    def _transcode(self, file_path, proxy_file):
+        """Transcode a source into a conformed, fast-seeking proxy"""
+        width, height = self.canvas_size
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        temp_file = proxy_file.with_name(
+            f"{proxy_file.stem}.{os.getpid()}.{threading.get_ident()}.tmp.mp4"
+        )
+        ffmpeg_cmd = [
+            "ffmpeg",
+            "-y",
+            "-loglevel",
+            "error",
+            "-i",
+            str(file_path),
+            "-vf",
+            f"scale={width}:{height}:force_original_aspect_ratio=increase,"
+            f"crop={width}:{height},setsar=1,fps={self.fps}",
+            "-c:v",
+            "libx264",
+            "-preset",
+            "veryfast",
+            "-tune",
+            "fastdecode",
+            "-crf",
+            "18",
+            "-pix_fmt",
+            self.pixel_format,
+            # Keyframe every half second and no B-frames, so seeking decodes little
+            "-g",
+            str(max(1, self.fps // 2)),
+            "-bf",
+            "0",
+            "-flags",
+            "+cgop",
+            "-c:a",
+            "aac",
+            "-b:a",
+            "192k",
+            "-movflags",
+            "+faststart",
+            str(temp_file),
+        ]
+
+        self.logger.info(f"🎞️ Creating proxy for {file_path}")
+        start_time = time.perf_counter()
+        result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            self.logger.error(f"❌ Proxy transcode failed for {file_path}: {result.stderr}")
+            temp_file.unlink(missing_ok=True)
+            return False
+        temp_file.replace(proxy_file)
+        self.logger.info(
+            f"⏱️ Proxy for {Path(file_path).name} took {time.perf_counter() - start_time:.2f} seconds"
+        )
+        return True
+
+    def _proxies(self):
+        return [path for path in self.cache_dir.glob("*.mp4") if ".tmp" not in path.suffixes]
+
+    def evict(self, grace_seconds=EVICTION_GRACE_SECONDS):
+        """Remove least recently used proxies until the cache fits its size limit
+
+        Pinned proxies and proxies used within grace_seconds are kept even if
+        the cache stays over its limit.
+        """
+        proxies = []
+        cutoff = time.time() - grace_seconds
+        for path in self._proxies():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            proxies.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in proxies)
+        for mtime, size, path in sorted(proxies):
+            if total <= self.max_bytes or mtime > cutoff:
+                break
+            if path in self.pinned:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+            self.logger.info(f"Evicted proxy {path.name} ({size / 1024 / 1024:.0f}MB)")
+
+    def warm(self, media_folder, jobs=1):
+        """Create the proxies of every video in a folder, returns (created or found, failed)"""
+        videos = sorted(
+            path
+            for path in Path(media_folder).rglob("*")
+            if path.suffix.lower() in VIDEO_EXTENSIONS
+        )
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+            results = list(executor.map(self.get, videos))
+        self.release()
+        failed = [video for video, proxy in zip(videos, results) if proxy is None]
+        return len(videos) - len(failed), failed
+
+    def stats(self):
+        """Number of proxies and their total size in bytes"""
+        sizes = [path.stat().st_size for path in self._proxies()]
+        return len(sizes), sum(sizes)
+
+    def clear(self):
+        """Remove every proxy"""
+        removed = 0
+        for path in self._proxies():
+            path.unlink(missing_ok=True)
+            removed += 1
+        (self.cache_dir / HASH_INDEX_FILE).unlink(missing_ok=True)
+        self.logger.info(f"Cleared {removed} proxies")
+        return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI Video Generator proxy cache")
+    parser.add_argument(
+        "--size-gb",
+        type=float,
+        default=DEFAULT_PROXY_CACHE_GB,
+        help=f"Cache size limit in GB (default: {DEFAULT_PROXY_CACHE_GB})",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    warm_parser = subparsers.add_parser("warm", help="Create proxies for a media folder")
+    warm_parser.add_argument("folder", help="Media folder, searched recursively")
+    warm_parser.add_argument(
+        "--jobs", type=int, default=2, help="Concurrent transcodes (default: 2)"
+    )
+    subparsers.add_parser("stats", help="Show the number and size of cached proxies")
+    subparsers.add_parser("clear", help="Remove all proxies")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    cache = ProxyCache(max_gb=args.size_gb)
+
+    if args.command == "warm":
+        ready, failed = cache.warm(args.folder, args.jobs)
+        print(f"✅ {ready} proxies ready in {cache.cache_dir}")
+        for video in failed:
+            print(f"❌ Failed: {video}")
+    elif args.command == "stats":
+        count, total = cache.stats()
+        print(f"{count} proxies, {total / 1024 / 1024 / 1024:.2f}GB in {cache.cache_dir}")
+    else:
+        print(f"🧹 Cleared {cache.clear()} proxies")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Raster cache - content-addressed store of rasterized text lines, shared by
+all projects, so recurring subtitles and titles are drawn once
+
+A line is keyed by its text and everything that changes its pixels: font
+(resolved to its file, keyed with the file's size and modification time),
+size, colors, stroke, wrap width, size limit and background box. Bitmaps are
+stored as RGBA PNG files under $AIVIDEO_CACHE_DIR/rasters. Lines whose texts
+are known early are rasterized ahead of time in worker processes
+(prerender) while the rest of the pipeline runs; the render then only loads
+them. The cache is bounded in size and evicts the least recently used
+bitmaps at the end of a run.
+
+Usage:
+    python raster_cache.py stats
+    python raster_cache.py clear
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from font_resolver import FontResolver
+from utils_module import default_cache_dir, render_text_image
+
+RASTER_CACHE_VERSION = 1
+
+# Default size limit of the cache in GB
+DEFAULT_RASTER_CACHE_GB = 2
+
+# Bitmaps used within this many seconds are never evicted
+EVICTION_GRACE_SECONDS = 60 * 60
+
+# Worker processes that rasterize ahead of time
+DEFAULT_RASTER_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+
+def _rasterize(cache_file, spec):
+    """Worker: rasterize one text line into the cache"""
+    image = render_text_image(**spec)
+    _write_png(cache_file, image)
+
+
+def _write_png(cache_file, image):
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+    Image.fromarray(image, "RGBA").save(temp_file, format="PNG")
+    temp_file.replace(cache_file)
+
+
+def _worker_context():
+    """Start method for the workers that never forks the threads of this process
+
+    Rasterization starts while the TTS and reader prefetch threads run, and
+    a forked child could deadlock on a lock one of them holds; workers are
+    started from a clean process instead, they only need the picklable spec.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+class RasterCache:
+    """Text line bitmaps keyed by text and style (see utils_module.text_spec)"""
+
+    def __init__(
+        self,
+        max_gb=DEFAULT_RASTER_CACHE_GB,
+        cache_dir=None,
+        workers=DEFAULT_RASTER_WORKERS,
+        logger=None,
+    ):
+        self.logger = logger or logging.getLogger(__name__)
+        self.max_bytes = int(max_gb * 1024 * 1024 * 1024)
+        self.cache_dir = Path(cache_dir or default_cache_dir()) / "rasters"
+        self.workers = workers
+        self.executor = None
+        self.pending = {}
+        self.images = {}
+        self.font_identities = {}
+        self.font_resolver = None
+
+    def _font_identity(self, font):
+        """A font by its file's path, size and modification time
+
+        A font given by name is resolved to its installed file first, so
+        installing, removing or upgrading it changes the key. A name that
+        matches no installed file is kept as is.
+        """
+        if font not in self.font_identities:
+            path = font if font and os.path.isfile(font) else None
+            if font and path is None:
+                if self.font_resolver is None:
+                    self.font_resolver = FontResolver(logger=self.logger)
+                path = self.font_resolver.find(font)
+            identity = font
+            if path:
+                stat = os.stat(path)
+                identity = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+            self.font_identities[font] = identity
+        return self.font_identities[font]
+
+    def key(self, spec):
+        """Content address of a text line"""
+        content = json.dumps(
+            dict(
+                spec,
+                font=self._font_identity(spec["font"]),
+                version=RASTER_CACHE_VERSION,
+            ),
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.png"
+
+    def prerender(self, specs):
+        """Start rasterizing the lines that are not cached yet in worker processes"""
+        submitted = 0
+        for spec in specs:
+            key = self.key(spec)
+            if key in self.pending or key in self.images or self._path(key).exists():
+                continue
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=_worker_context()
+                )
+            self.pending[key] = self.executor.submit(_rasterize, self._path(key), spec)
+            submitted += 1
+        if submitted:
+            self.logger.info(f"Rasterizing {submitted} text lines in the background")
+
+    def image(self, spec):
+        """RGBA array of a text line: from memory, the cache, a prerender or drawn now"""
+        key = self.key(spec)
+        image = self.images.get(key)
+        if image is not None:
+            return image
+
+        future = self.pending.pop(key, None)
+        if future is not None:
+            try:
+                future.result()
+            except Exception as e:
+                self.logger.warning(f"Background rasterization failed: {e}")
+
+        path = self._path(key)
+        try:
+            with Image.open(path) as cached:
+                image = np.asarray(cached.convert("RGBA"))
+            # The modification time orders the bitmaps for LRU eviction
+            os.utime(path)
+        except FileNotFoundError:
+            image = None
+        except Exception as e:
+            image = None
+            self.logger.warning(f"Ignoring broken raster cache entry {path}: {e}")
+
+        if image is None:
+            image = render_text_image(**spec)
+            try:
+                _write_png(path, image)
+            except Exception as e:
+                self.logger.warning(f"Failed to write raster cache: {e}")
+
+        self.images[key] = image
+        return image
+
+    def _entries(self):
+        return list(self.cache_dir.glob("*/*.png"))
+
+    def evict(self, grace_seconds=EVICTION_GRACE_SECONDS):
+        """Remove least recently used bitmaps until the cache fits its size limit
+
+        Bitmaps used within grace_seconds are kept even if the cache stays
+        over its limit.
+        """
+        entries = []
+        cutoff = time.time() - grace_seconds
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes or mtime > cutoff:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            evicted += 1
+        if evicted:
+            self.logger.info(f"Evicted {evicted} text bitmaps")
+
+    def stats(self):
+        """Number of cached bitmaps and their total size in bytes"""
+        sizes = [path.stat().st_size for path in self._entries()]
+        return len(sizes), sum(sizes)
+
+    def clear(self):
+        """Remove every cached bitmap"""
+        removed = 0
+        for path in self._entries():
+            path.unlink(missing_ok=True)
+            removed += 1
+        self.logger.info(f"Cleared {removed} text bitmaps")
+        return removed
+
+    def close(self):
+        """Stop the worker processes, dropping rasterizations that were not needed"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+        self.pending = {}
+        try:
+            self.evict()
+        except Exception as e:
+            self.logger.warning(f"Failed to evict text bitmaps: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI Video Generator text raster cache")
+    parser.add_argument(
+        "--size-gb",
+        type=float,
+        default=DEFAULT_RASTER_CACHE_GB,
+        help=f"Cache size limit in GB (default: {DEFAULT_RASTER_CACHE_GB})",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="Show the number and size of cached bitmaps")
+    subparsers.add_parser("clear", help="Remove all bitmaps")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    cache = RasterCache(max_gb=args.size_gb)
+
+    if args.command == "stats":
+        count, total = cache.stats()
+        print(f"{count} text bitmaps, {total / 1024 / 1024:.1f}MB in {cache.cache_dir}")
+    else:
+        print(f"🧹 Cleared {cache.clear()} text bitmaps")
+
+
+if __name__ == "__main__":
+    main()
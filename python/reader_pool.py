@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Reader pool - caps the number of live ffmpeg decoder processes of the video
+sources of a render
+
+Every opened video source keeps an ffmpeg process and its pipes alive until
+it is closed, so a project with many clips runs out of file descriptors and
+memory long before the sources are needed. The pool closes the least
+recently used decoders beyond its limit; a closed reader keeps its position
+and reopens at the requested time on its next frame. Because the timeline
+plays sources one after another, the decoder of the next clip is opened in
+the background shortly before that clip starts.
+"""
+
+import bisect
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Default number of decoder processes kept open
+DEFAULT_MAX_READERS = 8
+
+# Seconds before a clip starts that its decoder is opened in the background
+PREFETCH_SECONDS = 1.0
+
+
+class ReaderPool:
+    """Least recently used set of open ConformedVideoReader decoders"""
+
+    def __init__(self, max_readers=DEFAULT_MAX_READERS, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        # Two decoders are live at once during a transition
+        self.max_readers = max(2, max_readers)
+        self.lock = threading.Lock()
+        self.open_readers = OrderedDict()
+        self.prefetcher = None
+        self.schedule_starts = []
+        self.schedule = []
+
+    def opening(self, reader):
+        """Called by a reader before it starts its decoder; closes the least recently used others"""
+        with self.lock:
+            self.open_readers.pop(id(reader), None)
+            self.open_readers[id(reader)] = reader
+            candidates = list(self.open_readers.values())[:-1]
+
+        open_count = sum(1 for other in candidates if other.proc) + 1
+        for other in candidates:
+            if open_count <= self.max_readers:
+                break
+            if not other.proc:
+                with self.lock:
+                    self.open_readers.pop(id(other), None)
+                continue
+            # A reader that is decoding right now is left open and retried next time
+            if not other.lock.acquire(blocking=False):
+                continue
+            try:
+                other.close(delete_lastread=False)
+            finally:
+                other.lock.release()
+            with self.lock:
+                self.open_readers.pop(id(other), None)
+            open_count -= 1
+            self.logger.debug(f"Closed idle decoder of {other.filename}")
+
+    def used(self, reader):
+        """Mark a reader as most recently used"""
+        with self.lock:
+            if id(reader) in self.open_readers:
+                self.open_readers.move_to_end(id(reader))
+
+    def set_schedule(self, schedule):
+        """Set the (timeline start, reader, source start) of every video piece, in playback order"""
+        self.schedule = sorted(schedule, key=lambda item: item[0])
+        self.schedule_starts = [start for start, _, _ in self.schedule]
+
+    def prefetch(self, t):
+        """Open in the background the decoders of pieces starting within PREFETCH_SECONDS of t"""
+        first = bisect.bisect_right(self.schedule_starts, t)
+        last = bisect.bisect_right(self.schedule_starts, t + PREFETCH_SECONDS)
+        for _, reader, source_start in self.schedule[first:last]:
+            if reader.proc or reader.prefetch_pending:
+                continue
+            reader.prefetch_pending = True
+            if self.prefetcher is None:
+                self.prefetcher = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="reader-prefetch"
+                )
+            self.prefetcher.submit(self._open, reader, source_start)
+
+    def _open(self, reader, start_time):
+        try:
+            with reader.lock:
+                if not reader.proc:
+                    reader.initialize(start_time)
+        except Exception as e:
+            self.logger.debug(f"Prefetching {reader.filename} failed: {e}")
+        finally:
+            reader.prefetch_pending = False
+
+    def after_fork(self):
+        """Forget the parent's decoders in a forked worker, which opens its own on demand"""
+        self.lock = threading.Lock()
+        self.open_readers = OrderedDict()
+        self.prefetcher = None
+
+    def close(self):
+        """Stop background prefetching"""
+        if self.prefetcher is not None:
+            self.prefetcher.shutdown(wait=True)
+            self.prefetcher = None
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Render worker - long-lived process that runs video generation jobs from a
+directory queue, so every job starts warm instead of as a fresh python process
+
+Heavy modules (moviepy, openai, websockets, dashscope) are imported and the
+subtitle font is resolved once; every job then runs in a forked child that
+inherits this state and behaves exactly like `python main.py <options>`:
+same output files, same log output (written to the job log) and same exit
+status.
+
+Queue layout (--queue DIR):
+    incoming/<id>.json   submitted jobs: {"id": ..., "args": [main.py options]}
+    running/<id>.json    jobs claimed by a worker
+    done/<id>.json       finished jobs with exit_status, log path and timing
+    logs/<id>.log        stdout/stderr of the job
+
+Usage:
+    python render_worker.py serve --queue /path/to/queue --jobs 2
+    python render_worker.py submit --queue /path/to/queue -- --folder /path/to/project --repeatmode batch
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+QUEUE_FOLDERS = ("incoming", "running", "done", "logs")
+
+
+def _run_job(args, log_path):
+    """Job process entry point: run main.py with the job options, output to the job log"""
+    from main import main
+
+    with open(log_path, "a", encoding="utf-8", buffering=1) as log:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(log.fileno(), sys.stdout.fileno())
+        os.dup2(log.fileno(), sys.stderr.fileno())
+        # SystemExit from main() becomes the exit code of this process, as for the CLI
+        main(args)
+
+
+class RenderWorker:
+    """Claims jobs from a queue directory and runs up to `jobs` of them at a time"""
+
+    def __init__(self, queue_dir, jobs=1, poll_interval=1.0):
+        self.queue_dir = Path(queue_dir)
+        self.jobs = max(1, jobs)
+        self.poll_interval = poll_interval
+        for folder in QUEUE_FOLDERS:
+            (self.queue_dir / folder).mkdir(parents=True, exist_ok=True)
+        self.context = multiprocessing.get_context("fork")
+        self.active = {}
+
+    def warm_up(self):
+        """Import the generator modules and resolve the default font once for all jobs"""
+        start_time = time.perf_counter()
+        import audio_generator  # noqa: F401  websockets
+        import llm_module  # noqa: F401  openai
+        import videoGenerator  # noqa: F401  moviepy and the processors
+        from utils_module import get_chinese_compatible_font
+
+        try:
+            font = get_chinese_compatible_font("Arial")
+            print(f"🔤 Subtitle font resolved: {font}")
+        except Exception as e:
+            print(f"Font warm-up failed, jobs will resolve fonts themselves: {e}")
+        print(f"🔥 Worker warmed up in {time.perf_counter() - start_time:.2f}s")
+
+    def serve(self):
+        """Run jobs until interrupted"""
+        self.warm_up()
+        print(f"👷 Render worker watching {self.queue_dir / 'incoming'} (max {self.jobs} jobs)")
+        try:
+            while True:
+                self._reap()
+                while len(self.active) < self.jobs and self._start_next():
+                    pass
+                time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            print(f"\nStopping, waiting for {len(self.active)} running jobs...")
+            for process, _, _ in self.active.values():
+                process.join()
+            self._reap()
+
+    def _start_next(self):
+        """Claim the oldest incoming job and start it, returns False if there is none"""
+        for job_file in sorted((self.queue_dir / "incoming").glob("*.json")):
+            running_file = self.queue_dir / "running" / job_file.name
+            try:
+                # rename is atomic, so several workers can share one queue
+                job_file.rename(running_file)
+            except FileNotFoundError:
+                continue
+
+            job_id = job_file.stem
+            try:
+                with open(running_file, "r", encoding="utf-8") as f:
+                    job = json.load(f)
+                args = [str(arg) for arg in job["args"]]
+            except Exception as e:
+                print(f"Damn, invalid job {job_id}: {e}")
+                self._write_result(job_id, {"args": None}, 2, time.time(), str(e))
+                running_file.unlink()
+                return True
+
+            log_path = self.queue_dir / "logs" / f"{job_id}.log"
+            process = self.context.Process(target=_run_job, args=(args, log_path))
+            process.start()
+            self.active[job_id] = (process, job, time.time())
+            print(f"🎬 Started job {job_id} (pid {process.pid}): {' '.join(args)}")
+            return True
+        return False
+
+    def _reap(self):
+        """Record the result of finished jobs"""
+        for job_id, (process, job, started) in list(self.active.items()):
+            if process.is_alive():
+                continue
+            process.join()
+            del self.active[job_id]
+            self._write_result(job_id, job, process.exitcode, started)
+            (self.queue_dir / "running" / f"{job_id}.json").unlink(missing_ok=True)
+            status = "✅" if process.exitcode == 0 else "❌"
+            print(
+                f"{status} Job {job_id} finished with exit status {process.exitcode} in {time.time() - started:.1f}s"
+            )
+
+    def _write_result(self, job_id, job, exit_status, started, error=None):
+        result = dict(
+            job,
+            id=job_id,
+            exit_status=exit_status,
+            log=str(self.queue_dir / "logs" / f"{job_id}.log"),
+            started_at=datetime.fromtimestamp(started).strftime("%Y-%m-%d %H:%M:%S"),
+            finished_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            duration=round(time.time() - started, 2),
+        )
+        if error:
+            result["error"] = error
+        with open(self.queue_dir / "done" / f"{job_id}.json", "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+def submit_job(queue_dir, args, job_id=None):
+    """Add a job to the queue, returns its id"""
+    queue_dir = Path(queue_dir)
+    incoming = queue_dir / "incoming"
+    incoming.mkdir(parents=True, exist_ok=True)
+    # Ids start with the submission time, so jobs are claimed in order
+    job_id = job_id or f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    temp_file = incoming / f"{job_id}.tmp"
+    with open(temp_file, "w", encoding="utf-8") as f:
+        json.dump({"id": job_id, "args": args}, f, ensure_ascii=False, indent=2)
+    temp_file.rename(incoming / f"{job_id}.json")
+    return job_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI Video Generator render worker")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Run jobs from the queue")
+    serve_parser.add_argument("--queue", required=True, help="Queue directory")
+    serve_parser.add_argument(
+        "--jobs", type=int, default=1, help="Maximum number of concurrent jobs (default: 1)"
+    )
+    serve_parser.add_argument(
+        "--poll", type=float, default=1.0, help="Queue poll interval in seconds (default: 1)"
+    )
+
+    submit_parser = subparsers.add_parser("submit", help="Add a job to the queue")
+    submit_parser.add_argument("--queue", required=True, help="Queue directory")
+    submit_parser.add_argument("--id", help="Job id (default: timestamp based)")
+    submit_parser.add_argument(
+        "args", nargs=argparse.REMAINDER, help="main.py options, after --"
+    )
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        RenderWorker(args.queue, args.jobs, args.poll).serve()
+    else:
+        job_args = args.args[1:] if args.args[:1] == ["--"] else args.args
+        print(submit_job(args.queue, job_args, args.id))
+
+
+if __name__ == "__main__":
+    main()
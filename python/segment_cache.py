@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Segment cache - content-addressed store of encoded video segments, so a
+re-render only encodes the segments whose pixels or samples changed
+
+A segment is keyed by its ffmpeg command with every input file replaced by
+its identity: overlay bitmaps and other small files by a hash of their
+content, media files by path, size and modification time. The command
+already holds the in and out points, the filter graph with overlay
+positions and timing, the canvas, fps and encoder settings.
+
+The cache is bounded in size and evicts the least recently used segments,
+except those the running render uses (pinned until release) and those used
+by any render within the grace window.
+
+Usage:
+    python segment_cache.py stats
+    python segment_cache.py clear
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+
+from utils_module import default_cache_dir
+
+# Default size limit of the cache in GB
+DEFAULT_SEGMENT_CACHE_GB = 20
+
+# Segments used within this many seconds are never evicted
+EVICTION_GRACE_SECONDS = 60 * 60
+
+# Files up to this size are identified by their content, larger ones by stat
+CONTENT_HASH_LIMIT = 16 * 1024 * 1024
+
+# Arguments that change how fast ffmpeg runs, not what it produces
+_IGNORED_OPTIONS = {"-threads", "-progress", "-loglevel"}
+
+
+class SegmentCache:
+    """Encoded segments keyed by the ffmpeg command that renders them"""
+
+    def __init__(self, max_gb=DEFAULT_SEGMENT_CACHE_GB, cache_dir=None, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.max_bytes = int(max_gb * 1024 * 1024 * 1024)
+        self.cache_dir = Path(cache_dir or default_cache_dir()) / "segments"
+        self.file_hashes = {}
+        # Segments used by this render, kept until release()
+        self.pinned = set()
+
+    def file_identity(self, path):
+        """Identity of an input file: content hash for small files, stat otherwise"""
+        path = Path(path).resolve()
+        stat = path.stat()
+        if stat.st_size > CONTENT_HASH_LIMIT:
+            return f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+
+        cache_key = (path, stat.st_size, stat.st_mtime_ns)
+        if cache_key not in self.file_hashes:
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            self.file_hashes[cache_key] = digest.hexdigest()
+        return self.file_hashes[cache_key]
+
+    def key(self, ffmpeg_cmd, output_file):
+        """Content address of the output of ffmpeg_cmd"""
+        output_file = str(output_file)
+        parts = []
+        skip_value = False
+        for arg in map(str, ffmpeg_cmd):
+            if skip_value:
+                skip_value = False
+            elif arg in _IGNORED_OPTIONS:
+                skip_value = True
+            elif arg == output_file:
+                parts.append("<output>")
+            elif os.path.isfile(arg):
+                parts.append(self.file_identity(arg))
+            else:
+                parts.append(arg)
+        content = json.dumps(
+            {"command": parts, "suffix": Path(output_file).suffix}, ensure_ascii=False
+        )
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get(self, key, suffix):
+        """Path of the cached segment, None if it is not cached"""
+        cache_file = self.cache_dir / f"{key}{suffix}"
+        try:
+            # The modification time orders the segments for LRU eviction
+            os.utime(cache_file)
+        except FileNotFoundError:
+            return None
+        self.pinned.add(cache_file)
+        return cache_file
+
+    def put(self, key, path):
+        """Store an encoded segment, returns the cached path (path if storing fails)"""
+        path = Path(path)
+        cache_file = self.cache_dir / f"{key}{path.suffix}"
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            temp_file = cache_file.with_name(f"{cache_file.name}.tmp")
+            shutil.copyfile(path, temp_file)
+            temp_file.replace(cache_file)
+            self.pinned.add(cache_file)
+            self.evict()
+            return cache_file
+        except Exception as e:
+            self.logger.warning(f"Failed to write segment cache: {e}")
+            return path
+
+    def release(self):
+        """Unpin the segments of the finished render and evict down to the size limit"""
+        self.pinned.clear()
+        self.evict()
+
+    def _entries(self):
+        if not self.cache_dir.is_dir():
+            return []
+        return [
+            path
+            for path in self.cache_dir.iterdir()
+            if path.is_file() and not path.name.endswith(".tmp")
+        ]
+
+    def evict(self, grace_seconds=EVICTION_GRACE_SECONDS):
+        """Remove least recently used segments until the cache fits its size limit
+
+        Pinned segments and segments used within grace_seconds are kept even
+        if the cache stays over its limit.
+        """
+        entries = []
+        cutoff = time.time() - grace_seconds
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes or mtime > cutoff:
+                break
+            if path in self.pinned:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+            self.logger.info(f"Evicted segment {path.name} ({size / 1024 / 1024:.0f}MB)")
+
+    def stats(self):
+        """Number of cached segments and their total size in bytes"""
+        sizes = [path.stat().st_size for path in self._entries()]
+        return len(sizes), sum(sizes)
+
+    def clear(self):
+        """Remove every cached segment"""
+        removed = 0
+        for path in self._entries():
+            path.unlink(missing_ok=True)
+            removed += 1
+        self.logger.info(f"Cleared {removed} segments")
+        return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI Video Generator segment cache")
+    parser.add_argument(
+        "--size-gb",
+        type=float,
+        default=DEFAULT_SEGMENT_CACHE_GB,
+        help=f"Cache size limit in GB (default: {DEFAULT_SEGMENT_CACHE_GB})",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="Show the number and size of cached segments")
+    subparsers.add_parser("evict", help="Evict segments down to the size limit")
+    subparsers.add_parser("clear", help="Remove all segments")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    cache = SegmentCache(max_gb=args.size_gb)
+
+    if args.command == "stats":
+        count, total = cache.stats()
+        print(f"{count} segments, {total / 1024 / 1024 / 1024:.2f}GB in {cache.cache_dir}")
+    elif args.command == "evict":
+        cache.evict()
+        count, total = cache.stats()
+        print(f"{count} segments, {total / 1024 / 1024 / 1024:.2f}GB in {cache.cache_dir}")
+    else:
+        print(f"🧹 Cleared {cache.clear()} segments")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Segment-parallel rendering - splits the final timeline into time segments on
+clip boundaries, renders every segment in its own worker process with the
+same encoder settings and closed GOPs, then joins the segments with ffmpeg's
+concat demuxer without re-encoding
+"""
+
+import logging
+import multiprocessing
+import os
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from segment_cache import DEFAULT_SEGMENT_CACHE_GB, SegmentCache
+
+# Segments shorter than this are not worth a separate worker
+MIN_SEGMENT_DURATION = 5.0
+
+# Encoder settings shared by every segment, so they can be joined with -c copy
+MOVIEPY_SEGMENT_PARAMS = [
+    "-crf",
+    "23",
+    "-pix_fmt",
+    "yuv420p",
+    "-flags",
+    "+cgop",
+]
+
+# MoviePy segment job inherited by forked worker processes
+_MOVIEPY_JOB = {}
+
+
+def timeline_entries(timeline):
+    """Return the plan entries of a timeline in playback order"""
+    entries = []
+    if timeline["start"]:
+        entries.append(timeline["start"])
+    entries.extend(timeline["main"])
+    if timeline["closing"]:
+        entries.append(timeline["closing"])
+    return entries
+
+
+def _render_moviepy_segment(index):
+    """Worker process entry point: render one segment of the inherited final clip"""
+    job = _MOVIEPY_JOB
+
+    # The ffmpeg reader processes belong to the parent, every worker opens its own
+    for clip in job["source_clips"]:
+        reader = getattr(clip, "reader", None)
+        if reader is None:
+            continue
+        if hasattr(reader, "after_fork"):
+            # Pooled readers reopen on their first frame in this segment
+            reader.after_fork()
+        else:
+            reader.proc = None
+            reader.initialize()
+
+    start, end = job["spans"][index]
+    segment_clip = job["clip"].subclipped(start, end)
+    segment_clip.write_videofile(
+        job["paths"][index],
+        codec="libx264",
+        fps=job["fps"],
+        preset="fast",
+        threads=job["threads"],
+        audio=False,
+        logger=None,
+        ffmpeg_params=MOVIEPY_SEGMENT_PARAMS,
+    )
+    return index
+
+
+class SegmentRenderer:
+    """Renders a timeline as parallel segments joined by stream copy"""
+
+    def __init__(self, logger=None, args=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.args = args
+        self.cache = (
+            SegmentCache(
+                max_gb=getattr(args, "segment_cache_size", DEFAULT_SEGMENT_CACHE_GB),
+                logger=self.logger,
+            )
+            if getattr(args, "segment_cache", False)
+            else None
+        )
+
+    def worker_count(self):
+        """Number of worker processes from --render-workers, 0 means one per CPU core"""
+        workers = getattr(self.args, "render_workers", 1)
+        if workers is None:
+            workers = 1
+        if workers <= 0:
+            workers = os.cpu_count() or 1
+        return workers
+
+    def plan_segments(self, entries, duration, cached=False):
+        """Split the timeline into segments of similar length, cutting only between entries
+
+        Returns a list of {"start", "end", "entries"} dicts, or an empty list
+        when the video is too short to be worth splitting. Cached segments are
+        cut as finely as MIN_SEGMENT_DURATION allows, so a change re-encodes
+        as little as possible.
+        """
+        segment_count = self.worker_count()
+        if cached:
+            segment_count = max(segment_count, int(duration // MIN_SEGMENT_DURATION))
+        segment_count = min(
+            segment_count, int(duration // MIN_SEGMENT_DURATION), len(entries)
+        )
+        if segment_count < 2:
+            return []
+
+        boundaries = []
+        elapsed = 0.0
+        for entry in entries:
+            elapsed += entry["duration"]
+            boundaries.append(elapsed)
+
+        # Cut after the entry whose end is closest to each ideal split point
+        cut_indices = []
+        for k in range(1, segment_count):
+            target = duration * k / segment_count
+            best = min(
+                range(len(entries) - 1), key=lambda i: abs(boundaries[i] - target)
+            )
+            if not cut_indices or best > cut_indices[-1]:
+                cut_indices.append(best)
+
+        segments = []
+        first = 0
+        segment_start = 0.0
+        for cut in cut_indices + [len(entries) - 1]:
+            segment_end = boundaries[cut] if cut < len(entries) - 1 else duration
+            segments.append(
+                {
+                    "start": segment_start,
+                    "end": segment_end,
+                    "entries": entries[first : cut + 1],
+                }
+            )
+            first = cut + 1
+            segment_start = segment_end
+
+        return segments if len(segments) > 1 else []
+
+    def _threads_per_worker(self, segment_count):
+        """Split the CPU cores between the segment workers"""
+        return max(1, (os.cpu_count() or 1) // segment_count)
+
+    def render_moviepy(
+        self,
+        final_clip,
+        timeline,
+        source_clips,
+        output_file,
+        renderer=None,
+        background_music_info=None,
+    ):
+        """Render a MoviePy clip as parallel segments, returns False to use the single process path
+
+        With an FFmpegRenderer, the audio track is rendered from the timeline
+        narration and background music instead of from final_clip.audio.
+        """
+        fps = timeline["fps"]
+        segments = self.plan_segments(timeline_entries(timeline), final_clip.duration)
+        if not segments:
+            return False
+
+        try:
+            context = multiprocessing.get_context("fork")
+        except ValueError:
+            self.logger.warning("Segment rendering needs fork(), using a single process")
+            return False
+
+        # Cut on frame boundaries; the half frame keeps int(duration * fps) exact
+        spans = []
+        for segment in segments:
+            start = round(segment["start"] * fps) / fps
+            if segment is segments[-1]:
+                end = final_clip.duration
+            else:
+                end = round(segment["end"] * fps) / fps + 0.5 / fps
+            spans.append((start, end))
+
+        self.logger.info(f"Rendering {len(spans)} segments in parallel: {spans}")
+        print(f"🚀 Rendering {len(spans)} segments in parallel...")
+        start_time = time.perf_counter()
+
+        with tempfile.TemporaryDirectory(prefix="aivideo_segments_") as work_dir:
+            work_dir = Path(work_dir)
+            paths = [str(work_dir / f"segment_{i:03d}.mp4") for i in range(len(spans))]
+            _MOVIEPY_JOB.update(
+                clip=final_clip,
+                source_clips=source_clips,
+                spans=spans,
+                paths=paths,
+                fps=fps,
+                threads=self._threads_per_worker(len(spans)),
+            )
+
+            audio_path = None
+            try:
+                with context.Pool(len(spans)) as pool:
+                    results = pool.imap_unordered(
+                        _render_moviepy_segment, range(len(spans))
+                    )
+
+                    # Encode the audio track once while the workers render video
+                    if renderer is not None:
+                        audio_path = work_dir / "audio.m4a"
+                        audio_command = renderer.build_audio_command(
+                            timeline, background_music_info, audio_path
+                        )
+                        if audio_command is None:
+                            audio_path = None
+                        elif not self._run_command(audio_command):
+                            return False
+                    elif final_clip.audio is not None:
+                        audio_path = work_dir / "audio.m4a"
+                        final_clip.audio.write_audiofile(
+                            str(audio_path), fps=44100, codec="aac", logger=None
+                        )
+
+                    for done, index in enumerate(results, start=1):
+                        print(f"✅ Segment {index + 1} rendered ({done}/{len(spans)})")
+            except Exception as e:
+                self.logger.error(f"Segment rendering failed: {e}")
+                return False
+            finally:
+                _MOVIEPY_JOB.clear()
+
+            if not self.concat_segments(paths, audio_path, output_file, work_dir):
+                return False
+
+        self.logger.info(
+            f"⏱️ Segment rendering took {time.perf_counter() - start_time:.2f} seconds"
+        )
+        return True
+
+    def render_ffmpeg(self, renderer, timeline, overlays, output_file, background_music_info=None):
+        """Render the FFmpeg backend as parallel segments, returns None if the video is not split
+
+        With --segment-cache, segments (and the audio track) whose command did
+        not change since an earlier render are taken from the cache.
+        """
+        segments = self.plan_segments(
+            timeline_entries(timeline), timeline["duration"], cached=self.cache is not None
+        )
+        if not segments:
+            return None
+
+        self.logger.info(f"Rendering {len(segments)} segments in parallel with FFmpeg")
+        print(f"🚀 Rendering {len(segments)} segments in parallel...")
+        start_time = time.perf_counter()
+        workers = min(len(segments), self.worker_count())
+        threads = self._threads_per_worker(workers)
+        fps = timeline["fps"]
+
+        with tempfile.TemporaryDirectory(prefix="aivideo_segments_") as work_dir:
+            work_dir = Path(work_dir)
+            commands = []
+            paths = []
+            for index, segment in enumerate(segments):
+                segment_start, segment_end = segment["start"], segment["end"]
+                segment_timeline = dict(
+                    timeline,
+                    start=None,
+                    main=segment["entries"],
+                    closing=None,
+                    duration=segment_end - segment_start,
+                    narration=None,
+                    time_offset=segment_start,
+                )
+                # Segment video starts on the frame grid of the whole timeline
+                frame_start = round(segment_start * fps) / fps
+                # Overlays shown in this segment, in segment time
+                segment_overlays = [
+                    dict(
+                        overlay,
+                        start=overlay["start"] - frame_start,
+                        end=overlay["end"] - frame_start,
+                    )
+                    for overlay in overlays
+                    if overlay["end"] > segment_start and overlay["start"] < segment_end
+                ]
+                path = work_dir / f"segment_{index:03d}.mp4"
+                paths.append(str(path))
+                commands.append(
+                    renderer.build_command(
+                        segment_timeline,
+                        segment["entries"],
+                        segment_overlays,
+                        path,
+                        threads=threads,
+                    )
+                )
+
+            audio_path = work_dir / "audio.m4a"
+            audio_command = renderer.build_audio_command(
+                timeline, background_music_info, audio_path
+            )
+            if audio_command:
+                commands.append(audio_command)
+                paths.append(str(audio_path))
+            else:
+                audio_path = None
+
+            if self.cache is not None:
+                commands, paths, pending_keys = self._use_cached_outputs(
+                    commands, paths
+                )
+            if commands:
+                # The audio command runs next to the segment workers
+                with ThreadPoolExecutor(
+                    max_workers=min(len(commands), workers + 1)
+                ) as executor:
+                    results = list(executor.map(self._run_command, commands))
+                if not all(results):
+                    return False
+            if self.cache is not None:
+                paths = self._store_outputs(paths, pending_keys)
+
+            if audio_path:
+                audio_path = paths.pop()
+            joined = self.concat_segments(paths, audio_path, output_file, work_dir)
+            if self.cache is not None:
+                # The joined segments may be evicted from now on
+                self.cache.release()
+            if not joined:
+                return False
+
+        self.logger.info(
+            f"⏱️ Segment rendering took {time.perf_counter() - start_time:.2f} seconds"
+        )
+        return True
+
+    def _use_cached_outputs(self, commands, paths):
+        """Point paths at cached outputs
+
+        Returns the commands that still have to run, the paths and the cache
+        keys of the outputs still to be rendered by path index.
+        """
+        pending = []
+        pending_keys = {}
+        for index, (ffmpeg_cmd, path) in enumerate(zip(commands, paths)):
+            key = self.cache.key(ffmpeg_cmd, path)
+            cached = self.cache.get(key, Path(path).suffix)
+            if cached:
+                paths[index] = str(cached)
+            else:
+                pending.append(ffmpeg_cmd)
+                pending_keys[index] = key
+
+        reused = len(commands) - len(pending)
+        self.logger.info(f"Segment cache: {reused} reused, {len(pending)} to render")
+        print(f"♻️ Segment cache: reusing {reused} of {len(commands)} parts")
+        return pending, paths, pending_keys
+
+    def _store_outputs(self, paths, pending_keys):
+        """Add the freshly rendered outputs to the cache, returns the cached paths"""
+        paths = list(paths)
+        for index, key in pending_keys.items():
+            paths[index] = str(self.cache.put(key, paths[index]))
+        return paths
+
+    def _run_command(self, ffmpeg_cmd):
+        """Run one ffmpeg command, returns True on success"""
+        self.logger.debug(f"🔧 Running FFmpeg command: {' '.join(map(str, ffmpeg_cmd))}")
+        result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            self.logger.error(f"❌ FFmpeg failed with return code: {result.returncode}")
+            self.logger.error(f"❌ FFmpeg stderr: {result.stderr}")
+            return False
+        return True
+
+    def concat_segments(self, segment_paths, audio_path, output_file, work_dir):
+        """Join rendered segments with the concat demuxer and mux the audio track, no re-encoding"""
+        list_file = Path(work_dir) / "segments.txt"
+        list_file.write_text(
+            "".join(f"file '{path}'\n" for path in segment_paths), encoding="utf-8"
+        )
+
+        ffmpeg_cmd = [
+            "ffmpeg",
+            "-y",
+            "-loglevel",
+            "error",
+            "-f",
+            "concat",
+            "-safe",
+            "0",
+            "-i",
+            str(list_file),
+        ]
+        if audio_path:
+            ffmpeg_cmd += ["-i", str(audio_path), "-map", "0:v", "-map", "1:a"]
+        ffmpeg_cmd += ["-c", "copy", "-movflags", "+faststart", str(output_file)]
+
+        self.logger.info(f"Joining {len(segment_paths)} segments into {output_file}")
+        return self._run_command(ffmpeg_cmd)
@@ -165,15 +165,29 @@ class SubtitleProcessor:
         ):
             raise ValueError("Audio file not available for timestamp calculation")
         try:
-            # Load audio file to get duration
-            from moviepy import AudioFileClip
-
-            audio_clip = AudioFileClip(str(self.audio_file))
-            total_duration = audio_clip.duration
-            audio_clip.close()
+            # Audio duration from the TTS sidecar or the file header
+            total_duration = vg.audioGenerator.get_audio_duration(self.audio_file)
             self.logger.info(f"Audio duration: {total_duration:.2f}s")
             self.logger.info(f"Voice subtitles: {len(self.voice_subtitles)}")
             self.logger.info(f"Display subtitles: {len(self.display_subtitles)}")
+
+            # Use the word timings returned by the TTS when they are available
+            timing = vg.audioGenerator.load_timestamps(
+                self.audio_file, "，".join(self.voice_subtitles)
+            )
+            if timing and timing.get("words"):
+                timestamps = self._timestamps_from_words(
+                    timing["words"], total_duration
+                )
+                if timestamps:
+                    self.subtitle_timestamps = timestamps
+                    self.logger.info(
+                        f"Created {len(self.subtitle_timestamps)} subtitle timestamps from TTS word timings"
+                    )
+                    self._create_srt_subtitle_file()
+                    vg.subtitle_timestamps = self.subtitle_timestamps
+                    return
+
             # Calculate timing based on voice subtitles (with punctuation)
             voice_estimates = []
             total_voice_time = 0
@@ -234,6 +248,59 @@ class SubtitleProcessor:
             self._create_fallback_timestamps()
             vg.subtitle_timestamps = self.subtitle_timestamps
 
+    def _timestamps_from_words(self, words, total_duration):
+        """Build display subtitle timestamps from TTS word timings
+
+        Display subtitles and TTS words are matched by counting letters and
+        digits (punctuation is not spoken). A subtitle is shown from the moment
+        its first character is spoken until the next subtitle starts. Returns
+        None if the timings cannot be matched.
+        """
+        # Spoken characters with their timing, multi-character words split evenly
+        char_starts = []
+        for word in words:
+            chars = [ch for ch in word["word"] if ch.isalnum()]
+            step = (word["end"] - word["start"]) / max(len(chars), 1)
+            char_starts.extend(word["start"] + step * k for k in range(len(chars)))
+
+        display_lengths = [
+            sum(1 for ch in subtitle if ch.isalnum()) for subtitle in self.display_subtitles
+        ]
+        total_chars = sum(display_lengths)
+        if not char_starts or not total_chars:
+            return None
+        if len(char_starts) != total_chars:
+            # TTS text normalization (numbers, symbols) changes the character count
+            self.logger.info(
+                f"TTS timings cover {len(char_starts)} characters, subtitles have {total_chars}; aligning proportionally"
+            )
+
+        starts = []
+        position = 0
+        for i, length in enumerate(display_lengths):
+            index = min(
+                round(position * len(char_starts) / total_chars), len(char_starts) - 1
+            )
+            start_time = 0.0 if i == 0 else char_starts[index]
+            starts.append(max(start_time, starts[-1] if starts else 0.0))
+            position += length
+
+        timestamps = []
+        for i, subtitle in enumerate(self.display_subtitles):
+            start_time = starts[i]
+            end_time = starts[i + 1] if i + 1 < len(starts) else total_duration
+            end_time = max(end_time, start_time)
+            timestamps.append(
+                {
+                    "index": i + 1,
+                    "text": subtitle,
+                    "start_time": start_time,
+                    "end_time": end_time,
+                    "duration": end_time - start_time,
+                }
+            )
+        return timestamps
+
     def _create_fallback_timestamps(self):
         """Create fallback timestamps with equal distribution based on display subtitles"""
         if (
@@ -243,11 +310,7 @@ class SubtitleProcessor:
         ):
             return
         try:
-            from moviepy import AudioFileClip
-
-            audio_clip = AudioFileClip(str(self.audio_file))
-            total_duration = audio_clip.duration
-            audio_clip.close()
+            total_duration = self.vg.audioGenerator.get_audio_duration(self.audio_file)
             self.subtitle_timestamps = []
             duration_per_subtitle = total_duration / len(self.display_subtitles)
             current_time = 0.0
@@ -10,6 +10,8 @@ from moviepy import TextClip, CompositeVideoClip, ColorClip, concatenate_videocl
 from moviepy.video.fx import FadeIn, FadeOut
 import numpy as np
 
+from text_layout import break_lines
+
 def contains_chinese(text):
     """Check if text contains Chinese characters"""
     for char in text:
@@ -32,39 +34,6 @@ def get_chinese_compatible_font(font_name="Arial"):
     except:
         return "Arial"
 
-def split_long_subtitle_text(text, max_chars_per_line):
-    """Split long text into multiple lines"""
-    if len(text) <= max_chars_per_line:
-        return [text]
-
-    lines = []
-    current_line = ""
-
-    for char in text:
-        if len(current_line + char) <= max_chars_per_line:
-            current_line += char
-        else:
-            if current_line:
-                lines.append(current_line)
-            current_line = char
-
-    if current_line:
-        lines.append(current_line)
-
-    return lines
-
-def calculate_safe_max_chars(text, max_text_width):
-    """Calculate safe maximum characters per line"""
-    # Estimate character width (rough approximation)
-    avg_char_width = 20  # pixels per character
-    max_chars = int(max_text_width / avg_char_width)
-
-    # Adjust for Chinese characters (wider)
-    if contains_chinese(text):
-        max_chars = int(max_chars * 0.7)  # Chinese chars are wider
-
-    return max(10, max_chars)  # Minimum 10 chars
-
 def create_downward_erase_animation(text_content, video_path=None, duration=10.0):
     """Create downward erase animation on video background"""
 
@@ -122,9 +91,8 @@ def create_downward_erase_animation(text_content, video_path=None, duration=10.0
         # Calculate maximum text width
         max_text_width = int(video_width * 0.8)
 
-        # Split long lines if necessary
-        max_chars_per_line = calculate_safe_max_chars(line_text, max_text_width)
-        line_parts = split_long_subtitle_text(line_text, max_chars_per_line)
+        # Split long lines by their measured width
+        line_parts = break_lines(font_name, line_text, font_size, max_text_width, stroke_width=1)
 
         for j, part_text in enumerate(line_parts):
             # Create text clip
@@ -206,9 +174,8 @@ def create_alternating_erase_animation(text_content, video_width=1080, video_hei
         # Calculate maximum text width
         max_text_width = int(video_width * 0.8)
 
-        # Split long lines if necessary
-        max_chars_per_line = calculate_safe_max_chars(line_text, max_text_width)
-        line_parts = split_long_subtitle_text(line_text, max_chars_per_line)
+        # Split long lines by their measured width
+        line_parts = break_lines(font_name, line_text, font_size, max_text_width, stroke_width=1)
 
         for j, part_text in enumerate(line_parts):
             # Create text clip
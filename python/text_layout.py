@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Text layout - measures text with the real advance widths of a font, breaks
+it into lines and fits the font size before anything is rasterized
+
+Advances and glyph bitmaps are cached per font, size and stroke width, so
+measuring a subtitle at a dozen candidate sizes costs a few dictionary
+lookups per character, and each line is rasterized once at its final size
+(see utils_module.render_text).
+"""
+
+import functools
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# A line may break after these characters (they stay on the first line)
+BREAK_AFTER = set("，。！？、；：,.!?;:")
+
+
+@functools.lru_cache(maxsize=None)
+def load_font(font, font_size):
+    """Load a font once per name and size, the same way TextClip does"""
+    if font:
+        return ImageFont.truetype(font, font_size)
+    return ImageFont.load_default(font_size)
+
+
+class GlyphAtlas:
+    """Advances and fill/stroke bitmaps of every character drawn with one font, size and stroke
+
+    Advances are measured without drawing; glyphs are rasterized the first
+    time they are drawn and composed into lines afterwards, so a character
+    costs one rasterization per style no matter how many lines contain it.
+    Kerning pairs are not applied, which only matters for Latin text and by
+    a pixel or two.
+    """
+
+    def __init__(self, font, font_size, stroke_width=0):
+        self.font = load_font(font, font_size)
+        self.stroke_width = stroke_width
+        self.ascent, self.descent = self.font.getmetrics()
+        # Same line spacing as PIL's multiline text, without the interline gap
+        self.line_spacing = (
+            self.font.getbbox("A", stroke_width=stroke_width)[3] + stroke_width
+        )
+        self.advances = {}
+        self.glyphs = {}
+
+    def advance(self, char):
+        """Horizontal advance of a character in pixels"""
+        advance = self.advances.get(char)
+        if advance is None:
+            advance = self.advances[char] = self.font.getlength(char)
+        return advance
+
+    def glyph(self, char):
+        """(left, top, fill mask, stroke mask) of a character, relative to its baseline origin"""
+        glyph = self.glyphs.get(char)
+        if glyph is None:
+            glyph = self.glyphs[char] = self._rasterize(char)
+        return glyph
+
+    def _rasterize(self, char):
+        left, top, right, bottom = self.font.getbbox(
+            char, stroke_width=self.stroke_width, anchor="ls"
+        )
+        if right <= left or bottom <= top:
+            return 0, 0, None, None
+
+        size = (right - left, bottom - top)
+        fill_image = Image.new("L", size, 0)
+        ImageDraw.Draw(fill_image).text(
+            (-left, -top), char, fill=255, font=self.font, anchor="ls"
+        )
+        stroke_mask = None
+        if self.stroke_width:
+            stroke_image = Image.new("L", size, 0)
+            ImageDraw.Draw(stroke_image).text(
+                (-left, -top),
+                char,
+                fill=255,
+                font=self.font,
+                anchor="ls",
+                stroke_width=self.stroke_width,
+                stroke_fill=255,
+            )
+            stroke_mask = np.asarray(stroke_image)
+        return left, top, np.asarray(fill_image), stroke_mask
+
+    def text_width(self, text):
+        """Width of a line including its stroke on both sides"""
+        return int(round(sum(map(self.advance, text)) + 2 * self.stroke_width))
+
+    def break_text(self, text, width):
+        """Break text so no line is wider than width
+
+        Breaks at the last space or after the last punctuation mark that
+        fits, otherwise between any two characters, which suits Chinese.
+        """
+        lines = []
+        current = ""
+        current_width = 2 * self.stroke_width
+        # (cut position, characters dropped at the cut) of the last break opportunity
+        last_break = None
+        for char in text:
+            advance = self.advance(char)
+            if current and current_width + advance > width:
+                if last_break is not None:
+                    cut, skip = last_break
+                    lines.append(current[:cut])
+                    current = current[cut + skip :]
+                else:
+                    lines.append(current)
+                    current = ""
+                last_break = None
+                current_width = self.text_width(current)
+            if char == " ":
+                last_break = (len(current), 1)
+            current += char
+            current_width += advance
+            if char in BREAK_AFTER:
+                last_break = (len(current), 0)
+        if current or not lines:
+            lines.append(current)
+        return [line for line in lines if line.strip()] or [""]
+
+
+@functools.lru_cache(maxsize=None)
+def glyph_atlas(font, font_size, stroke_width=0):
+    """The shared glyph atlas of a font, size and stroke width"""
+    return GlyphAtlas(font, font_size, stroke_width)
+
+
+def break_lines(font, text, font_size, max_width, stroke_width=0):
+    """Lines of text no wider than max_width, measured with the font's advances"""
+    atlas = glyph_atlas(font, font_size, stroke_width)
+    lines = []
+    for paragraph in text.split("\n"):
+        lines.extend(atlas.break_text(paragraph, max_width))
+    return lines
+
+
+def fit_font_size(
+    font,
+    text,
+    max_font_size,
+    max_width,
+    max_lines=None,
+    min_font_size=1,
+    stroke_width=0,
+):
+    """Largest font size up to max_font_size whose lines fit, found by binary search
+
+    Text fits when every line is at most max_width wide (a single glyph can
+    be wider) and there are at most max_lines lines. Returns (font_size,
+    lines); if nothing fits, min_font_size and its lines.
+    """
+
+    def layout(font_size):
+        atlas = glyph_atlas(font, font_size, stroke_width)
+        lines = break_lines(font, text, font_size, max_width, stroke_width)
+        fits = all(atlas.text_width(line) <= max_width for line in lines) and (
+            max_lines is None or len(lines) <= max_lines
+        )
+        return fits, lines
+
+    fits, lines = layout(max_font_size)
+    if fits:
+        return max_font_size, lines
+
+    best = (min_font_size, layout(min_font_size)[1])
+    low, high = min_font_size, max_font_size - 1
+    while low <= high:
+        middle = (low + high) // 2
+        fits, lines = layout(middle)
+        if fits:
+            best = (middle, lines)
+            low = middle + 1
+        else:
+            high = middle - 1
+    return best
+
+
+def layout_text(font, text, font_size, stroke_width=0, width=None, interline=4):
+    """Lines and (width, height) of text as TextClip lays it out, without rasterizing
+
+    With width the text is wrapped like method="caption" and the image is
+    that wide; without it, like method="label", the image is as wide as the
+    longest line.
+    """
+    atlas = glyph_atlas(font, font_size, stroke_width)
+    if width:
+        lines = break_lines(font, text, font_size, width, stroke_width)
+    else:
+        lines = text.split("\n")
+        width = max(atlas.text_width(line) for line in lines)
+    height = (
+        atlas.ascent
+        + atlas.descent
+        + 2 * stroke_width
+        + (len(lines) - 1) * (atlas.line_spacing + interline)
+    )
+    return lines, (max(1, int(width)), int(height))
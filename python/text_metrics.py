@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Text metrics - classifies every character of a string in one pass and
+derives all the counts the subtitle helpers need from that single pass
+
+Characters are looked up in a precomputed class table (one byte per BMP
+code point) instead of being tested against lists of Unicode ranges, and
+the metrics of a string are memoized, so a subtitle that goes through
+several helpers (display length, splitting, speaking time) is classified
+once.
+
+Usage (micro-benchmark):
+    python text_metrics.py --lines 10000
+"""
+
+import argparse
+import functools
+import random
+import time
+
+# Character classes
+OTHER = 0
+IDEOGRAPH = 1  # CJK Unified Ideographs, U+4E00-U+9FFF
+CJK_OTHER = 2  # Other CJK ranges: extensions, compatibility, kana, bopomofo, hangul
+LATIN = 3  # ASCII letters
+DIGIT = 4
+PAUSE = 5  # Punctuation that adds a pause when spoken
+SPACE = 6
+
+# Chinese character ranges (including common CJK characters) besides U+4E00-U+9FFF
+CJK_RANGES = [
+    (0x3400, 0x4DBF),  # CJK Unified Ideographs Extension A
+    (0x20000, 0x2A6DF),  # CJK Unified Ideographs Extension B
+    (0x2A700, 0x2B73F),  # CJK Unified Ideographs Extension C
+    (0x2B740, 0x2B81F),  # CJK Unified Ideographs Extension D
+    (0x2B820, 0x2CEAF),  # CJK Unified Ideographs Extension E
+    (0x3300, 0x33FF),  # CJK Compatibility
+    (0xFE30, 0xFE4F),  # CJK Compatibility Forms
+    (0xF900, 0xFAFF),  # CJK Compatibility Ideographs
+    (0x2F800, 0x2FA1F),  # CJK Compatibility Ideographs Supplement
+    (0x3100, 0x312F),  # Bopomofo
+    (0x31A0, 0x31BF),  # Bopomofo Extended
+    (0x3040, 0x309F),  # Hiragana
+    (0x30A0, 0x30FF),  # Katakana
+    (0xAC00, 0xD7AF),  # Hangul Syllables
+]
+
+PAUSE_CHARACTERS = '，。！？；：""（）【】《》'
+
+# Display length of a character: a Chinese character is 1, an English letter 0.5
+DISPLAY_WEIGHTS = {IDEOGRAPH: 1.0, LATIN: 0.5}
+
+# A line may be split after these characters
+SPLIT_AFTER = set("，。！？、；：,.!?;:")
+
+
+@functools.lru_cache(maxsize=None)
+def _class_table():
+    """Class of every BMP code point, built on first use"""
+    table = bytearray(0x10000)
+    for code in range(0x10000):
+        char = chr(code)
+        if char.isspace():
+            table[code] = SPACE
+        elif char.isdigit():
+            table[code] = DIGIT
+    for char in PAUSE_CHARACTERS:
+        table[ord(char)] = PAUSE
+    for code in range(ord("A"), ord("Z") + 1):
+        table[code] = LATIN
+        table[code + 32] = LATIN
+    for start, end in CJK_RANGES:
+        if start < 0x10000:
+            table[start : end + 1] = bytes([CJK_OTHER]) * (end - start + 1)
+    table[0x4E00:0xA000] = bytes([IDEOGRAPH]) * (0xA000 - 0x4E00)
+    return bytes(table)
+
+
+def _astral_class(code):
+    for start, end in CJK_RANGES:
+        if start <= code <= end:
+            return CJK_OTHER
+    return DIGIT if chr(code).isdigit() else OTHER
+
+
+class TextMetrics:
+    """Character classes and derived counts of a string, computed in one pass"""
+
+    __slots__ = (
+        "text",
+        "classes",
+        "ideographs",
+        "cjk",
+        "latin",
+        "digits",
+        "punctuation",
+        "english_words",
+        "split_points",
+    )
+
+    def __init__(self, text):
+        table = _class_table()
+        classes = bytearray(len(text))
+        counts = [0] * 7
+        english_words = 0
+        in_word = False
+        word_has_cjk = False
+        split_points = []
+
+        for index, char in enumerate(text):
+            code = ord(char)
+            char_class = table[code] if code < 0x10000 else _astral_class(code)
+            classes[index] = char_class
+            counts[char_class] += 1
+
+            # Words are whitespace separated, as str.split() does
+            if char_class == SPACE:
+                if in_word and not word_has_cjk:
+                    english_words += 1
+                in_word = False
+                split_points.append(index)
+            else:
+                if not in_word:
+                    in_word = True
+                    word_has_cjk = False
+                if char_class in (IDEOGRAPH, CJK_OTHER):
+                    word_has_cjk = True
+                if char in SPLIT_AFTER:
+                    split_points.append(index + 1)
+        if in_word and not word_has_cjk:
+            english_words += 1
+
+        self.text = text
+        self.classes = bytes(classes)
+        self.ideographs = counts[IDEOGRAPH]
+        self.cjk = counts[IDEOGRAPH] + counts[CJK_OTHER]
+        self.latin = counts[LATIN]
+        self.digits = counts[DIGIT]
+        self.punctuation = counts[PAUSE]
+        self.english_words = english_words
+        # Indices where the text may be cut: at spaces and after punctuation
+        self.split_points = split_points
+
+    @property
+    def display_length(self):
+        """Display length where 2 English letters = 1 Chinese character"""
+        return self.ideographs + self.latin / 2
+
+    @property
+    def speaking_time(self):
+        """Estimated seconds to speak the text, between 2 and 8 (1 for empty text)"""
+        if not self.text:
+            return 1.0
+        # Chinese characters ~0.25s, English words ~0.2s, digits ~0.3s,
+        # punctuation a short pause
+        base_time = (
+            self.cjk * 0.25
+            + self.english_words * 0.2
+            + self.digits * 0.3
+            + self.punctuation * 0.1
+        )
+        return max(2.0, min(base_time, 8.0))
+
+
+@functools.lru_cache(maxsize=4096)
+def analyze_text(text):
+    """The TextMetrics of text, memoized for the recently analyzed strings"""
+    return TextMetrics(text)
+
+
+def _sample_script(lines, seed=0):
+    """A mixed Chinese/English script of the given number of lines"""
+    rng = random.Random(seed)
+    chinese = "我们今天要讨论人工智能视频生成的未来发展趋势和应用场景"
+    english = ["video", "AI", "model", "render", "subtitle", "voice", "GPU"]
+    script = []
+    for _ in range(lines):
+        parts = [
+            "".join(rng.choice(chinese) for _ in range(rng.randint(4, 16))),
+            " ".join(rng.choice(english) for _ in range(rng.randint(0, 4))),
+            str(rng.randint(0, 2025)),
+        ]
+        rng.shuffle(parts)
+        script.append(rng.choice("，。！？ ").join(part for part in parts if part))
+    return script
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark of the text metrics")
+    parser.add_argument(
+        "--lines", type=int, default=10000, help="Lines in the script (default: 10000)"
+    )
+    args = parser.parse_args()
+
+    # Imported here, utils_module imports this module
+    from utils_module import (
+        calculate_display_length,
+        contains_chinese,
+        estimate_speaking_time,
+        split_by_chinese_count,
+    )
+
+    script = _sample_script(args.lines)
+    characters = sum(map(len, script))
+    _class_table()
+
+    start_time = time.perf_counter()
+    for line in script:
+        TextMetrics(line)
+    classify = time.perf_counter() - start_time
+
+    analyze_text.cache_clear()
+    start_time = time.perf_counter()
+    for line in script:
+        contains_chinese(line)
+        calculate_display_length(line)
+        split_by_chinese_count(line, 20)
+        estimate_speaking_time(line)
+    helpers = time.perf_counter() - start_time
+
+    print(f"{args.lines} lines, {characters} characters")
+    print(f"Classify once:             {classify * 1000:.1f}ms")
+    print(f"Subtitle helpers per line: {helpers * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
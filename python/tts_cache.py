@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+TTS cache - content-addressed store of synthesized sentences, so only new or
+changed sentences are sent to the TTS service
+
+Every sentence is stored as <key>.mp3 with a <key>.json holding its duration
+and word timings; the key is a hash of the text, voice type and encoding.
+"""
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+from utils_module import default_cache_dir
+
+
+def normalize_word_times(words, duration):
+    """Convert word timings to seconds; some TTS responses use milliseconds"""
+    if words and duration and max(word["end"] for word in words) > duration * 2:
+        return [
+            dict(word, start=word["start"] / 1000, end=word["end"] / 1000)
+            for word in words
+        ]
+    return words
+
+
+class TTSCache:
+    """Synthesized sentences keyed by text, voice type and encoding"""
+
+    def __init__(self, voice_type, encoding, cache_dir=None, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.voice_type = voice_type
+        self.encoding = encoding
+        self.cache_dir = Path(cache_dir or default_cache_dir()) / "tts"
+
+    def key(self, text):
+        """Content address of a sentence"""
+        content = json.dumps(
+            {"text": text, "voice_type": self.voice_type, "encoding": self.encoding},
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def _paths(self, text):
+        key = self.key(text)
+        return (
+            self.cache_dir / f"{key}.{self.encoding}",
+            self.cache_dir / f"{key}.json",
+        )
+
+    def get(self, text):
+        """Return {"text", "path", "duration", "words"} of a cached sentence, or None"""
+        audio_path, meta_path = self._paths(text)
+        if not audio_path.exists() or not meta_path.exists():
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            return {
+                "text": text,
+                "path": audio_path,
+                "duration": meta["duration"],
+                "words": meta.get("words", []),
+            }
+        except Exception as e:
+            self.logger.warning(f"Ignoring broken TTS cache entry {meta_path}: {e}")
+            return None
+
+    def put(self, text, audio_data, words):
+        """Store a synthesized sentence and return its cache entry"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        audio_path, meta_path = self._paths(text)
+
+        temp_audio = audio_path.with_name(audio_path.name + ".tmp")
+        with open(temp_audio, "wb") as f:
+            f.write(audio_data)
+        duration = ffmpeg_parse_infos(str(temp_audio))["duration"]
+        temp_audio.replace(audio_path)
+
+        meta = {
+            "text": text,
+            "voice_type": self.voice_type,
+            "encoding": self.encoding,
+            "duration": duration,
+            "words": normalize_word_times(words, duration),
+        }
+        temp_meta = meta_path.with_name(meta_path.name + ".tmp")
+        with open(temp_meta, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        temp_meta.replace(meta_path)
+
+        self.logger.debug(f"Cached TTS sentence ({duration:.2f}s): {text}")
+        return self.get(text)
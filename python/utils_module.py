@@ -3,75 +3,32 @@
 Utility functions for the AI Video Generator
 """
 
+import functools
 import os
-import subprocess
 import numpy as np
-from moviepy import TextClip, ColorClip, CompositeVideoClip
+from moviepy import ImageClip
 from pathlib import Path
+from PIL import Image, ImageColor, ImageFont
+
+from text_layout import glyph_atlas, layout_text
+from text_metrics import DISPLAY_WEIGHTS, analyze_text
 
 
 def contains_chinese(text):
     """Check if text contains Chinese characters"""
     if not text:
         return False
-
-    # Chinese character ranges (including common CJK characters)
-    chinese_ranges = [
-        (0x4E00, 0x9FFF),  # CJK Unified Ideographs (Common Chinese)
-        (0x3400, 0x4DBF),  # CJK Unified Ideographs Extension A
-        (0x20000, 0x2A6DF),  # CJK Unified Ideographs Extension B
-        (0x2A700, 0x2B73F),  # CJK Unified Ideographs Extension C
-        (0x2B740, 0x2B81F),  # CJK Unified Ideographs Extension D
-        (0x2B820, 0x2CEAF),  # CJK Unified Ideographs Extension E
-        (0x3300, 0x33FF),  # CJK Compatibility
-        (0xFE30, 0xFE4F),  # CJK Compatibility Forms
-        (0xF900, 0xFAFF),  # CJK Compatibility Ideographs
-        (0x2F800, 0x2FA1F),  # CJK Compatibility Ideographs Supplement
-        (0x3100, 0x312F),  # Bopomofo
-        (0x31A0, 0x31BF),  # Bopomofo Extended
-        (0x3040, 0x309F),  # Hiragana
-        (0x30A0, 0x30FF),  # Katakana
-        (0xAC00, 0xD7AF),  # Hangul Syllables
-    ]
-
-    chinese_chars = []
-    for char in text:
-        char_code = ord(char)
-        for start, end in chinese_ranges:
-            if start <= char_code <= end:
-                chinese_chars.append(char)
-                break
-
-    if chinese_chars:
-        # print(f">>>Chinese characters detected: {chinese_chars}")
-        return True
-    return False
+    return analyze_text(text).cjk > 0
 
 
 def calculate_display_length(text):
     """Calculate display length where 2 English chars = 1 Chinese char"""
-    chinese_chars = 0
-    english_chars = 0
-
-    for char in text:
-        if "\u4e00" <= char <= "\u9fff":  # Chinese character
-            chinese_chars += 1
-        elif char.isalpha() and char.isascii():  # English letter
-            english_chars += 1
-        # Ignore spaces and punctuation for length calculation
-
-    # Calculate: Chinese chars count as 1, English chars count as 0.5 each
-    # Total should not exceed 20 (equivalent to 20 Chinese chars)
-    return chinese_chars + (english_chars / 2)
+    return analyze_text(text).display_length
 
 
 def count_chinese_characters(text):
     """Count Chinese characters in text"""
-    count = 0
-    for char in text:
-        if "\u4e00" <= char <= "\u9fff":  # Unicode range for Chinese characters
-            count += 1
-    return count
+    return analyze_text(text).ideographs
 
 
 def split_by_chinese_count(text, max_length):
@@ -80,32 +37,24 @@ def split_by_chinese_count(text, max_length):
         return []
 
     chunks = []
-    current_chunk = ""
+    chunk_start = 0
     current_length = 0
 
-    for char in text:
-        # Calculate length contribution of this character
-        if "\u4e00" <= char <= "\u9fff":  # Chinese character
-            char_length = 1
-        elif char.isalpha() and char.isascii():  # English letter
-            char_length = 0.5
-        else:  # Punctuation, numbers, spaces - don't count towards length
-            char_length = 0
+    for index, char_class in enumerate(analyze_text(text).classes):
+        # Punctuation, numbers, spaces - don't count towards length
+        char_length = DISPLAY_WEIGHTS.get(char_class, 0)
 
         # Check if adding this character would exceed the limit
-        if current_length + char_length > max_length and current_chunk:
+        if current_length + char_length > max_length and index > chunk_start:
             # Save current chunk and start new one
-            chunks.append(current_chunk)
-            current_chunk = char
+            chunks.append(text[chunk_start:index])
+            chunk_start = index
             current_length = char_length
         else:
-            # Add to current chunk
-            current_chunk += char
             current_length += char_length
 
     # Add remaining chunk
-    if current_chunk:
-        chunks.append(current_chunk)
+    chunks.append(text[chunk_start:])
 
     return chunks
 
@@ -290,18 +239,27 @@ def split_by_punctuation_marks(text):
 
 def split_by_length(subtitle):
     """Split subtitle by character/word count as last resort"""
-    max_length = 25 if contains_chinese(subtitle) else 40
+    metrics = analyze_text(subtitle)
+    is_chinese = metrics.cjk > 0
+    max_length = 25 if is_chinese else 40
 
     if len(subtitle) <= max_length:
         return [subtitle]
 
-    if contains_chinese(subtitle):
+    if is_chinese:
         # For Chinese, split at word boundaries or character count
         mid_point = len(subtitle) // 2
-        # Try to find a good split point
-        for i in range(mid_point, max(0, mid_point - 10), -1):
-            if i < len(subtitle) - 1:
-                return [subtitle[:i], clean_punctuation(subtitle[i:].strip())]
+        # Try to find a good split point: a space or punctuation near the middle
+        candidates = [
+            i
+            for i in metrics.split_points
+            if mid_point - 10 < i <= mid_point and i < len(subtitle) - 1
+        ]
+        if candidates:
+            i = candidates[-1]
+            return [subtitle[:i].strip(), clean_punctuation(subtitle[i:].strip())]
+        if mid_point < len(subtitle) - 1:
+            return [subtitle[:mid_point], clean_punctuation(subtitle[mid_point:].strip())]
         # Fallback
         return [
             subtitle[:max_length],
@@ -328,304 +286,200 @@ def split_by_length(subtitle):
         return [subtitle]
 
 
-def split_long_subtitle_text(text, max_length=14):
-    """Split long subtitle text into multiple lines for mobile display"""
-    # First, check if text needs splitting based on visual width rather than character count
-    if len(text) <= max_length:
-        return [text]
-
-    # For Chinese text, use a more conservative approach
-    if contains_chinese(text):
-        max_length = 12  # Chinese characters are wider
-
-    # Try to split at natural break points
-    break_points = [
-        "，",
-        "。",
-        "！",
-        "？",
-        "、",
-        "；",
-        "：",
-        " ",
-        "的",
-        "和",
-        "与",
-        "及",
-    ]
-
-    for break_char in break_points:
-        if break_char in text:
-            parts = text.split(break_char)
-            if len(parts) > 1:
-                result = []
-                current_line = ""
-                for part in parts:
-                    # Check if adding this part would exceed the limit
-                    test_line = (
-                        current_line + (break_char if current_line else "") + part
-                    )
-                    if len(test_line) <= max_length:
-                        if current_line:
-                            current_line += break_char + part
-                        else:
-                            current_line = part
-                    else:
-                        # Current line is full, add to result
-                        if current_line:
-                            result.append(current_line)
-                        # Start new line with current part
-                        current_line = part
-                        # If the part itself is too long, split it further
-                        if len(current_line) > max_length:
-                            # Split the part into chunks
-                            for i in range(0, len(current_line), max_length):
-                                result.append(current_line[i : i + max_length])
-                            current_line = ""
-                if current_line:
-                    result.append(current_line)
-
-                # Validate all lines are within limits
-                result = [line for line in result if line.strip()]
-                if all(len(line) <= max_length for line in result):
-                    return result
-
-    # If no natural break points, split by character count
-    lines = []
-    for i in range(0, len(text), max_length):
-        lines.append(text[i : i + max_length])
-
-    print(lines)
-    return lines
-
-
-def calculate_safe_max_chars(text, max_width_pixels):
-    """Calculate safe maximum characters based on character types"""
-    if not text:
-        return 20  # Default fallback
-
-    # Count character types
-    chinese_count = sum(1 for char in text if contains_chinese(char))
-    english_count = sum(
-        1 for char in text if char.isalpha() and not contains_chinese(char)
-    )
-    digit_count = sum(1 for char in text if char.isdigit())
-
-    # Calculate character width multiplier
-    # Chinese characters are ~2x wider than English characters
-    char_width_sum = chinese_count * 2 + english_count + digit_count * 1.5
-    avg_char_width = char_width_sum / len(text) if text else 1.5
-
-    # Estimate safe character count based on pixel width
-    # Assuming average character width of ~12 pixels for English
-    safe_chars = int(max_width_pixels / (12 * avg_char_width))
-
-    return min(safe_chars, 12 if chinese_count > 0 else 14)
-
-
 def estimate_speaking_time(text):
     """Estimate speaking time for text based on linguistic analysis"""
-    if not text:
-        return 1.0  # Minimum duration
-
-    # Count different types of characters
-    chinese_chars = sum(1 for char in text if contains_chinese(char))
-    english_words = len([word for word in text.split() if not contains_chinese(word)])
-    digits = sum(1 for char in text if char.isdigit())
-    punctuation = sum(1 for char in text if char in '，。！？；：""（）【】《》')
-
-    # Fixed timing calculation - more reasonable limits
-    # Chinese characters: ~0.25 seconds each (faster pace)
-    # English words: ~0.2 seconds each
-    # Digits: ~0.3 seconds each
-    # Punctuation: minimal pause time
+    return analyze_text(text).speaking_time
 
-    chinese_time = chinese_chars * 0.25
-    english_time = english_words * 0.2
-    digit_time = digits * 0.3
-    punctuation_time = punctuation * 0.1
 
-    # Base time from content
-    base_time = chinese_time + english_time + digit_time + punctuation_time
-
-    # Much more reasonable bounds - prevent any single subtitle from dominating
-    # Maximum 8 seconds per subtitle, minimum 2 seconds
-    estimated_time = max(2.0, min(base_time, 8.0))
+@functools.lru_cache(maxsize=None)
+def get_chinese_compatible_font(default_font="Arial"):
+    """Get a font that supports Chinese characters, resolved once per process
 
-    return estimated_time
+    Installed fonts are checked for Chinese glyphs in their cmap tables by
+    font_resolver, which caches the scan until the font directories change.
+    Returns the font file path, default_font if no installed font covers
+    Chinese but PIL can load default_font, otherwise None.
+    """
+    # font_resolver uses default_cache_dir from this module
+    from font_resolver import FontResolver
 
+    font_path = FontResolver().chinese_font()
+    if font_path:
+        return font_path
 
-def get_chinese_compatible_font(default_font="Arial"):
-    """Get a font that supports Chinese characters"""
-    # List of Chinese-compatible fonts, in order of preference
-    chinese_fonts = [
-        # Cross-platform Unicode fonts (verified working for rendering)
-        "Arial-Unicode-MS",  # Cross-platform Unicode - WORKING for rendering
-        "Lucida Sans Unicode",  # Cross-platform Unicode
-        # macOS Chinese fonts (detected but rendering issues)
-        "Heiti SC",  # macOS Chinese simplified - detected but rendering issues
-        "Heiti TC",  # macOS Chinese traditional - detected but rendering issues
-        "Noto Sans SC",  # macOS Noto Sans Chinese - detected but rendering issues
-        "STHeiti Medium",  # macOS Chinese medium
-        "STHeiti Light",  # macOS Chinese light
-        # Additional macOS fonts
-        "PingFang SC",  # macOS system font
-        "PingFang HK",  # macOS Hong Kong variant
-        "PingFang TC",  # macOS Taiwan variant
-        "Hiragino Sans GB",  # macOS Chinese simplified
-        # Windows fonts
-        "Microsoft YaHei",  # Windows Chinese font
-        "SimSun",  # Windows Chinese simplified
-        "SimHei",  # Windows Chinese Simplified
-        # Linux/open source fonts
-        "Noto Sans CJK SC",  # Linux Noto Sans
-        "WenQuanYi Micro Hei",  # Linux Chinese font
-        "AR PL UMing CN",  # Linux Chinese font
-        # Try with underscores instead of hyphens (some systems use this format)
-        "Heiti_SC",
-        "Heiti_TC",
-        "Noto_Sans_SC",
-        "PingFang_SC",
-        "Arial_Unicode_MS",
-        "Lucida_Sans_Unicode",
-        default_font,  # Fallback to default
-    ]
-
-    # Try each font until we find one that works
-    for font in chinese_fonts:
-        try:
-            # Test if the font can render Chinese characters with proper rendering check
-            test_text = "测试中文字体"
-            test_clip = TextClip(
-                font,
-                test_text,
-                font_size=12,
-                color="white",
-                stroke_color="black",
-                stroke_width=1,
-                size=(200, 50),
-                method="label",
-            )
-
-            # Create a black background to test rendering
-            bg = ColorClip(size=(200, 50), color=(0, 0, 0))
-            composite = CompositeVideoClip([bg, test_clip.with_position("center")])
-
-            # Get a frame to verify actual rendering
-            test_frame = composite.get_frame(0)
-
-            # Check if text was actually rendered (not just black background)
-            text_rendered = not (test_frame == 0).all()
-
-            # Clean up
-            test_clip.close()
-            bg.close()
-            composite.close()
-
-            if text_rendered:
-                return font
-            else:
-                continue
-
-        except Exception as font_error:
-            # Also try with a simpler test to see if the font exists at all
-            try:
-                simple_test = TextClip(
-                    font,
-                    "Test",
-                    font_size=12,
-                    color="white",
-                    stroke_color="black",
-                    stroke_width=1,
-                    method="label",
-                )
-                simple_test.close()
-            except Exception as e2:
-                continue
-
-    # If none of the predefined fonts work, try to find Chinese fonts in system
-    system_font = find_chinese_font_in_system()
-    if system_font:
-        return system_font
-
-    # If no Chinese font works, try the default font
     try:
-        test_clip = TextClip(
-            default_font,
-            "Test",
-            font_size=12,
-            color="white",
-            stroke_color="black",
-            stroke_width=1,
-            method="label",
-        )
-        test_clip.close()
+        ImageFont.truetype(default_font)
         return default_font
-    except Exception as e:
+    except Exception:
         return None
 
 
-def get_system_fonts():
-    """Get available system fonts on macOS"""
-    try:
-        # Use system_profiler to get available fonts on macOS
-        result = subprocess.run(
-            ["system_profiler", "SPFontsDataType"],
-            capture_output=True,
-            text=True,
-            timeout=30,
+def render_text(
+    font,
+    text,
+    font_size,
+    color="white",
+    stroke_color=None,
+    stroke_width=0,
+    width=None,
+    interline=4,
+):
+    """Centered text as an RGBA array, composed from cached glyph bitmaps
+
+    Takes the same styling as TextClip; see text_layout.layout_text for width.
+    """
+    if not stroke_color:
+        stroke_width = 0
+    atlas = glyph_atlas(font, font_size, stroke_width)
+    lines, (image_width, image_height) = layout_text(
+        font, text, font_size, stroke_width, width, interline
+    )
+
+    fill_alpha = np.zeros((image_height, image_width), dtype=np.uint8)
+    stroke_alpha = np.zeros_like(fill_alpha)
+    for index, line in enumerate(lines):
+        pen_x = (image_width - atlas.text_width(line)) / 2 + stroke_width
+        baseline = (
+            atlas.ascent + stroke_width + index * (atlas.line_spacing + interline)
         )
-        if result.returncode == 0:
-            font_lines = []
-            for line in result.stdout.split("\n"):
-                if "Font Name:" in line:
-                    font_name = line.split("Font Name:")[1].strip()
-                    font_lines.append(font_name)
-            return font_lines
-    except Exception as e:
-        pass
-    return []
-
-
-def find_chinese_font_in_system():
-    """Find Chinese fonts in system font list"""
-    system_fonts = get_system_fonts()
-    if not system_fonts:
-        return None
+        for char in line:
+            left, top, fill_mask, stroke_mask = atlas.glyph(char)
+            if fill_mask is not None:
+                x = int(round(pen_x)) + left
+                y = baseline + top
+                _blit_max(fill_alpha, fill_mask, x, y)
+                if stroke_mask is not None:
+                    _blit_max(stroke_alpha, stroke_mask, x, y)
+            pen_x += atlas.advance(char)
+
+    # Fill is drawn over the stroke, as PIL does
+    fill = np.array(ImageColor.getrgb(color)[:3], dtype=np.float32)
+    alpha = fill_alpha[..., None].astype(np.float32) / 255
+    if stroke_width:
+        stroke = np.array(ImageColor.getrgb(stroke_color)[:3], dtype=np.float32)
+        rgb = fill * alpha + stroke * (1 - alpha)
+        coverage = np.maximum(fill_alpha, stroke_alpha)
+    else:
+        rgb = np.broadcast_to(fill, alpha.shape[:2] + (3,))
+        coverage = fill_alpha
+
+    image = np.empty((image_height, image_width, 4), dtype=np.uint8)
+    image[..., :3] = np.round(rgb).astype(np.uint8)
+    image[..., 3] = coverage
+    return image
+
+
+def _blit_max(target, mask, x, y):
+    """Combine mask into target at (x, y) by maximum, clipped to the target"""
+    height, width = target.shape
+    x0, y0 = max(x, 0), max(y, 0)
+    x1 = min(x + mask.shape[1], width)
+    y1 = min(y + mask.shape[0], height)
+    if x1 <= x0 or y1 <= y0:
+        return
+    region = target[y0:y1, x0:x1]
+    np.maximum(region, mask[y0 - y : y1 - y, x0 - x : x1 - x], out=region)
+
+
+def text_spec(
+    font,
+    text,
+    font_size,
+    color="white",
+    stroke_color=None,
+    stroke_width=0,
+    width=None,
+    max_width=None,
+    box=None,
+):
+    """Everything that determines the pixels of a text image, as a dict
+
+    box is (padding_x, padding_y, color, opacity) of a background box drawn
+    behind the text, None for no box.
+    """
+    return {
+        "font": font,
+        "text": text,
+        "font_size": font_size,
+        "color": color,
+        "stroke_color": stroke_color,
+        "stroke_width": stroke_width,
+        "width": width,
+        "max_width": max_width,
+        "box": list(box) if box else None,
+    }
+
+
+def render_text_image(
+    font,
+    text,
+    font_size,
+    color="white",
+    stroke_color=None,
+    stroke_width=0,
+    width=None,
+    max_width=None,
+    box=None,
+):
+    """RGBA array of text as described by text_spec
+
+    A result wider than max_width is scaled down to fit, then the box is
+    drawn around it.
+    """
+    image = render_text(font, text, font_size, color, stroke_color, stroke_width, width)
+    if max_width and image.shape[1] > max_width:
+        scale = max_width / image.shape[1]
+        size = (int(max_width), max(1, int(round(image.shape[0] * scale))))
+        image = np.asarray(Image.fromarray(image, "RGBA").resize(size, Image.LANCZOS))
+    if box:
+        padding_x, padding_y, box_color, opacity = box
+        height, width = image.shape[:2]
+        background = Image.new(
+            "RGBA",
+            (width + 2 * padding_x, height + 2 * padding_y),
+            ImageColor.getrgb(box_color)[:3] + (int(round(opacity * 255)),),
+        )
+        background.alpha_composite(Image.fromarray(image, "RGBA"), (padding_x, padding_y))
+        image = np.asarray(background)
+    return image
+
+
+def make_text_clip(
+    font,
+    text,
+    font_size,
+    color="white",
+    stroke_color=None,
+    stroke_width=0,
+    width=None,
+    max_width=None,
+    box=None,
+    cache=None,
+):
+    """Transparent ImageClip of centered text, rendered from the glyph cache
+
+    Replaces TextClip(method="caption" with size=(width, None), or "label"
+    without width). See render_text_image for max_width and box; with a
+    raster_cache.RasterCache as cache the image is taken from or stored in it.
+    """
+    spec = text_spec(
+        font, text, font_size, color, stroke_color, stroke_width, width, max_width, box
+    )
+    image = cache.image(spec) if cache else render_text_image(**spec)
+    return ImageClip(image, transparent=True)
+
+
+def make_overlay_layer(clip, start, end, fade_in=0.0):
+    """Describe a positioned overlay clip shown from start to end (seconds)
+
+    Overlay layers are kept untimed so that every render backend can decide
+    how to place them: the MoviePy path blends them per frame with
+    overlay_compositor, the FFmpeg backend rasterizes them once and overlays
+    the bitmaps.
+    """
+    return {"clip": clip, "start": start, "end": end, "fade_in": fade_in}
 
-    # Look for Chinese fonts in the system list
-    chinese_keywords = [
-        "PingFang",
-        "Heiti",
-        "STHeiti",
-        "Hiragino",
-        "Microsoft YaHei",
-        "SimSun",
-        "SimHei",
-        "Noto Sans CJK",
-        "WenQuanYi",
-        "KaiTi",
-        "FangSong",
-    ]
-
-    for font in system_fonts:
-        for keyword in chinese_keywords:
-            if keyword.lower() in font.lower():
-                # Test if it works
-                try:
-                    test_clip = TextClip(
-                        font,
-                        "测试中文字体",
-                        font_size=12,
-                        color="white",
-                        stroke_color="black",
-                        stroke_width=1,
-                        method="label",
-                    )
-                    test_clip.close()
-                    return font
-                except Exception as e:
-                    continue
-
-    return None
 
+def default_cache_dir():
+    """Root folder of the aivideo caches: AIVIDEO_CACHE_DIR, default ~/.cache/aivideo"""
+    return Path(os.getenv("AIVIDEO_CACHE_DIR", Path.home() / ".cache" / "aivideo"))
@@ -1,15 +1,17 @@
+import json
+import math
 import os
 import random
+import shutil
 import time
-import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from typing import TypeVar
 from pathlib import Path
 import numpy as np
+from PIL import Image, ImageOps
 from moviepy import (
     VideoFileClip,
     AudioFileClip,
-    TextClip,
-    CompositeVideoClip,
     concatenate_videoclips,
     vfx,
     ColorClip,
@@ -31,10 +33,41 @@ from llm_module import LLMManager
 # Import utility functions
 from utils_module import (
     contains_chinese,
-    split_long_subtitle_text,
-    calculate_safe_max_chars,
     get_chinese_compatible_font,
+    make_overlay_layer,
+    make_text_clip,
+    text_spec,
 )
+from text_layout import fit_font_size, layout_text
+from overlay_compositor import composite_overlays
+from ffmpeg_renderer import FFmpegRenderer
+from segment_renderer import SegmentRenderer
+from media_probe import MediaProbeIndex
+from frame_cache import FrameCache
+from conformed_reader import load_conformed_video
+from proxy_cache import ProxyCache
+from reader_pool import ReaderPool, DEFAULT_MAX_READERS
+from raster_cache import DEFAULT_RASTER_CACHE_GB, RasterCache
+
+# Media file extensions that are treated as still images
+IMAGE_EXTENSIONS = {
+    ".jpg",
+    ".jpeg",
+    ".png",
+    ".gif",
+    ".bmp",
+    ".tiff",
+}
+
+# Output canvas (mobile portrait) and frame rate
+CANVAS_SIZE = (1080, 1920)
+OUTPUT_FPS = 24
+
+# Subtitles that need more lines than this are set in a smaller font
+SUBTITLE_MAX_LINES = 3
+
+# Background box of a subtitle line: (padding x, padding y, color, opacity)
+SUBTITLE_BOX = (10, 5, "black", 0.1)
 
 # Type annotations for MoviePy objects
 ClipType = TypeVar("ClipType")
@@ -60,11 +93,17 @@ class VideoGenerator:
         self.subtitle_folder = self.project_folder / "subtitle"
         self.logger = self.config.logger
         self.llm_manager = LLMManager(self.config)
+        # Rasterized text lines, shared by all projects
+        self.raster_cache = RasterCache(
+            max_gb=getattr(args, "raster_cache_size", DEFAULT_RASTER_CACHE_GB),
+            logger=self.logger,
+        )
         # Initialize subtitle processor
-        self.title_processor = TitleProcessor(self.logger)
+        self.title_processor = TitleProcessor(self.logger, self.raster_cache)
         self.subtitle_processor = SubtitleProcessor(self, self.logger)
         self.background_music_processor = BackgroundMusicProcessor(self.logger, args)
-        self.audioGenerator = AudioGenerator(self.logger)
+        self.segment_renderer = SegmentRenderer(self.logger, args)
+        self.audioGenerator = AudioGenerator(self.logger, args)
         self.subtitle_timestamps = []
 
         # Media files list
@@ -79,6 +118,50 @@ class VideoGenerator:
         self.display_to_voice_mapping = []  # Maps display subtitle index to voice subtitle index
         self.audio_file = None
 
+        # Probe results of the project's videos, kept across runs
+        self.media_probe = MediaProbeIndex(self.project_folder, self.logger)
+
+        # Video sources opened for rendering, with a cap on their live decoders
+        self.source_clips = {}
+        self.conformed_clips = {}
+        self.reader_pool = self._new_reader_pool()
+
+        # Decoded frames of sources that are looped to fill their slot
+        self.frame_cache = FrameCache(logger=self.logger)
+        self.looped_sources = set()
+        self.conformed_images = {}
+
+        # A fixed seed makes the plan, and so every rendered segment, reproducible
+        seed = getattr(args, "seed", None)
+        if seed is None and getattr(args, "segment_cache", False):
+            seed = 0
+        if seed is not None:
+            self.logger.info(f"Random seed: {seed}")
+            random.seed(seed)
+        if getattr(args, "segment_cache", False) and (
+            getattr(args, "render_backend", "moviepy") != "ffmpeg"
+        ):
+            self.logger.warning("--segment-cache only applies to --render-backend ffmpeg")
+
+        # Conformed proxies of video sources, shared by all projects
+        self.proxy_cache = None
+        self.proxy_paths = {}
+        if getattr(args, "proxy_cache", False):
+            self.proxy_cache = ProxyCache(
+                CANVAS_SIZE,
+                OUTPUT_FPS,
+                max_gb=getattr(args, "proxy_cache_size", 50),
+                logger=self.logger,
+            )
+
+        # Timeline saved by --draft and rendered again by --reuse-plan
+        self.render_plan_file = self.project_folder / "output" / "render_plan.json"
+
+        if getattr(args, "draft", False) and getattr(args, "fresh_subtitle", False):
+            # A preview reuses the cached responses the final render will use
+            self.logger.info("--draft reuses cached subtitles, ignoring --fresh-subtitle")
+            args.fresh_subtitle = False
+
     def scan_media_files(self):
         """Scan media folder and identify special files"""
         # Find all media files (videos and images)
@@ -117,6 +200,8 @@ class VideoGenerator:
         if self.args.sort == "alphnum":
             all_files.sort(key=lambda x: x.name.lower())
         elif self.args.sort == "random":
+            # Directory order differs between file systems, shuffle a stable order
+            all_files.sort(key=lambda x: x.name.lower())
             random.shuffle(all_files)
 
         self.media_files = all_files
@@ -126,8 +211,13 @@ class VideoGenerator:
         if self.closing_file:
             print(f"Found closing file: {self.closing_file}")
 
-    def process_media_clips(self):
-        """Process media clips according to specifications"""
+    def plan_media_clips(self):
+        """Plan which media pieces make up the main content, without decoding any frames
+
+        Returns a list of plan entries (see _plan_entry). Entries that share a
+        clip_index are pieces of the same main clip, e.g. a short video that is
+        repeated to fill its slot.
+        """
         if not self.media_files:
             raise ValueError("No media files found")
 
@@ -144,10 +234,21 @@ class VideoGenerator:
         selected_clips = self.media_files[:clip_num]
         self.logger.info(f"Selected {len(selected_clips)} clips for processing")
 
+        # Probe every selected video up front in parallel, the planners below
+        # then read the results from the index in clip order
+        self.media_probe.probe_many(
+            [
+                file_path
+                for file_path in selected_clips + [self.start_file, self.closing_file]
+                if file_path and not self._is_image_file(file_path)
+            ],
+            self._media_workers(),
+        )
+
         if self.args.keep_clip_length:
             # Keep original clip lengths
             self.logger.info("Using keep_clip_length mode")
-            return self._process_with_original_length(selected_clips)
+            return self._plan_with_original_length(selected_clips)
         else:
             # Check if we have a target length
             target_length = getattr(self.args, "length", None)
@@ -155,16 +256,244 @@ class VideoGenerator:
             if target_length:
                 # Cut clips to fit target length
                 self.logger.info("Using target length mode")
-                return self._process_with_target_length(selected_clips)
+                return self._plan_with_target_length(selected_clips)
             else:
                 # No target length specified - keep original lengths
                 self.logger.info(
                     "No target length specified, keeping original clip lengths"
                 )
-                return self._process_with_original_length(selected_clips)
+                return self._plan_with_original_length(selected_clips)
+
+    def _is_image_file(self, file_path):
+        """Check whether a media file is a still image"""
+        return file_path.suffix.lower() in IMAGE_EXTENSIONS
+
+    def _plan_entry(
+        self, file_path, duration, clip_index, source_start=0.0, role="main", loop=False
+    ):
+        """Describe one piece of the timeline taken from a media file
+
+        loop marks a piece that replays its source from the start right after
+        the previous piece played the same source to its end, so renderers can
+        decode the source once and loop it.
+        """
+        return {
+            "path": file_path,
+            "kind": "image" if self._is_image_file(file_path) else "video",
+            "source_start": source_start,
+            "source_end": source_start + duration,
+            "duration": duration,
+            "clip_index": clip_index,
+            "role": role,
+            "loop": loop,
+        }
+
+    def _plan_clip_spans(self, plan):
+        """Return (start, end) of every planned clip, relative to the start of the plan"""
+        spans = []
+        elapsed = 0.0
+        for entry in plan:
+            if spans and spans[-1][0] == entry["clip_index"]:
+                spans[-1][2] += entry["duration"]
+            else:
+                spans.append([entry["clip_index"], elapsed, elapsed + entry["duration"]])
+            elapsed += entry["duration"]
+        return [(span_start, span_end) for _, span_start, span_end in spans]
+
+    def _trim_plan(self, plan, duration):
+        """Cut a plan so that it lasts at most duration seconds"""
+        trimmed = []
+        elapsed = 0.0
+        for entry in plan:
+            remaining = duration - elapsed
+            if remaining <= 0.001:
+                break
+            if entry["duration"] > remaining:
+                entry = dict(
+                    entry,
+                    duration=remaining,
+                    source_end=entry["source_start"] + remaining,
+                )
+            trimmed.append(entry)
+            elapsed += entry["duration"]
+        return trimmed
+
+    def _probe_video_duration(self, file_path):
+        """Duration of a video from the probe index, None if it is corrupted"""
+        probe = self.media_probe.probe(file_path)
+        if probe is None or probe["corrupt"]:
+            return None
+        return probe["duration"]
+
+    def _load_source_clip(self, file_path):
+        """Load a video source once per run; corrupted files are remembered as None"""
+        if file_path not in self.source_clips:
+            self.source_clips[file_path] = self._safe_load_video_clip(file_path)
+        return self.source_clips[file_path]
+
+    def _media_workers(self):
+        """Number of media files probed or opened at once, from --media-workers"""
+        return max(1, getattr(self.args, "media_workers", 4) or 1)
+
+    def _preload_source_clips(self, entries):
+        """Open the video sources of plan entries in parallel, before they are used in order"""
+        paths = []
+        for entry in entries:
+            path = entry["path"]
+            if entry["kind"] == "video" and path not in self.source_clips and path not in paths:
+                paths.append(path)
+        if len(paths) <= 1:
+            return
+
+        self.logger.info(
+            f"Opening {len(paths)} video sources with {self._media_workers()} workers"
+        )
+        with ThreadPoolExecutor(max_workers=self._media_workers()) as executor:
+            clips = list(executor.map(self._safe_load_video_clip, paths))
+        for path, clip in zip(paths, clips):
+            self.source_clips[path] = clip
+
+    def _conformed_source_clip(self, file_path):
+        """Load a video source resized to the mobile canvas, once per run"""
+        if file_path not in self.conformed_clips:
+            source_clip = self._load_source_clip(file_path)
+            if source_clip is not None:
+                source_clip = self._resize_to_mobile_aspect_ratio(source_clip)
+                if file_path in self.looped_sources:
+                    source_clip = self.frame_cache.wrap(source_clip)
+            self.conformed_clips[file_path] = source_clip
+        return self.conformed_clips[file_path]
+
+    def _conformed_image(self, file_path):
+        """Load an image cover-scaled and center-cropped to the canvas, once per run"""
+        if file_path not in self.conformed_images:
+            with Image.open(file_path) as image:
+                if image.mode in ("RGBA", "LA", "P"):
+                    # Transparent areas show the black background, as with a composited ImageClip
+                    image = image.convert("RGBA")
+                    background = Image.new("RGB", image.size, (0, 0, 0))
+                    background.paste(image, mask=image.getchannel("A"))
+                    image = background
+                image = ImageOps.fit(
+                    image.convert("RGB"), CANVAS_SIZE, method=Image.LANCZOS
+                )
+                self.conformed_images[file_path] = np.asarray(image)
+        return self.conformed_images[file_path]
+
+    def _clip_for_plan_entry(self, entry):
+        """Create the MoviePy clip for a single plan entry"""
+        if entry["kind"] == "image":
+            # Conformed once, the clip returns the same frame for its whole duration
+            return ImageClip(self._conformed_image(entry["path"])).with_duration(
+                entry["duration"]
+            )
+
+        source_clip = self._conformed_source_clip(entry["path"])
+        if source_clip is None:
+            raise ValueError(f"Video clip could not be loaded: {entry['path']}")
+        if entry["source_start"] <= 0 and entry["source_end"] >= source_clip.duration:
+            return source_clip
+        return source_clip.subclipped(entry["source_start"], entry["source_end"])
+
+    def _materialize_plan(self, plan):
+        """Build one silent MoviePy clip per planned clip"""
+        self.looped_sources |= {entry["path"] for entry in plan if entry.get("loop")}
+
+        grouped_entries = []
+        for entry in plan:
+            if grouped_entries and grouped_entries[-1][0]["clip_index"] == entry["clip_index"]:
+                grouped_entries[-1].append(entry)
+            else:
+                grouped_entries.append([entry])
+
+        processed_clips = []
+        for entries in grouped_entries:
+            clip_path = entries[0]["path"]
+            try:
+                pieces = [self._clip_for_plan_entry(entry) for entry in entries]
+                if len(pieces) == 1:
+                    clip = pieces[0]
+                else:
+                    clip = self._safe_concatenate_clips(pieces, method="compose")
+                    self.logger.info(
+                        f"Successfully extended video clip: {clip_path} (extended: {clip.duration:.2f}s)"
+                    )
+
+                # Make clip silent if requested
+                processed_clips.append(clip.without_audio())
+                self.logger.debug(
+                    f"Loaded and resized clip: {clip_path} ({clip.duration:.2f}s -> {clip.w}x{clip.h})"
+                )
+            except Exception as e:
+                self.logger.error(f"Failed to process {clip_path}: {e}")
+                print(f"Damn, failed to process {clip_path}: {e}")
+                continue
+
+        return processed_clips
+
+    def _open_video_sources(self):
+        """Return the video files opened during planning and rendering"""
+        return [clip for clip in self.source_clips.values() if clip is not None]
+
+    def _close_source_clips(self):
+        """Close every video source opened during planning and rendering"""
+        # Finish background prefetches first, so no decoder is reopened after closing
+        self.reader_pool.close()
+        for clip in list(self.conformed_clips.values()) + list(
+            self.source_clips.values()
+        ):
+            if clip is not None:
+                try:
+                    clip.close()
+                except Exception as e:
+                    self.logger.debug(f"Failed to close source clip: {e}")
+        self.conformed_clips = {}
+        self.source_clips = {}
+        self.reader_pool = self._new_reader_pool()
+        if self.proxy_cache is not None:
+            # Proxies of this run may be evicted once nothing reads them
+            self.proxy_cache.release()
+            self.proxy_paths = {}
+        self.frame_cache = FrameCache(logger=self.logger)
+        self.looped_sources = set()
+        self.conformed_images = {}
+
+    def _new_reader_pool(self):
+        return ReaderPool(
+            getattr(self.args, "max_readers", DEFAULT_MAX_READERS) or DEFAULT_MAX_READERS,
+            logger=self.logger,
+        )
+
+    def _with_reader_prefetch(self, final_clip, timeline):
+        """Open each source's decoder in the background shortly before its clip starts"""
+        schedule = []
+        elapsed = 0.0
+        for entry in [timeline["start"], *timeline["main"], timeline["closing"]]:
+            if not entry:
+                continue
+            if entry is timeline["closing"]:
+                elapsed = timeline["main_offset"] + timeline["main_duration"]
+            source_clip = self.source_clips.get(entry["path"])
+            # Repeats of a looped source are served from the frame cache
+            if entry["kind"] == "video" and source_clip is not None and not entry.get("loop"):
+                schedule.append((elapsed, source_clip.reader, entry["source_start"]))
+            elapsed += entry["duration"]
+        if not schedule:
+            return final_clip
+
+        self.reader_pool.set_schedule(schedule)
+
+        def prefetching_frame(get_frame, t):
+            self.reader_pool.prefetch(t)
+            return get_frame(t)
+
+        return final_clip.transform(prefetching_frame)
 
     def _resize_to_mobile_aspect_ratio(self, clip):
         """Resize video clip to mobile portrait 9:16 aspect ratio with center scaling"""
+        if tuple(clip.size) == CANVAS_SIZE:
+            # Already conformed, e.g. by the decoder
+            return clip
         try:
             # Test the original clip first
             try:
@@ -204,9 +533,12 @@ class VideoGenerator:
                 # Choose the larger scale factor to ensure full coverage
                 scale_factor = max(scale_width, scale_height)
 
-                # Calculate new dimensions after scaling
-                scaled_width = int(original_width * scale_factor)
-                scaled_height = int(original_height * scale_factor)
+                # Calculate new dimensions after scaling, rounded up so the
+                # center crop below always covers the whole canvas
+                scaled_width = max(target_width, math.ceil(original_width * scale_factor))
+                scaled_height = max(
+                    target_height, math.ceil(original_height * scale_factor)
+                )
 
                 self.logger.info(
                     f">>>Scaling up by factor {scale_factor:.2f} to {scaled_width}x{scaled_height}"
@@ -234,7 +566,7 @@ class VideoGenerator:
                 # Clean up
                 scaled_clip.close()
 
-                return final_clip
+                return self._ensure_canvas_size(final_clip, target_width, target_height)
 
             else:
                 # Clip is larger than or equal to screen - crop to 9:16 aspect ratio
@@ -280,13 +612,22 @@ class VideoGenerator:
                 # Clean up
                 cropped_clip.close()
 
-                return final_clip
+                return self._ensure_canvas_size(final_clip, target_width, target_height)
 
         except Exception as e:
             self.logger.error(f"Error in _resize_to_mobile_aspect_ratio: {e}")
             return clip
 
-    def _safe_load_video_clip(self, file_path, max_duration_check=10.0):
+    def _ensure_canvas_size(self, clip, target_width, target_height):
+        """Resize a clip that missed the canvas by rounding to exactly target size"""
+        if (clip.w, clip.h) == (target_width, target_height):
+            return clip
+        self.logger.warning(
+            f"Clip is {clip.w}x{clip.h} after conforming, resizing to {target_width}x{target_height}"
+        )
+        return clip.with_effects([vfx.Resize(new_size=(target_width, target_height))])
+
+    def _safe_load_video_clip(self, file_path):
         """Safely load a video clip with error handling for corrupted files"""
         try:
             # First try to get basic file info
@@ -294,64 +635,26 @@ class VideoGenerator:
                 self.logger.warning(f"File does not exist: {file_path}")
                 return None
 
-            # Try to load with a quick duration check first
-            test_clip = VideoFileClip(str(file_path), audio=True)
-
-            # Check if duration is valid
-            if (
-                not hasattr(test_clip, "duration")
-                or test_clip.duration is None
-                or test_clip.duration <= 0
-            ):
-                self.logger.warning(
-                    f"Invalid duration for {file_path}: {getattr(test_clip, 'duration', 'unknown')}"
-                )
-                test_clip.close()
-                return None
-
-            # Check if file is too long (might be corrupted)
-            if test_clip.duration > 3600:  # More than 1 hour
-                self.logger.warning(
-                    f"File seems too long ({test_clip.duration:.2f}s), might be corrupted: {file_path}"
-                )
-                test_clip.close()
+            # Corrupted files are known from the probe index and never opened
+            probe = self.media_probe.probe(file_path)
+            if probe is None or probe["corrupt"]:
+                reason = probe["reason"] if probe else "cannot be probed"
+                self.logger.warning(f"Skipping corrupted video {file_path}: {reason}")
                 return None
 
-            # Quick check of first few frames
-            if test_clip and test_clip.duration > max_duration_check:
-                # Try to read a frame from the beginning
-                try:
-                    subclip = test_clip.subclipped(0, min(1.0, test_clip.duration))
-                    if subclip:
-                        subclip.close()
-                except Exception as frame_error:
-                    self.logger.warning(
-                        f"Failed to read initial frames from {file_path}: {frame_error}"
-                    )
-                    if test_clip:
-                        test_clip.close()
-                    return None
-
-                # Try to read a frame from near the end to detect corruption
-                try:
-                    end_check_start = max(0, test_clip.duration - max_duration_check)
-                    end_subclip = test_clip.subclipped(
-                        end_check_start, test_clip.duration
-                    )
-                    if end_subclip:
-                        end_subclip.close()
-                except Exception as frame_error:
-                    # Don't fail completely for end-frame issues - many files have this problem
-                    self.logger.info(
-                        f"Minor corruption detected at end of {file_path} (ignoring): {frame_error}"
-                    )
-                    # Continue with the clip - it's still usable
-
-            # If all checks pass, return the clip without resizing for now
-            # TEMPORARY: Disabled mobile aspect ratio resizing due to frame read issues
-            final_clip = test_clip
+            # The decoder scales, crops and converts the frame rate, so frames
+            # arrive in Python already conformed to the canvas
+            final_clip = load_conformed_video(
+                self._source_path(file_path),
+                CANVAS_SIZE,
+                OUTPUT_FPS,
+                # Clips are always used without their audio
+                audio=False,
+                pool=self.reader_pool,
+                fallback_path=file_path,
+            )
             self.logger.info(
-                f"Successfully loaded video clip: {file_path} ({final_clip.duration:.2f}s) [resizing disabled]"
+                f"Successfully loaded video clip: {file_path} ({final_clip.duration:.2f}s)"
             )
             return final_clip
 
@@ -359,6 +662,39 @@ class VideoGenerator:
             self.logger.warning(f"Failed to load video clip {file_path}: {e}")
             return None
 
+    def _source_path(self, file_path):
+        """The file to decode for a video source: its proxy with --proxy-cache"""
+        if self.proxy_cache is None:
+            return file_path
+        known = self.proxy_paths.get(file_path)
+        if known is not None and not Path(known).exists():
+            # Removed by another job despite the eviction grace window
+            self.logger.warning(f"Proxy of {file_path} is gone, reading the original")
+            self.proxy_paths[file_path] = file_path
+        if file_path not in self.proxy_paths:
+            proxy = self.proxy_cache.get(file_path)
+            if proxy is None:
+                self.logger.warning(f"No proxy for {file_path}, reading the original")
+            self.proxy_paths[file_path] = proxy or file_path
+        return self.proxy_paths[file_path]
+
+    def _proxied_timeline(self, timeline):
+        """The timeline with video entries reading from their proxies"""
+        if self.proxy_cache is None:
+            return timeline
+
+        def proxied(entry):
+            if not entry or entry["kind"] != "video":
+                return entry
+            return dict(entry, path=self._source_path(entry["path"]))
+
+        return dict(
+            timeline,
+            start=proxied(timeline["start"]),
+            main=[proxied(entry) for entry in timeline["main"]],
+            closing=proxied(timeline["closing"]),
+        )
+
     def _safe_concatenate_clips(self, clips, method="compose"):
         """Safely concatenate clips with robust error handling"""
         if len(clips) == 0:
@@ -425,6 +761,15 @@ class VideoGenerator:
             self.logger.info("Only one valid clip, no concatenation needed")
             return valid_clips[0]
 
+        if method == "compose" and all(
+            tuple(clip.size) == tuple(valid_clips[0].size) and clip.mask is None
+            for clip in valid_clips
+        ):
+            # Opaque clips of one size: chaining gives the same frames without
+            # compositing each one onto a background, and passes a still clip's
+            # frame through unchanged
+            method = "chain"
+
         # Try different concatenation methods
         try:
             # Method 1: Standard concatenate_videoclips
@@ -474,54 +819,34 @@ class VideoGenerator:
                 f"Failed to concatenate clips after multiple attempts: {e}"
             )
 
-    def _process_with_original_length(self, clips):
-        """Process clips keeping their original length"""
-        processed_clips = []
+    def _plan_with_original_length(self, clips):
+        """Plan clips keeping their original length"""
+        plan = []
         target_length = getattr(self.args, "length", None)
 
         self.logger.info(
-            f"Starting _process_with_original_length with target_length: {target_length}"
+            f"Starting _plan_with_original_length with target_length: {target_length}"
         )
 
-        # First pass: process all clips normally
+        # First pass: plan all clips normally
         for i, clip_path in enumerate(clips):
             try:
-                if clip_path.suffix.lower() in {
-                    ".jpg",
-                    ".jpeg",
-                    ".png",
-                    ".gif",
-                    ".bmp",
-                    ".tiff",
-                }:
-                    # Convert image to video clip
-                    clip = ImageClip(str(clip_path)).with_duration(3.0)
-                    # Resize image to mobile aspect ratio
-                    clip = self._resize_to_mobile_aspect_ratio(clip)
-                    self.logger.debug(
-                        f"Converted and resized image to clip: {clip_path} (3.0s)"
-                    )
+                if self._is_image_file(clip_path):
+                    # Images become 3 second still clips
+                    duration = 3.0
                 else:
-                    # Video clip with safe loading for corrupted files
-                    clip = self._safe_load_video_clip(clip_path)
-                    if clip is None:
+                    # Video clip, corrupted files are skipped
+                    duration = self._probe_video_duration(clip_path)
+                    if duration is None:
                         self.logger.warning(
                             f"Skipping corrupted video clip: {clip_path}"
                         )
                         continue
-                    # Resize video clip to fit mobile aspect ratio (remove black borders)
-                    clip = self._resize_to_mobile_aspect_ratio(clip)
-                    self.logger.debug(
-                        f"Loaded and resized video clip: {clip_path} ({clip.duration:.2f}s -> {clip.w}x{clip.h})"
-                    )
-
-                # Make clip silent if requested
-                clip = clip.without_audio()
 
-                processed_clips.append(clip)
+                plan.append(self._plan_entry(clip_path, duration, len(plan)))
 
                 # Stop if we've exceeded target length
-                total_duration = sum(c.duration for c in processed_clips)
+                total_duration = sum(entry["duration"] for entry in plan)
                 if target_length and total_duration >= target_length:
                     self.logger.info(
                         f"Reached target length {target_length}s at clip {i + 1}, stopping clip processing"
@@ -533,101 +858,69 @@ class VideoGenerator:
                 print(f"Damn, failed to process {clip_path}: {e}")
                 continue
 
-        total_duration = sum(c.duration for c in processed_clips)
+        total_duration = sum(entry["duration"] for entry in plan)
         self.logger.info(
-            f"After initial processing: {len(processed_clips)} clips with total duration: {total_duration:.2f}s"
+            f"After initial processing: {len(plan)} clips with total duration: {total_duration:.2f}s"
         )
 
         # If we have a target length and haven't reached it, extend by repeating clips
-        if target_length and total_duration < target_length and processed_clips:
+        if target_length and total_duration < target_length and plan:
             needed_extension = target_length - total_duration
             self.logger.info(
                 f"Need to extend video by {needed_extension:.2f}s to reach target of {target_length}s"
             )
 
             remaining_duration = needed_extension
-            clip_index = 0
-            original_clip_count = len(processed_clips)
+            original_clip_count = len(plan)
 
             # Get repeat mode from args (single or batch)
             repeat_mode = getattr(self.args, "repeatmode", "batch")
             self.logger.info(f"Using repeat mode: {repeat_mode}")
 
-            if repeat_mode == "batch":
-                # Batch mode: cycle through all clips (ABC ABC ABC AB)
-                batch_index = 0
-                while (
-                    remaining_duration > 0.01 and processed_clips
-                ):  # Use small threshold to avoid infinite loops
-                    # Cycle through all clips in order
-                    clip_to_repeat = processed_clips[batch_index % original_clip_count]
-
-                    if (
-                        clip_to_repeat.duration <= remaining_duration + 0.01
-                    ):  # Small tolerance
-                        # Use the entire clip
-                        repeated_clip = clip_to_repeat.copy()
-                        processed_clips.append(repeated_clip)
-                        remaining_duration -= clip_to_repeat.duration
-                        self.logger.debug(
-                            f"Added full clip {batch_index % original_clip_count + 1} ({clip_to_repeat.duration:.2f}s), remaining: {remaining_duration:.2f}s"
-                        )
-                    else:
-                        # Use part of the clip
-                        partial_clip = clip_to_repeat.subclipped(0, remaining_duration)
-                        processed_clips.append(partial_clip)
-                        self.logger.debug(
-                            f"Added partial clip ({remaining_duration:.2f}s) from clip {batch_index % original_clip_count + 1}"
-                        )
-                        remaining_duration = 0
-
-                    batch_index += 1
-
-                    # Safety check to prevent infinite loops
-                    if batch_index > original_clip_count * 20:  # Increased limit for batch mode
-                        self.logger.warning(
-                            "Reached safety limit for clip repetition in batch mode, stopping extension"
-                        )
-                        break
-            else:
-                # Single mode: repeat current clip (AAAABBCCCC) - original logic
-                while (
-                    remaining_duration > 0.01 and processed_clips
-                ):  # Use small threshold to avoid infinite loops
-                    # Repeat clips to fill the remaining duration
-                    clip_to_repeat = processed_clips[clip_index % original_clip_count]
-
-                    if (
-                        clip_to_repeat.duration <= remaining_duration + 0.01
-                    ):  # Small tolerance
-                        # Use the entire clip
-                        repeated_clip = clip_to_repeat.copy()
-                        processed_clips.append(repeated_clip)
-                        remaining_duration -= clip_to_repeat.duration
-                        self.logger.debug(
-                            f"Added full clip {clip_index % original_clip_count + 1} ({clip_to_repeat.duration:.2f}s), remaining: {remaining_duration:.2f}s"
-                        )
-                    else:
-                        # Use part of the clip
-                        partial_clip = clip_to_repeat.subclipped(0, remaining_duration)
-                        processed_clips.append(partial_clip)
-                        self.logger.debug(
-                            f"Added partial clip ({remaining_duration:.2f}s) from clip {clip_index % original_clip_count + 1}"
+            # Both modes cycle through the planned clips in order (ABC ABC AB),
+            # batch mode allows more cycles before giving up
+            max_cycles = 20 if repeat_mode == "batch" else 10
+            repeat_index = 0
+            while remaining_duration > 0.01:  # Small threshold avoids infinite loops
+                entry_to_repeat = plan[repeat_index % original_clip_count]
+                # Planned clips are whole sources, so repeating the last one loops it
+                loop = plan[-1]["path"] == entry_to_repeat["path"]
+
+                if entry_to_repeat["duration"] <= remaining_duration + 0.01:
+                    # Use the entire clip
+                    plan.append(dict(entry_to_repeat, clip_index=len(plan), loop=loop))
+                    remaining_duration -= entry_to_repeat["duration"]
+                    self.logger.debug(
+                        f"Added full clip {repeat_index % original_clip_count + 1} ({entry_to_repeat['duration']:.2f}s), remaining: {remaining_duration:.2f}s"
+                    )
+                else:
+                    # Use part of the clip
+                    plan.append(
+                        self._plan_entry(
+                            entry_to_repeat["path"],
+                            remaining_duration,
+                            len(plan),
+                            source_start=entry_to_repeat["source_start"],
+                            loop=loop,
                         )
-                        remaining_duration = 0
+                    )
+                    self.logger.debug(
+                        f"Added partial clip ({remaining_duration:.2f}s) from clip {repeat_index % original_clip_count + 1}"
+                    )
+                    remaining_duration = 0
 
-                    clip_index += 1
+                repeat_index += 1
 
-                    # Safety check to prevent infinite loops
-                    if clip_index > original_clip_count * 10:  # Max 10 full cycles
-                        self.logger.warning(
-                            "Reached safety limit for clip repetition, stopping extension"
-                        )
-                        break
+                # Safety check to prevent infinite loops
+                if repeat_index > original_clip_count * max_cycles:
+                    self.logger.warning(
+                        "Reached safety limit for clip repetition, stopping extension"
+                    )
+                    break
 
-        total_duration = sum(c.duration for c in processed_clips)
+        total_duration = sum(entry["duration"] for entry in plan)
         self.logger.info(
-            f"Final _process_with_original_length: {len(processed_clips)} clips with total duration: {total_duration:.2f}s"
+            f"Final _plan_with_original_length: {len(plan)} clips with total duration: {total_duration:.2f}s"
         )
 
         if target_length:
@@ -635,10 +928,10 @@ class VideoGenerator:
                 f"Target vs Actual: {target_length:.2f}s vs {total_duration:.2f}s (diff: {abs(target_length - total_duration):.2f}s)"
             )
 
-        return processed_clips
+        return plan
 
-    def _process_with_target_length(self, clips):
-        """Process clips to fit target length"""
+    def _plan_with_target_length(self, clips):
+        """Plan clips to fit target length"""
         target_length = getattr(self.args, "length", None)
         if not target_length:
             raise ValueError(
@@ -649,310 +942,90 @@ class VideoGenerator:
         clip_duration = target_length / len(clips)
         self.logger.info(f"Each clip will be: {clip_duration:.2f}s")
 
-        processed_clips = []
+        plan = []
+        clip_index = 0
 
         for clip_path in clips:
             try:
-                if clip_path.suffix.lower() in {
-                    ".jpg",
-                    ".jpeg",
-                    ".png",
-                    ".gif",
-                    ".bmp",
-                    ".tiff",
-                }:
-                    # Convert image to video clip
-                    clip = ImageClip(str(clip_path)).with_duration(clip_duration)
-                    # Resize image to mobile aspect ratio
-                    clip = self._resize_to_mobile_aspect_ratio(clip)
-                    self.logger.debug(
-                        f"Created and resized image clip: {clip_path} ({clip_duration:.2f}s -> {clip.w}x{clip.h})"
-                    )
+                if self._is_image_file(clip_path):
+                    # Convert image to a still clip of the slot length
+                    plan.append(self._plan_entry(clip_path, clip_duration, clip_index))
                 else:
-                    # Video clip - process to exact duration with safe loading
-                    full_clip = self._safe_load_video_clip(clip_path)
-                    if full_clip is None:
+                    # Video clip - process to exact duration, corrupted files are skipped
+                    source_duration = self._probe_video_duration(clip_path)
+                    if source_duration is None:
                         self.logger.warning(
                             f"Skipping corrupted video clip: {clip_path}"
                         )
                         continue
 
-                    # Resize the full clip to mobile aspect ratio before processing
-                    full_clip = self._resize_to_mobile_aspect_ratio(full_clip)
-                    self.logger.debug(
-                        f"Resized video clip to mobile aspect ratio: {clip_path} ({full_clip.w}x{full_clip.h})"
-                    )
-
-                    if full_clip.duration >= clip_duration:
+                    if source_duration >= clip_duration:
                         # Trim to exact duration
-                        start_time = random.uniform(
-                            0, full_clip.duration - clip_duration
-                        )
-                        clip = full_clip.subclipped(
-                            start_time, start_time + clip_duration
+                        start_time = random.uniform(0, source_duration - clip_duration)
+                        plan.append(
+                            self._plan_entry(
+                                clip_path,
+                                clip_duration,
+                                clip_index,
+                                source_start=start_time,
+                            )
                         )
                         self.logger.debug(
                             f"Trimmed video clip: {clip_path} ({clip_duration:.2f}s from {start_time:.2f}s)"
                         )
                     else:
-                        # Clip is shorter than target duration - need to extend it
-                        remaining_duration = clip_duration - full_clip.duration
-                        extended_clips = [full_clip]
-
-                        # Safety check for invalid remaining duration
-                        if remaining_duration <= 0:
-                            self.logger.warning(
-                                f"Invalid remaining duration: {remaining_duration:.2f}s for {clip_path}"
-                            )
-                            clip = full_clip
-                        else:
-                            # Keep repeating the clip to fill the remaining duration
-                            self.logger.info(
-                                f"Extending clip {clip_path} from {full_clip.duration:.2f}s to {clip_duration:.2f}s"
-                            )
+                        # Clip is shorter than target duration - keep repeating it
+                        self.logger.info(
+                            f"Extending clip {clip_path} from {source_duration:.2f}s to {clip_duration:.2f}s"
+                        )
+                        plan.append(
+                            self._plan_entry(clip_path, source_duration, clip_index)
+                        )
+                        remaining_duration = clip_duration - source_duration
 
-                            # Maximum repetitions to prevent infinite loops - be more conservative
-                            max_repetitions = (
-                                int(clip_duration / full_clip.duration) + 1
-                            )
-                            if (
-                                max_repetitions > 20
-                            ):  # Hard limit to prevent excessive repetitions
-                                max_repetitions = 20
-                            repetition_count = 0
-
-                            # Get repeat mode from args (single or batch)
-                            repeat_mode = getattr(self.args, "repeatmode", "single")
-                            self.logger.info(f"Using repeat mode in target length: {repeat_mode}")
-                            
-                            if repeat_mode == "batch":
-                                # Batch mode: cycle through all clips (ABC ABC ABC AB)
-                                # For this case, we need to modify the approach to cycle through all clips
-                                # This is more complex and would require changes at a higher level
-                                # For now, we'll keep the single mode logic for target length processing
-                                # since the batch mode is more relevant for the original length processing
-                                while (
-                                    remaining_duration > 0.01
-                                    and repetition_count < max_repetitions
-                                ):
-                                    repetition_count += 1
-
-                                    if (
-                                        full_clip.duration <= remaining_duration + 0.01
-                                    ):  # Add small tolerance
-                                        # Use full clip again
-                                        try:
-                                            repeated_clip = full_clip.copy()
-                                            # Verify the copied clip has valid duration
-                                            if (
-                                                hasattr(repeated_clip, "duration")
-                                                and repeated_clip.duration > 0
-                                            ):
-                                                extended_clips.append(repeated_clip)
-                                                remaining_duration -= repeated_clip.duration
-                                                self.logger.debug(
-                                                    f"Repeated full clip {clip_path} ({repetition_count}), remaining: {remaining_duration:.2f}s"
-                                                )
-                                            else:
-                                                self.logger.warning(
-                                                    f"Invalid copied clip duration for {clip_path}"
-                                                )
-                                                break
-                                        except Exception as copy_error:
-                                            self.logger.error(
-                                                f"Failed to copy clip {clip_path}: {copy_error}"
-                                            )
-                                            break
-                                    else:
-                                        # Use partial clip - add safety checks
-                                        try:
-                                            # Ensure we don't exceed the clip duration
-                                            safe_end_time = min(
-                                                remaining_duration, full_clip.duration
-                                            )
-                                            if (
-                                                safe_end_time > 0.01
-                                            ):  # Minimum duration check
-                                                partial_clip = full_clip.subclipped(
-                                                    0, safe_end_time
-                                                )
-                                                # Verify the partial clip is valid
-                                                if (
-                                                    hasattr(partial_clip, "duration")
-                                                    and partial_clip.duration > 0
-                                                ):
-                                                    extended_clips.append(partial_clip)
-                                                    self.logger.debug(
-                                                        f"Added partial clip ({safe_end_time:.2f}s) from {clip_path}"
-                                                    )
-                                                else:
-                                                    self.logger.warning(
-                                                        f"Invalid partial clip created from {clip_path}"
-                                                    )
-                                                    # Use full clip as fallback
-                                                    extended_clips.append(full_clip.copy())
-                                                    remaining_duration -= full_clip.duration
-                                            else:
-                                                self.logger.warning(
-                                                    f"Invalid safe_end_time: {safe_end_time:.2f}s"
-                                                )
-                                                break
-                                        except Exception as subclip_error:
-                                            self.logger.error(
-                                                f"Failed to create subclip from {clip_path}: {subclip_error}"
-                                            )
-                                            # Use full clip as fallback
-                                            try:
-                                                extended_clips.append(full_clip.copy())
-                                                remaining_duration -= full_clip.duration
-                                            except Exception as fallback_error:
-                                                self.logger.error(
-                                                    f"Fallback also failed for {clip_path}: {fallback_error}"
-                                                )
-                                                break
-
-                                    remaining_duration = max(
-                                        0, remaining_duration
-                                    )  # Ensure non-negative
-                            else:
-                                # Single mode: repeat current clip (AAAABBCCCC) - original logic
-                                while (
-                                    remaining_duration > 0.01
-                                    and repetition_count < max_repetitions
-                                ):
-                                    repetition_count += 1
-
-                                    if (
-                                        full_clip.duration <= remaining_duration + 0.01
-                                    ):  # Add small tolerance
-                                        # Use full clip again
-                                        try:
-                                            repeated_clip = full_clip.copy()
-                                            # Verify the copied clip has valid duration
-                                            if (
-                                                hasattr(repeated_clip, "duration")
-                                                and repeated_clip.duration > 0
-                                            ):
-                                                extended_clips.append(repeated_clip)
-                                                remaining_duration -= repeated_clip.duration
-                                                self.logger.debug(
-                                                    f"Repeated full clip {clip_path} ({repetition_count}), remaining: {remaining_duration:.2f}s"
-                                                )
-                                            else:
-                                                self.logger.warning(
-                                                    f"Invalid copied clip duration for {clip_path}"
-                                                )
-                                                break
-                                        except Exception as copy_error:
-                                            self.logger.error(
-                                                f"Failed to copy clip {clip_path}: {copy_error}"
-                                            )
-                                            break
-                                    else:
-                                        # Use partial clip - add safety checks
-                                        try:
-                                            # Ensure we don't exceed the clip duration
-                                            safe_end_time = min(
-                                                remaining_duration, full_clip.duration
-                                            )
-                                            if (
-                                                safe_end_time > 0.01
-                                            ):  # Minimum duration check
-                                                partial_clip = full_clip.subclipped(
-                                                    0, safe_end_time
-                                                )
-                                                # Verify the partial clip is valid
-                                                if (
-                                                    hasattr(partial_clip, "duration")
-                                                    and partial_clip.duration > 0
-                                                ):
-                                                    extended_clips.append(partial_clip)
-                                                    self.logger.debug(
-                                                        f"Added partial clip ({safe_end_time:.2f}s) from {clip_path}"
-                                                    )
-                                                else:
-                                                    self.logger.warning(
-                                                        f"Invalid partial clip created from {clip_path}"
-                                                    )
-                                                    # Use full clip as fallback
-                                                    extended_clips.append(full_clip.copy())
-                                                    remaining_duration -= full_clip.duration
-                                            else:
-                                                self.logger.warning(
-                                                    f"Invalid safe_end_time: {safe_end_time:.2f}s"
-                                                )
-                                                break
-                                        except Exception as subclip_error:
-                                            self.logger.error(
-                                                f"Failed to create subclip from {clip_path}: {subclip_error}"
-                                            )
-                                            # Use full clip as fallback
-                                            try:
-                                                extended_clips.append(full_clip.copy())
-                                                remaining_duration -= full_clip.duration
-                                            except Exception as fallback_error:
-                                                self.logger.error(
-                                                    f"Fallback also failed for {clip_path}: {fallback_error}"
-                                                )
-                                                break
-
-                                    remaining_duration = max(
-                                        0, remaining_duration
-                                    )  # Ensure non-negative
-
-                            # Concatenate all extended clips with error handling
-                            if len(extended_clips) > 1:
-                                try:
-                                    # Verify all clips have valid durations before concatenation
-                                    valid_clips = []
-                                    for i, extended_clip in enumerate(extended_clips):
-                                        if (
-                                            hasattr(extended_clip, "duration")
-                                            and extended_clip.duration > 0
-                                        ):
-                                            valid_clips.append(extended_clip)
-                                        else:
-                                            self.logger.warning(
-                                                f"Skipping invalid extended clip {i} from {clip_path}"
-                                            )
-
-                                    if len(valid_clips) > 0:
-                                        clip = self._safe_concatenate_clips(
-                                            valid_clips, method="compose"
-                                        )
-                                        self.logger.info(
-                                            f"Successfully extended video clip: {clip_path} (original: {full_clip.duration:.2f}s, extended: {clip.duration:.2f}s)"
-                                        )
-                                    else:
-                                        self.logger.error(
-                                            f"No valid clips to concatenate for {clip_path}"
-                                        )
-                                        clip = full_clip  # Fallback to original
-
-                                except Exception as concat_error:
-                                    self.logger.error(
-                                        f"Failed to concatenate extended clips for {clip_path}: {concat_error}"
+                        # Maximum repetitions to prevent infinite loops
+                        max_repetitions = min(
+                            int(clip_duration / source_duration) + 1, 20
+                        )
+                        repetition_count = 0
+                        while (
+                            remaining_duration > 0.01
+                            and repetition_count < max_repetitions
+                        ):
+                            repetition_count += 1
+                            if source_duration <= remaining_duration + 0.01:
+                                # Use full clip again
+                                plan.append(
+                                    self._plan_entry(
+                                        clip_path, source_duration, clip_index, loop=True
                                     )
-                                    # Fallback to original clip
-                                    clip = full_clip
+                                )
+                                remaining_duration -= source_duration
+                                self.logger.debug(
+                                    f"Repeated full clip {clip_path} ({repetition_count}), remaining: {remaining_duration:.2f}s"
+                                )
                             else:
-                                clip = (
-                                    extended_clips[0] if extended_clips else full_clip
+                                # Use partial clip to fill exactly what is left
+                                plan.append(
+                                    self._plan_entry(
+                                        clip_path, remaining_duration, clip_index, loop=True
+                                    )
                                 )
+                                self.logger.debug(
+                                    f"Added partial clip ({remaining_duration:.2f}s) from {clip_path}"
+                                )
+                                remaining_duration = 0
 
-                # Make clip silent if requested
-                clip = clip.without_audio()
-
-                processed_clips.append(clip)
+                clip_index += 1
 
             except Exception as e:
                 self.logger.error(f"Failed to process {clip_path}: {e}")
                 print(f"Failed to process {clip_path}: {e}")
                 continue
 
-        total_duration = sum(c.duration for c in processed_clips)
+        total_duration = sum(entry["duration"] for entry in plan)
         self.logger.info(
-            f"Processed {len(processed_clips)} clips with total duration: {total_duration:.2f}s"
+            f"Processed {clip_index} clips with total duration: {total_duration:.2f}s"
         )
 
         # Verify we reached the target duration
@@ -961,16 +1034,91 @@ class VideoGenerator:
                 f"Target duration mismatch: target={target_length:.2f}s, actual={total_duration:.2f}s"
             )
 
-        return processed_clips
+        return plan
+
+    def _subtitle_style(self, texts):
+        """(font, font size, position) of the subtitles; the font is None if Chinese text has none"""
+        font_size = getattr(self.args, "subtitle_font_size", 48)
+        if font_size is None:
+            font_size = 48
+        subtitle_font = getattr(self.args, "subtitle_font", "Arial") or "Arial"
+        subtitle_position = getattr(self.args, "subtitle_position", 85)
+        if subtitle_position is None:
+            subtitle_position = 85
+
+        # Check if we need Chinese font support
+        if any(contains_chinese(text) for text in texts):
+            self.logger.info("Chinese text detected in subtitles, using compatible font")
+            subtitle_font = get_chinese_compatible_font(subtitle_font)
+        return subtitle_font, font_size, subtitle_position
+
+    def _layout_subtitle(self, text, subtitle_font, font_size, width):
+        """(font size, lines, max line width) of a subtitle on a video of the given width
+
+        The text is broken by its measured width and set in the largest font
+        size that fits, before rasterizing anything.
+        """
+        # For 1080px width: the text area is 65% of the width for mobile safety
+        max_text_width = int(width * 0.65)
+        line_font_size, text_lines = fit_font_size(
+            subtitle_font,
+            text,
+            font_size,
+            max_text_width,
+            max_lines=SUBTITLE_MAX_LINES,
+            min_font_size=min(16, font_size),
+            stroke_width=1,
+        )
+        return line_font_size, text_lines, max_text_width
+
+    def _subtitle_line_spec(self, subtitle_font, line_text, line_font_size, max_text_width):
+        """Text spec of one subtitle line with its background box"""
+        return text_spec(
+            subtitle_font,
+            line_text,
+            line_font_size,
+            color="white",
+            stroke_color="black",
+            stroke_width=1,
+            max_width=max_text_width,
+            box=SUBTITLE_BOX,
+        )
+
+    def prerender_text(self):
+        """Start rasterizing the title and subtitle lines in the background
+
+        Called as soon as the display subtitles are known, so the bitmaps are
+        drawn while the voice is generated and the media is loaded.
+        """
+        try:
+            specs = self.title_processor.title_text_specs(self.args, self.args.title)
+            if self.display_subtitles:
+                subtitle_font, font_size, _ = self._subtitle_style(self.display_subtitles)
+                if subtitle_font is not None:
+                    for text in self.display_subtitles:
+                        line_font_size, text_lines, max_text_width = (
+                            self._layout_subtitle(
+                                text, subtitle_font, font_size, CANVAS_SIZE[0]
+                            )
+                        )
+                        specs += [
+                            self._subtitle_line_spec(
+                                subtitle_font, line_text, line_font_size, max_text_width
+                            )
+                            for line_text in text_lines
+                        ]
+            self.raster_cache.prerender(specs)
+        except Exception as e:
+            self.logger.warning(f"Failed to start text prerendering: {e}")
 
-    def add_timestamped_subtitles(self, video_clip):
-        """Add all subtitles with their specific timestamps to the video"""
+    def build_subtitle_layers(self, width, height, video_duration):
+        """Build overlay layers for all timestamped subtitles of a video of the given size"""
         if not hasattr(self, "subtitle_timestamps") or not self.subtitle_timestamps:
             self.logger.warning(
                 "No timestamped subtitles available, using fallback method"
             )
             # Fallback to old method if timestamps not available
-            return video_clip
+            return []
 
         try:
             self.logger.info(
@@ -978,32 +1126,18 @@ class VideoGenerator:
             )
 
             # Get subtitle styling parameters
-            font_size = getattr(self.args, "subtitle_font_size", 48)
-            if font_size is None:
-                font_size = 48
-            subtitle_font = getattr(self.args, "subtitle_font", "Arial") or "Arial"
-            subtitle_position = getattr(self.args, "subtitle_position", 85)
-            if subtitle_position is None:
-                subtitle_position = 85
-
-            # Check if we need Chinese font support
-            needs_chinese_font = any(
-                contains_chinese(sub["text"]) for sub in self.subtitle_timestamps
+            subtitle_font, font_size, subtitle_position = self._subtitle_style(
+                [sub["text"] for sub in self.subtitle_timestamps]
             )
-            if needs_chinese_font:
-                self.logger.info(
-                    "Chinese text detected in subtitles, using compatible font"
-                )
-                subtitle_font = get_chinese_compatible_font(subtitle_font)
-                if subtitle_font is None:
-                    self.logger.error("No compatible font found for Chinese text")
-                    return video_clip
+            if subtitle_font is None:
+                self.logger.error("No compatible font found for Chinese text")
+                return []
 
             self.logger.info(f"Creating subtitles with font: {subtitle_font}")
 
             # Create subtitle clips with proper timing
             subtitle_clips = []
-            video_duration = video_clip.duration
+            padding_x, padding_y = SUBTITLE_BOX[:2]
 
             for subtitle_info in self.subtitle_timestamps:
                 text = subtitle_info["text"]
@@ -1025,262 +1159,56 @@ class VideoGenerator:
 
                 try:
                     # Log video dimensions and text width calculation
-                    self.logger.info(f"Video dimensions: {video_clip.w}x{video_clip.h}")
+                    self.logger.info(f"Video dimensions: {width}x{height}")
                     self.logger.info(
                         f"Text: '{text[:30]}...' (length: {len(text)} chars)"
                     )
 
-                    # Split long text into multiple lines if necessary
-                    # Use dynamic character limit based on content and screen width
-                    max_text_width = int(
-                        video_clip.w * 0.65
-                    )  # Reduced to 65% for mobile safety
-                    max_chars_per_line = calculate_safe_max_chars(text, max_text_width)
+                    line_font_size, text_lines, max_text_width = self._layout_subtitle(
+                        text, subtitle_font, font_size, width
+                    )
                     self.logger.info(
-                        f"Dynamic character limit: {max_chars_per_line} chars for text: '{text[:30]}...'"
+                        f"Max text width: {max_text_width}px ({max_text_width / width * 100:.1f}% of video width)"
                     )
-                    text_lines = split_long_subtitle_text(text, max_chars_per_line)
-
-                    # If text was split into multiple lines, create separate text clips for each line
+                    if line_font_size < font_size:
+                        self.logger.info(
+                            f"Subtitle font size reduced to fit: {font_size} → {line_font_size}"
+                        )
                     if len(text_lines) > 1:
                         self.logger.info(
                             f"Split long text into {len(text_lines)} lines: '{text[:30]}...'"
                         )
 
-                        text_clips = []
-                        line_height = font_size + 5  # Spacing between lines
-
-                        for i, line_text in enumerate(text_lines):
-                            # Calculate maximum text width for mobile portrait video with proper margins
-                            # For 1080px width: 15% margins = 162px each side, text area = 756px
-                            max_text_width = int(
-                                video_clip.w * 0.65
-                            )  # Reduced to 65% for mobile safety
-                            self.logger.info(
-                                f"Max text width: {max_text_width}px ({max_text_width / video_clip.w * 100:.1f}% of video width)"
-                            )
-
-                            line_clip = TextClip(
-                                subtitle_font,
-                                line_text,
-                                font_size=font_size,
-                                color="white",
-                                stroke_color="black",
-                                stroke_width=1,
-                                size=(max_text_width, None),  # Strict width limit
-                                method="caption",  # Enable text wrapping
-                                text_align="center",  # Center alignment
-                                transparent=True,
-                            )
-
-                            # Log actual rendered text width
-                            self.logger.info(
-                                f"Rendered line width: {line_clip.w}px (limit: {max_text_width}px) - text: '{line_text[:20]}...'"
-                            )
-
-                            # Position each line (stacked vertically and centered)
-                            y_position = subtitle_position / 100 * video_clip.h
-                            subtitle_x = (
-                                video_clip.w / 2 - line_clip.w / 2
-                            )  # Center horizontally
-                            subtitle_y = (
-                                y_position
-                                - (len(text_lines) - 1) * line_height / 2
-                                + i * line_height
-                            )
-
-                            # Safety check: if text is still too wide, enforce strict limits
-                            if line_clip.w > max_text_width:
-                                self.logger.warning(
-                                    f"Text line still too wide: {line_clip.w} > {max_text_width}"
-                                )
-                                line_clip.close()
-
-                                # Try with much smaller font size - more aggressive reduction for mobile
-                                # For Chinese text, use even more aggressive reduction
-                                if contains_chinese(line_text):
-                                    emergency_font_size = max(
-                                        16, int(font_size * 0.4)
-                                    )  # 40% reduction for Chinese
-                                else:
-                                    emergency_font_size = max(
-                                        16, int(font_size * 0.5)
-                                    )  # 50% reduction for English
-                                self.logger.info(
-                                    f"Emergency font size reduction: {font_size} → {emergency_font_size}"
-                                )
-
-                                line_clip = TextClip(
-                                    subtitle_font,
-                                    line_text,
-                                    font_size=emergency_font_size,
-                                    color="white",
-                                    stroke_color="black",
-                                    stroke_width=1,
-                                    size=(max_text_width, None),
-                                    method="caption",
-                                    text_align="center",
-                                    transparent=True,
-                                )
-                                # Recalculate position with new size
-                                subtitle_x = video_clip.w / 2 - line_clip.w / 2  # type: ignore
-
-                                # Final safety check - if still too wide, force width scaling
-                                if line_clip.w > max_text_width:  # type: ignore
-                                    self.logger.error(
-                                        f"Text line still exceeds width after emergency reduction: {line_clip.w} > {max_text_width}"  # type: ignore
-                                    )
-                                    # Force scale the text clip width to fit exactly
-                                    force_scale = max_text_width / line_clip.w  # type: ignore
-                                    line_clip = line_clip.with_effects(
-                                        [vfx.Resize(new_size=force_scale)]
-                                    )
-                                    subtitle_x = video_clip.w / 2 - line_clip.w / 2  # type: ignore
-                                    self.logger.info(
-                                        f"Applied forced scaling: {force_scale:.2f}x"
-                                    )
-                                    self.logger.error(
-                                        "WARNING: Text was scaled down to fit - consider shortening subtitle text"
-                                    )
-
-                            if line_clip:
-                                line_clip = line_clip.with_position(  # type: ignore
-                                    (subtitle_x, subtitle_y)
-                                )
-                                line_clip = line_clip.with_start(start_time)  # type: ignore
-                                line_clip = line_clip.with_duration(subtitle_duration)  # type: ignore
-
-                                # Create background box for subtitle line
-                                bg_clip = (
-                                    ColorClip(
-                                        size=(line_clip.w + 20, line_clip.h + 10),
-                                        color=(0, 0, 0),  # Black
-                                    )
-                                    .with_opacity(0.1)
-                                    .with_position((subtitle_x - 10, subtitle_y - 5))
-                                    .with_start(start_time)
-                                    .with_duration(subtitle_duration)
-                                )
-
-                                # Add background and text as separate clips (background below text)
-                                text_clips.append(bg_clip)
-                                text_clips.append(line_clip)
-
-                        subtitle_clips.extend(text_clips)
-                        continue  # Skip the single-line processing below
-                    else:
-                        # Single line text processing
-                        # Calculate maximum text width for mobile portrait video with proper margins
-                        # For 1080px width: 15% margins = 162px each side, text area = 756px
-                        max_text_width = int(
-                            video_clip.w * 0.65
-                        )  # Reduced to 65% for mobile safety
+                    line_height = line_font_size + 5  # Spacing between lines
+                    y_position = subtitle_position / 100 * height
+
+                    # Each line with its background box is one bitmap, usually
+                    # rasterized ahead of time by prerender_text
+                    for i, line_text in enumerate(text_lines):
+                        line_clip = make_text_clip(
+                            cache=self.raster_cache,
+                            **self._subtitle_line_spec(
+                                subtitle_font, line_text, line_font_size, max_text_width
+                            ),
+                        )
                         self.logger.info(
-                            f"Max text width: {max_text_width}px ({max_text_width / video_clip.w * 100:.1f}% of video width)"
+                            f"Rendered line width: {line_clip.w - 2 * padding_x}px (limit: {max_text_width}px) - text: '{line_text[:20]}...'"
                         )
 
-                        text_clip = TextClip(
-                            subtitle_font,
-                            text,
-                            font_size=font_size,
-                            color="white",
-                            stroke_color="black",
-                            stroke_width=1,
-                            size=(max_text_width, None),  # Strict width limit
-                            method="caption",  # Enable text wrapping
-                            text_align="center",  # Center alignment
-                            transparent=True,
+                        # Lines are stacked and centered, the box around each line
+                        subtitle_x = width / 2 - line_clip.w / 2
+                        subtitle_y = (
+                            y_position
+                            - (len(text_lines) - 1) * line_height / 2
+                            + i * line_height
                         )
-
-                        # Log actual rendered text width
-                        self.logger.info(
-                            f"Rendered text width: {text_clip.w}px (limit: {max_text_width}px) - text: '{text[:20]}...'"
+                        line_clip = line_clip.with_position(
+                            (subtitle_x, subtitle_y - padding_y)
                         )
-
-                        # Position subtitle (centered)
-                        y_position = subtitle_position / 100 * video_clip.h
-                        subtitle_x = video_clip.w / 2 - text_clip.w / 2
-                        subtitle_y = y_position
-
-                        # Additional safety check: if text is still too wide, enforce strict limits
-                        if text_clip.w > max_text_width:
-                            self.logger.warning(
-                                f"Text still too wide after wrapping: {text_clip.w} > {max_text_width}"
-                            )
-                            text_clip.close()
-
-                            # Try with much smaller font size - more aggressive reduction for mobile
-                            # For Chinese text, use even more aggressive reduction
-                            if contains_chinese(text):
-                                emergency_font_size = max(
-                                    16, int(font_size * 0.4)
-                                )  # 40% reduction for Chinese
-                            else:
-                                emergency_font_size = max(
-                                    16, int(font_size * 0.5)
-                                )  # 50% reduction for English
-                            self.logger.info(
-                                f"Emergency font size reduction: {font_size} → {emergency_font_size}"
-                            )
-
-                            text_clip = TextClip(
-                                subtitle_font,
-                                text,
-                                font_size=emergency_font_size,
-                                color="white",
-                                stroke_color="black",
-                                stroke_width=1,
-                                size=(max_text_width, None),
-                                method="caption",
-                                text_align="center",
-                                transparent=True,
-                            )
-                            # Recalculate position with new size
-                            subtitle_x = video_clip.w / 2 - text_clip.w / 2
-
-                            # Final safety check - if still too wide, force width scaling
-                            if text_clip.w > max_text_width:
-                                self.logger.error(
-                                    f"Text still exceeds width after emergency reduction: {text_clip.w} > {max_text_width}"
-                                )
-                                # Force scale the text clip width to fit exactly
-                                force_scale = max_text_width / text_clip.w
-                                text_clip = text_clip.with_effects(
-                                    [vfx.Resize(new_size=force_scale)]
-                                )
-                                subtitle_x = video_clip.w / 2 - text_clip.w / 2
-                                self.logger.info(
-                                    f"Applied forced scaling: {force_scale:.2f}x"
-                                )
-                                self.logger.error(
-                                    "WARNING: Text was scaled down to fit - consider shortening subtitle text"
-                                )
-
-                            self.logger.info(
-                                f"Emergency font size reduction completed: {emergency_font_size}"
-                            )
-
-                    # Set timing and position
-                    if text_clip:
-                        text_clip = text_clip.with_position((subtitle_x, subtitle_y))
-                        text_clip = text_clip.with_start(start_time)
-                        text_clip = text_clip.with_duration(subtitle_duration)
-
-                        # Create background box for subtitle
-                        bg_clip = (
-                            ColorClip(
-                                size=(text_clip.w + 20, text_clip.h + 10),
-                                color=(0, 0, 0),  # Black
-                            )
-                            .with_opacity(0.1)
-                            .with_position((subtitle_x - 10, subtitle_y - 5))
-                            .with_start(start_time)
-                            .with_duration(subtitle_duration)
+                        subtitle_clips.append(
+                            make_overlay_layer(line_clip, start_time, end_time)
                         )
 
-                        # Add background and text as separate clips (background below text)
-                        subtitle_clips.append(bg_clip)
-                        subtitle_clips.append(text_clip)
                     self.logger.debug(
                         f"Added subtitle: '{text[:30]}...' at {start_time:.2f}s for {subtitle_duration:.2f}s"
                     )
@@ -1291,20 +1219,13 @@ class VideoGenerator:
                     )
                     continue
 
-            if subtitle_clips:
-                # Composite all subtitle clips with the main video
-                result = CompositeVideoClip([video_clip] + subtitle_clips)
-                self.logger.info(
-                    f"Successfully added {len(subtitle_clips)} subtitles to video"
-                )
-                return result
-            else:
+            if not subtitle_clips:
                 self.logger.warning("No subtitle clips were created successfully")
-                return video_clip
+            return subtitle_clips
 
         except Exception as e:
             self.logger.error(f"Failed to add timestamped subtitles: {e}")
-            return video_clip
+            return []
 
     def apply_transition(self, clip1, clip2):
         """Apply random transition between clips"""
@@ -1317,8 +1238,8 @@ class VideoGenerator:
         transition = random.choice(transitions)
         return transition(clip1, clip2)
 
-    def _process_bodytext(self):
-        """Process bodytext file and create text clips with background"""
+    def _build_bodytext_layers(self, timeline):
+        """Process bodytext file and create text layers with background, timed on the timeline"""
         try:
             bodytext_file = getattr(self.args, "bodytext", None)
             if not bodytext_file:
@@ -1384,21 +1305,16 @@ class VideoGenerator:
                 if not line_text.strip():  # Skip empty lines
                     continue
 
-                # Create text clip
-                text_clip = TextClip(
+                # Measure the line, it is rasterized once in the second pass
+                _, (line_width, _) = layout_text(
                     font_name,
                     line_text,
-                    font_size=font_size,
-                    color=font_color,
-                    stroke_color="black",
+                    font_size,
                     stroke_width=1,
-                    size=(int(video_width * 0.8), None),  # 80% width, auto height
-                    method="caption",
-                    text_align="center",
-                    transparent=True,
+                    width=int(video_width * 0.8),  # 80% width, auto height
                 )
 
-                max_text_width = max(max_text_width, text_clip.w)
+                max_text_width = max(max_text_width, line_width)
                 valid_lines += 1
 
             # Create single background clip for all text lines
@@ -1419,18 +1335,16 @@ class VideoGenerator:
                 if not line_text.strip():  # Skip empty lines
                     continue
 
-                # Create text clip
-                text_clip = TextClip(
+                # Create text clip from the glyph cache
+                text_clip = make_text_clip(
                     font_name,
                     line_text,
-                    font_size=font_size,
+                    font_size,
                     color=font_color,
                     stroke_color="black",
                     stroke_width=1,
-                    size=(int(video_width * 0.8), None),  # 80% width, auto height
-                    method="caption",
-                    text_align="center",
-                    transparent=True,
+                    width=int(video_width * 0.8),  # 80% width, auto height
+                    cache=self.raster_cache,
                 )
 
                 # Position the text line
@@ -1439,70 +1353,42 @@ class VideoGenerator:
 
                 text_clips.append(text_clip)
 
-            # Determine timing based on bodyTextLength
-            # We need to scan media files first to get clip information
-            self.scan_media_files()
-            main_clips = self.process_media_clips()
-            total_main_duration = sum(clip.duration for clip in main_clips)
+            # Determine timing based on bodyTextLength, using the planned timeline
+            main_spans = self._plan_clip_spans(timeline["main"])
+            total_main_duration = timeline["main_duration"]
+            start_clip_duration = (
+                timeline["start"]["duration"] if timeline["start"] else 0.0
+            )
 
             bodyTextStartAt = 0.0
             bodyTextDuration = total_main_duration
 
-            # Get start clip duration if available
-            start_clip_duration = 0.0
-            if self.start_file:
-                try:
-                    # Try to get duration of start file
-                    if self.start_file.suffix.lower() in {
-                        ".jpg",
-                        ".jpeg",
-                        ".png",
-                        ".gif",
-                        ".bmp",
-                        ".tiff",
-                    }:
-                        start_clip_duration = 3.0  # Default duration for images
-                    else:
-                        # For video files, try to get actual duration
-                        temp_clip = self._safe_load_video_clip(self.start_file)
-                        if temp_clip:
-                            start_clip_duration = temp_clip.duration
-                            temp_clip.close()
-                        else:
-                            start_clip_duration = 3.0  # Fallback
-                except Exception as e:
-                    self.logger.warning(f"Could not get start clip duration: {e}")
-                    start_clip_duration = 3.0  # Fallback
-
             if bodyTextLength == 0:
                 # Start at 0, duration same as first clip (or start clip if available)
-                if self.start_file and start_clip_duration > 0:
+                if start_clip_duration > 0:
                     bodyTextDuration = start_clip_duration
-                elif main_clips:
-                    bodyTextDuration = main_clips[0].duration
+                elif main_spans:
+                    bodyTextDuration = main_spans[0][1] - main_spans[0][0]
                 else:
                     bodyTextDuration = 5.0  # Default fallback
             elif bodyTextLength == 1:
                 # Start after start clip (if available), duration is remaining time
-                if self.start_file and start_clip_duration > 0:
+                if start_clip_duration > 0:
                     bodyTextStartAt = start_clip_duration
                     bodyTextDuration = total_main_duration
                 else:
                     # No start clip, so start at beginning but treat as "after first clip"
-                    if main_clips and len(main_clips) > 1:
-                        first_clip_duration = main_clips[0].duration
+                    if len(main_spans) > 1:
+                        first_clip_duration = main_spans[0][1]
                         bodyTextStartAt = first_clip_duration
-                        bodyTextDuration = sum(clip.duration for clip in main_clips[1:])
+                        bodyTextDuration = total_main_duration - first_clip_duration
                     else:
                         # Fallback: start at 0, full duration
                         bodyTextStartAt = 0.0
                         bodyTextDuration = total_main_duration
             else:
                 bodyTextStartAt = 0
-                if self.start_file and start_clip_duration > 0:
-                    bodyTextDuration = start_clip_duration + total_main_duration
-                else:
-                    bodyTextDuration = total_main_duration
+                bodyTextDuration = start_clip_duration + total_main_duration
 
             self.logger.info(
                 f"Bodytext timing: start={bodyTextStartAt:.2f}s, duration={bodyTextDuration:.2f}s"
@@ -1511,263 +1397,40 @@ class VideoGenerator:
             # Check if wipe down animation is enabled
             bodytext_animation = getattr(self.args, "bodytext_animation", "none")
 
-            if bodytext_animation == "wipe_down":
-                # Apply sequential wipe down animation timing to text clips
-                timed_text_clips = []
+            bodyTextEndAt = bodyTextStartAt + bodyTextDuration
 
+            # Background appears immediately, below all text lines
+            body_layers = [make_overlay_layer(bg_clip, bodyTextStartAt, bodyTextEndAt)]
+
+            if bodytext_animation == "wipe_down":
                 # Animation settings for wipe down effect
                 line_delay = 0.5  # Delay between each line appearing (seconds)
                 fade_duration = 0.3  # Fade in duration for each line (seconds)
 
                 for i, text_clip in enumerate(text_clips):
-                    # Calculate timing for downward erase animation
                     # Each line appears with a delay, creating the wipe down effect
                     line_start_time = bodyTextStartAt + i * line_delay
-                    line_end_time = bodyTextStartAt + bodyTextDuration
-
-                    # Apply fade in effect with proper timing
-                    timed_text_clip = text_clip.with_start(
-                        line_start_time
-                    ).with_duration(line_end_time - line_start_time)
-                    timed_text_clip = timed_text_clip.with_effects(
-                        [FadeIn(fade_duration)]
+                    body_layers.append(
+                        make_overlay_layer(
+                            text_clip,
+                            line_start_time,
+                            bodyTextEndAt,
+                            fade_in=fade_duration,
+                        )
                     )
-
-                    timed_text_clips.append(timed_text_clip)
-
-                # Apply timing to single background clip (background appears immediately)
-                timed_bg_clip = bg_clip.with_start(bodyTextStartAt).with_duration(
-                    bodyTextDuration
-                )
             else:
                 # Apply static timing (all lines appear simultaneously)
-                timed_text_clips = []
-
                 for text_clip in text_clips:
-                    timed_text_clip = text_clip.with_start(
-                        bodyTextStartAt
-                    ).with_duration(bodyTextDuration)
-                    timed_text_clips.append(timed_text_clip)
-
-                # Apply timing to single background clip
-                timed_bg_clip = bg_clip.with_start(bodyTextStartAt).with_duration(
-                    bodyTextDuration
-                )
+                    body_layers.append(
+                        make_overlay_layer(text_clip, bodyTextStartAt, bodyTextEndAt)
+                    )
 
-            # Return background clip first (so text appears on top), then all text clips
-            return [timed_bg_clip] + timed_text_clips
+            return body_layers
 
         except Exception as e:
             self.logger.error(f"Failed to process bodytext: {e}")
             return []
 
-    def _check_and_regenerate_aspect_ratio(self, video_file):
-        """Check if video is 16:9 aspect ratio and regenerate if not"""
-        import subprocess
-        import json
-
-        try:
-            # Get video dimensions using ffprobe
-
-            cmd = [
-                "ffprobe",
-                "-v",
-                "quiet",
-                "-print_format",
-                "json",
-                "-show_format",
-                "-show_streams",
-                str(video_file),
-            ]
-
-            result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-            if result.returncode != 0:
-                self.logger.error(
-                    f"ffprobe failed with exit code {result.returncode}: {result.stderr}"
-                )
-                return False
-            if not result.stdout:
-                self.logger.error("ffprobe returned no output")
-                return False
-
-            video_info = json.loads(result.stdout)
-
-            # Find video stream
-            video_stream = None
-            for stream in video_info.get("streams", []):
-                if stream.get("codec_type") == "video":
-                    video_stream = stream
-                    break
-
-            if not video_stream:
-                self.logger.error("No video stream found in the file")
-                return False
-
-            width = int(video_stream.get("width", 0))
-            height = int(video_stream.get("height", 0))
-
-            if width == 0 or height == 0:
-                self.logger.error("Invalid video dimensions")
-                return False
-
-            # For mobile phone portrait video: height > width, 16:9 ratio means height:width = 16:9
-            # So target ratio should be height/width = 16/9 = 1.777...
-            is_portrait = height > width
-
-            if is_portrait:
-                # Portrait mode: height/width should be 16/9
-                portrait_ratio = height / width
-                target_portrait_ratio = 16 / 9  # 1.777...
-
-                # Standard mobile portrait sizes (width x height)
-                standard_portrait_sizes = [
-                    (1080, 1920),  # Full HD portrait - added this
-                    (1920, 1080),  # Full HD portrait (landscape notation)
-                    (1280, 720),  # HD portrait
-                    (720, 1280),  # HD portrait (landscape notation)
-                    (960, 540),  # qHD portrait
-                    (540, 960),  # qHD portrait (landscape notation)
-                    (854, 480),  # FWVGA portrait
-                    (480, 854),  # FWVGA portrait (landscape notation)
-                ]
-
-                is_standard_ratio = (width, height) in standard_portrait_sizes
-                tolerance = 0.001  # 0.1% tolerance
-                is_correct_ratio = (
-                    abs(portrait_ratio - target_portrait_ratio) < tolerance
-                )
-                final_check = is_standard_ratio or is_correct_ratio
-
-                self.logger.info(
-                    f"Portrait mode detected: {width}x{height}, Ratio: {portrait_ratio:.3f}, Target 16:9 portrait: {target_portrait_ratio:.3f}"
-                )
-                self.logger.info(
-                    f"Standard mobile portrait: {is_standard_ratio}, Ratio match: {is_correct_ratio}"
-                )
-
-                if final_check:
-                    print(
-                        f"✅ Mobile portrait aspect ratio is correct: {width}x{height} ({portrait_ratio:.3f})"
-                    )
-                    return False
-                else:
-                    print(
-                        f"❌ Mobile portrait aspect ratio is incorrect: {width}x{height} ({portrait_ratio:.3f})"
-                    )
-                    print(f"   Target 16:9 portrait ratio: {target_portrait_ratio:.3f}")
-                    print(
-                        "🔄 Regenerating video with correct mobile 16:9 portrait ratio..."
-                    )
-                    return self._regenerate_with_mobile_portrait_ratio(
-                        video_file, width, height
-                    )
-            else:
-                # Landscape mode (not what we want for mobile)
-                print(
-                    f"❌ Video is in landscape mode {width}x{height}, but mobile requires portrait mode"
-                )
-                print("🔄 Regenerating video with mobile portrait orientation...")
-                return self._regenerate_with_mobile_portrait_ratio(
-                    video_file, width, height
-                )
-
-        except subprocess.CalledProcessError as e:
-            self.logger.error(f"Failed to get video info: {e}")
-            return False
-        except Exception as e:
-            self.logger.error(f"Error checking aspect ratio: {e}")
-            return False
-
-    def _regenerate_with_mobile_portrait_ratio(
-        self, video_file, current_width, current_height
-    ):
-        """Regenerate video by cropping from center to 9:16 (width:height) aspect ratio"""
-
-        try:
-            # Create temporary file for the corrected video
-            temp_file = video_file.with_suffix(".temp.mp4")
-
-            # Target aspect ratio for mobile portrait: 9:16 (width:height)
-            target_ratio = 9 / 16  # 0.5625
-
-            # Calculate crop dimensions to maintain original video ratio
-            # We'll crop from the center to get 9:16 aspect ratio
-            if current_width / current_height > target_ratio:
-                # Video is too wide, crop width
-                new_width = int(current_height * target_ratio)
-                new_height = current_height
-                x_offset = (current_width - new_width) // 2
-                y_offset = 0
-            else:
-                # Video is too tall, crop height
-                new_width = current_width
-                new_height = int(current_width / target_ratio)
-                x_offset = 0
-                y_offset = (current_height - new_height) // 2
-
-            self.logger.info(f"Original video: {current_width}x{current_height}")
-            self.logger.info(f"Cropping to: {new_width}x{new_height} from center")
-            self.logger.info(f"Crop offset: {x_offset}x{y_offset}")
-
-            # Use ffmpeg to crop from center (maintaining original aspect ratio)
-            # First crop to 9:16 ratio, then scale to standard mobile size
-            target_width, target_height = 1080, 1920  # Standard mobile portrait size
-
-            cmd = [
-                "ffmpeg",
-                "-i",
-                str(video_file),
-                "-vf",
-                f"crop={new_width}:{new_height}:{x_offset}:{y_offset},scale={target_width}:{target_height}",
-                "-c:v",
-                "libx264",
-                "-c:a",
-                "copy",  # Keep original audio
-                "-preset",
-                "medium",
-                "-crf",
-                "23",
-                "-y",  # Overwrite output file
-                str(temp_file),
-            ]
-
-            print("🎬 Regenerating mobile portrait video with center cropping...")
-            subprocess.run(cmd, capture_output=True, text=True, check=True)
-
-            # Replace original file with corrected one
-            if temp_file.exists():
-                # Backup original file
-                backup_file = video_file.with_suffix(".backup.mp4")
-                if video_file.exists():
-                    video_file.rename(backup_file)
-
-                # Move corrected file to original location
-                temp_file.rename(video_file)
-
-                self.logger.info(
-                    f"Mobile portrait video regenerated successfully: {target_width}x{target_height}"
-                )
-                print(
-                    f"✅ Mobile portrait video regenerated successfully: {target_width}x{target_height}"
-                )
-                print(f"   Cropped from center: {new_width}x{new_height}")
-                print("   Maintained original video aspect ratio (no distortion)")
-                print("   Standard mobile 9:16 aspect ratio (width:height)")
-                print(f"   Original file backed up as: {backup_file.name}")
-                return True
-            else:
-                self.logger.error("Temp file not created")
-                return False
-
-        except subprocess.CalledProcessError as e:
-            self.logger.error(f"FFmpeg failed: {e}")
-            if e.stderr:
-                self.logger.error(f"FFmpeg stderr: {e.stderr}")
-            return False
-        except Exception as e:
-            self.logger.error(f"Error regenerating mobile portrait video: {e}")
-            return False
-
     def create_final_video(self):
         """Create the final video with proper workflow: generate content → create video → trim to audio → prepend start → append end"""
         self.logger.info("Starting video generation process...")
@@ -1782,11 +1445,6 @@ class VideoGenerator:
             self._generate_static_subtitles_only()
             return
 
-        # Handle bodytext logic if --bodytext flag is provided
-        body_text_clips = []
-        if getattr(self.args, "bodytext", None):
-            body_text_clips = self._process_bodytext()
-
         # Step 1: Generate subtitles and audio
         self.logger.info("Step 1: Generating subtitles and audio...")
         print("📝 Step 1: Generating subtitles and audio...")
@@ -1802,6 +1460,7 @@ class VideoGenerator:
         if self.args.text:
             self.logger.info(f"Using text file: {self.args.text}")
             if self.subtitle_processor.load_text_file_subtitles(self, self.args.text):
+                self.prerender_text()
                 # Text file loaded successfully, now decide about voice generation
                 if self.args.gen_voice:
                     self.logger.info("Generating voice for text file subtitles...")
@@ -1835,11 +1494,15 @@ class VideoGenerator:
                 f"Voice generation: {'YES' if voice_needs_generation else 'NO'}"
             )
 
+            # With --pipeline, TTS starts on each subtitle line while the LLM is still streaming
+            streaming_synthesis = None
+
             # Load subtitles if not generating them
             if not subtitle_needs_generation:
                 # Try to load existing generated subtitles first
                 if self.subtitle_processor.load_existing_subtitles(self):
                     self.logger.info("Using existing generated subtitles")
+                    self.prerender_text()
                 else:
                     raise FileNotFoundError(
                         "No subtitles found. Use --gen-subtitle to generate subtitles."
@@ -1847,6 +1510,9 @@ class VideoGenerator:
             else:
                 # Generate new subtitles
                 self.logger.info("Generating new subtitles...")
+                if voice_needs_generation and getattr(self.args, "pipeline", False):
+                    self.logger.info("Pipelining subtitle generation with TTS")
+                    streaming_synthesis = self.audioGenerator.start_streaming_synthesis()
                 self.voice_subtitles, self.display_subtitles = (
                     self.llm_manager.generate_subtitles(
                         self.args,
@@ -1854,15 +1520,22 @@ class VideoGenerator:
                         self.subtitle_folder,
                         self.logger,
                         False,
+                        on_line=(
+                            streaming_synthesis.submit if streaming_synthesis else None
+                        ),
                     )
                 )
                 # Use display subtitles for the main workflow (backward compatibility)
                 self.subtitles = self.display_subtitles
                 self.subtitle_processor._log_subtitles("LLM - Generated")
+                self.prerender_text()
 
             # Generate audio if needed
             if voice_needs_generation:
                 self.logger.info("Generating new audio...")
+                if streaming_synthesis:
+                    # Sentences synthesized while streaming are taken from the TTS cache
+                    streaming_synthesis.finish()
                 self.audioGenerator.generate_audio(self)
                 self.subtitle_processor._calculate_subtitle_timestamps(self)
             else:
@@ -1879,6 +1552,60 @@ class VideoGenerator:
                         "No audio file found. Use --gen-voice to generate audio."
                     )
 
+        if getattr(self.args, "reuse_plan", False):
+            # Same clips, cuts and narration as the last draft
+            timeline = self._load_render_plan()
+        else:
+            timeline = self._plan_timeline()
+        if getattr(self.args, "draft", False):
+            self._save_render_plan(timeline)
+
+        # Handle bodytext logic if --bodytext flag is provided
+        body_text_layers = []
+        if getattr(self.args, "bodytext", None):
+            body_text_layers = self._build_bodytext_layers(timeline)
+
+        output_file = self.project_folder / "output" / "output.mp4"
+        render_backend = getattr(self.args, "render_backend", "moviepy")
+        if getattr(self.args, "draft", False):
+            output_file = self.project_folder / "output" / "preview.mp4"
+            render_backend = "draft"
+        self.logger.info(f"Render backend: {render_backend}")
+
+        try:
+            rendered = False
+            if render_backend == "draft":
+                if not self._render_with_ffmpeg(
+                    timeline, body_text_layers, output_file, profile="draft"
+                ):
+                    raise RuntimeError("Draft render failed")
+                rendered = True
+            elif render_backend == "ffmpeg":
+                rendered = self._render_with_ffmpeg(
+                    timeline, body_text_layers, output_file
+                )
+                if not rendered:
+                    self.logger.warning(
+                        "FFmpeg render backend failed, falling back to MoviePy"
+                    )
+                    print("⚠️  FFmpeg render failed, falling back to MoviePy...")
+            if not rendered:
+                self._render_with_moviepy(timeline, body_text_layers, output_file)
+        finally:
+            self._close_source_clips()
+            self.raster_cache.close()
+
+        self.logger.info(f"Total subtitles: {len(self.subtitles)}")
+
+        self.logger.info("Video generation process finished.")
+
+        # Show video length after generation
+        self._show_video_length(output_file)
+        if self.args.open:
+            os.system(f"open {output_file}")
+
+    def _plan_timeline(self):
+        """Plan the main clips to match the narration and lay out the whole timeline"""
         # Step 2: Create main video content
         self.logger.info("Step 2: Creating main video content...")
 
@@ -1889,7 +1616,7 @@ class VideoGenerator:
         audio_duration = None
         if self.audio_file and self.audio_file.exists():
             try:
-                audio_duration = AudioFileClip(str(self.audio_file)).duration
+                audio_duration = self.audioGenerator.get_audio_duration(self.audio_file)
                 self.logger.info(
                     f"Generated audio duration: {audio_duration:.2f} seconds"
                 )
@@ -1910,35 +1637,221 @@ class VideoGenerator:
                 f"Main content target duration (from args): {main_target_duration:.2f}s"
             )
 
-        # Process main clips to match target duration
+        # Plan main clips to match target duration
         original_length = getattr(self.args, "length", None)
         self.args.length = main_target_duration
 
         print("🎬 Step 2: Creating main video content...")
-        main_clips = self.process_media_clips()
+        main_plan = self.plan_media_clips()
 
         # Restore original length
         self.args.length = original_length
 
-        # Process main clips with titles only (subtitles added later to entire video)
-        processed_main_clips = []
-        for i, clip in enumerate(main_clips):
-            # Add title to clips
-            if self.args.title:
-                # If keep_title is enabled, add title to all clips with full duration
-                # Otherwise, only add title to first clip with limited duration
-                if getattr(self.args, "keep_title", False):
-                    clip = self.title_processor.add_title(
-                        self.args, clip, self.args.title
-                    )
-                elif i == 0:
-                    clip = self.title_processor.add_title(
-                        self.args, clip, self.args.title
+        if len(main_plan) == 0:
+            raise ValueError("No main clips available for video creation")
+
+        main_content_duration = sum(entry["duration"] for entry in main_plan)
+        self.logger.info(f"Main content duration: {main_content_duration:.2f}s")
+        print(f"✅ Main content planned: {main_content_duration:.2f}s")
+
+        # Step 3: Trim main video to match audio length
+        self.logger.info("Step 3: Trimming main video to match audio length...")
+        print("✂️  Step 3: Trimming main video to match audio length...")
+        return self.build_timeline(main_plan, audio_duration)
+
+    def _save_render_plan(self, timeline):
+        """Save the timeline so the final render can reuse the draft's plan"""
+        self.render_plan_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.render_plan_file, "w", encoding="utf-8") as f:
+            json.dump(timeline, f, ensure_ascii=False, indent=2, default=str)
+        self.logger.info(f"Render plan saved to {self.render_plan_file}")
+
+    def _load_render_plan(self):
+        """Load the timeline saved by the last --draft run"""
+        if not self.render_plan_file.exists():
+            raise FileNotFoundError(
+                f"No render plan found at {self.render_plan_file}. Run with --draft first."
+            )
+        with open(self.render_plan_file, "r", encoding="utf-8") as f:
+            timeline = json.load(f)
+
+        entries = timeline["main"] + [
+            entry for entry in (timeline["start"], timeline["closing"]) if entry
+        ]
+        if timeline["narration"]:
+            entries.append(timeline["narration"])
+        for entry in entries:
+            entry["path"] = Path(entry["path"])
+        self.logger.info(f"Reusing render plan from {self.render_plan_file}")
+        print(f"♻️ Reusing render plan from {self.render_plan_file}")
+        return timeline
+
+    def _plan_special_clip(self, file_path, image_duration, role):
+        """Plan the start or closing clip; images are shown for image_duration seconds"""
+        if not file_path:
+            return None
+
+        if self._is_image_file(file_path):
+            duration = image_duration
+        else:
+            duration = self._probe_video_duration(file_path)
+            if duration is None:
+                self.logger.warning(f"Skipping corrupted {role} clip: {file_path}")
+                return None
+
+        return self._plan_entry(file_path, duration, clip_index=0, role=role)
+
+    def build_timeline(self, main_plan, audio_duration=None):
+        """Lay out start clip, main content, closing clip and narration on one timeline
+
+        The timeline only describes what is shown when; it is rendered either by
+        MoviePy (_render_with_moviepy) or by the FFmpeg backend.
+        """
+        main_content_duration = sum(entry["duration"] for entry in main_plan)
+        main = main_plan
+
+        if audio_duration:
+            self.logger.info(f"Audio duration: {audio_duration:.2f}s")
+            self.logger.info(f"Main content duration: {main_content_duration:.2f}s")
+
+            if main_content_duration > audio_duration:
+                # Trim main content to match audio duration
+                self.logger.info(
+                    f"Trimming main content from {main_content_duration:.2f}s to {audio_duration:.2f}s"
+                )
+                main = self._trim_plan(main_plan, audio_duration)
+            elif main_content_duration < audio_duration:
+                self.logger.info(
+                    f"Main content ({main_content_duration:.2f}s) is shorter than audio ({audio_duration:.2f}s) - keeping as is"
+                )
+            else:
+                self.logger.info("Main content and audio durations match perfectly")
+
+        start = self._plan_special_clip(self.start_file, 3.0, "start")
+        closing = self._plan_special_clip(self.closing_file, 1.0, "closing")
+        self.media_probe.save()
+
+        main_offset = start["duration"] if start else 0.0
+        main_duration = sum(entry["duration"] for entry in main)
+        closing_duration = closing["duration"] if closing else 0.0
+
+        narration = None
+        if audio_duration and self.audio_file and self.audio_file.exists():
+            narration = {
+                "path": self.audio_file,
+                "offset": main_offset,
+                "duration": min(audio_duration, main_duration),
+            }
+
+        timeline = {
+            "width": CANVAS_SIZE[0],
+            "height": CANVAS_SIZE[1],
+            "fps": OUTPUT_FPS,
+            "start": start,
+            "main": main,
+            "closing": closing,
+            "main_offset": main_offset,
+            "main_duration": main_duration,
+            "duration": main_offset + main_duration + closing_duration,
+            "narration": narration,
+        }
+        self.logger.info(
+            f"Timeline: start={main_offset:.2f}s, main={main_duration:.2f}s, closing={closing_duration:.2f}s, total={timeline['duration']:.2f}s"
+        )
+        return timeline
+
+    def _shift_layers(self, layers, offset):
+        """Move overlay layers by offset seconds"""
+        return [
+            dict(layer, start=layer["start"] + offset, end=layer["end"] + offset)
+            for layer in layers
+        ]
+
+    def _collect_overlay_layers(self, timeline, body_text_layers):
+        """Gather title, subtitle and bodytext layers in final video time, bottom to top"""
+        width, height = timeline["width"], timeline["height"]
+        main_offset = timeline["main_offset"]
+        layers = []
+
+        if self.args.title:
+            # Title on the start clip
+            if timeline["start"]:
+                layers += self.title_processor.build_title_layers(
+                    self.args, width, height, timeline["start"]["duration"], self.args.title
+                )
+
+            # Title on all main clips with keep_title, otherwise on the first one only
+            main_spans = self._plan_clip_spans(timeline["main"])
+            if not getattr(self.args, "keep_title", False):
+                main_spans = main_spans[:1]
+            for span_start, span_end in main_spans:
+                title_layers = self.title_processor.build_title_layers(
+                    self.args, width, height, span_end - span_start, self.args.title
+                )
+                layers += self._shift_layers(title_layers, main_offset + span_start)
+
+        # Subtitles are only shown together with the narration
+        if timeline["narration"]:
+            subtitle_layers = self.build_subtitle_layers(
+                width, height, timeline["main_duration"]
+            )
+            layers += self._shift_layers(subtitle_layers, main_offset)
+
+        return layers + body_text_layers
+
+    def _render_with_ffmpeg(self, timeline, body_text_layers, output_file, profile="final"):
+        """Render the timeline with a single FFmpeg filter graph, returns True on success"""
+        self.logger.info("Step 4: Rendering video with FFmpeg filter graph...")
+        print("🎬 Step 4: Rendering video with FFmpeg filter graph...")
+
+        try:
+            layers = self._collect_overlay_layers(timeline, body_text_layers)
+
+            background_music_info = None
+            if getattr(self.args, "mp3", None):
+                self.logger.info("Adding background music...")
+                print("🎵 Adding background music...")
+                background_music_info = (
+                    self.background_music_processor._add_background_music(
+                        None, video_duration=timeline["duration"]
                     )
+                )
 
-            # Note: Subtitles are now added to the entire video later using timestamp-based synchronization
-            # The old per-clip subtitle assignment has been removed
+            renderer = FFmpegRenderer(self.logger, self.args, profile=profile)
+            if not renderer.render(
+                self._proxied_timeline(timeline),
+                layers,
+                output_file,
+                background_music_info,
+            ):
+                return False
+        except Exception as e:
+            self.logger.error(f"FFmpeg render failed: {e}")
+            return False
 
+        self.logger.info(f"Video created successfully: {output_file}")
+        self.logger.info(f"Final video duration: {timeline['duration']:.2f} seconds")
+        self.logger.info(
+            f"Main content duration: {timeline['main_duration']:.2f} seconds"
+        )
+        self.logger.info(f"Total overlay layers: {len(layers)}")
+        return True
+
+    def _render_with_moviepy(self, timeline, body_text_layers, output_file):
+        """Render the timeline by compositing MoviePy clips frame by frame"""
+        self._preload_source_clips(
+            [
+                entry
+                for entry in [timeline["start"], *timeline["main"], timeline["closing"]]
+                if entry
+            ]
+        )
+        main_clips = self._materialize_plan(timeline["main"])
+
+        # Titles, subtitles and body text are blended onto the final video in one
+        # pass later, see Step 7.5
+        processed_main_clips = []
+        for i, clip in enumerate(main_clips):
             # Ensure clip has duration
             if hasattr(clip, "duration") and clip.duration is not None:
                 processed_main_clips.append(clip)
@@ -1962,47 +1875,14 @@ class VideoGenerator:
         self.logger.info(f"Main content duration: {main_content_duration:.2f}s")
         print(f"✅ Main content created: {main_content_duration:.2f}s")
 
-        # Step 3: Trim main video to match audio length
-        self.logger.info("Step 3: Trimming main video to match audio length...")
-        print("✂️  Step 3: Trimming main video to match audio length...")
-
-        if audio_duration and self.audio_file and self.audio_file.exists():
-            try:
-                # Get audio duration for comparison
-                audio_clip_check = AudioFileClip(str(self.audio_file))
-                actual_audio_duration = audio_clip_check.duration
-                audio_clip_check.close()
-
-                self.logger.info(f"Audio duration: {actual_audio_duration:.2f}s")
-                self.logger.info(f"Main content duration: {main_content_duration:.2f}s")
-
-                if main_content_duration > actual_audio_duration:
-                    # Trim main content to match audio duration
-                    self.logger.info(
-                        f"Trimming main content from {main_content_duration:.2f}s to {actual_audio_duration:.2f}s"
-                    )
-                    main_content = main_content.subclipped(0, actual_audio_duration)
-                    self.logger.info(
-                        f"Main content trimmed to: {main_content.duration:.2f}s"
-                    )
-                elif main_content_duration < actual_audio_duration:
-                    self.logger.info(
-                        f"Main content ({main_content_duration:.2f}s) is shorter than audio ({actual_audio_duration:.2f}s) - keeping as is"
-                    )
-                else:
-                    self.logger.info("Main content and audio durations match perfectly")
-
-            except Exception as e:
-                self.logger.warning(f"Failed to trim main content to audio length: {e}")
-                self.logger.info("Continuing with original main content duration")
-
         # Step 4: Add audio to main content
         self.logger.info("Step 4: Adding audio to main content...")
         print("🎵 Step 4: Adding audio to main content...")
 
-        if audio_duration and self.audio_file and self.audio_file.exists():
+        narration = timeline["narration"]
+        if narration:
             try:
-                audio = AudioFileClip(str(self.audio_file))
+                audio = AudioFileClip(str(narration["path"]))
                 if audio:
                     self.logger.info(f"Audio duration: {audio.duration:.2f}s")
 
@@ -2025,17 +1905,6 @@ class VideoGenerator:
                     f"Main content with audio duration: {main_content.duration:.2f}s"
                 )
 
-                # Step 4.5: Add timestamped subtitles to main content
-                self.logger.info(
-                    "Step 4.5: Adding timestamped subtitles to main content..."
-                )
-                print("📝 Step 4.5: Adding timestamped subtitles to main content...")
-                main_content = self.add_timestamped_subtitles(main_content)
-                self.logger.info(
-                    f"Main content with subtitles duration: {main_content.duration:.2f}s"
-                )
-                print(f"✅ Timestamped subtitles added: {main_content.duration:.2f}s")
-
             except Exception as e:
                 self.logger.error(f"Failed to add audio: {e}")
                 print(f"Damn, failed to add audio: {e}")
@@ -2047,46 +1916,11 @@ class VideoGenerator:
         final_clips = []
 
         # Add start clip if available
-        if self.start_file:
-            if self.start_file.suffix.lower() in {
-                ".jpg",
-                ".jpeg",
-                ".png",
-                ".gif",
-                ".bmp",
-                ".tiff",
-            }:
-                # Handle image file - create static 3-second clip
-                start_clip = ImageClip(str(self.start_file)).with_duration(3.0)
-                # Resize image to mobile aspect ratio
-                start_clip = self._resize_to_mobile_aspect_ratio(start_clip)
-                self.logger.info(
-                    f"Created static image clip from {self.start_file.name} (3.0s)"
-                )
-            else:
-                # Handle video file
-                start_clip = self._safe_load_video_clip(self.start_file)
-                if start_clip is None:
-                    self.logger.warning(
-                        f"Skipping corrupted start clip: {self.start_file}"
-                    )
-                else:
-                    # Resize start clip to fit mobile aspect ratio (remove black borders)
-                    start_clip = self._resize_to_mobile_aspect_ratio(start_clip)
-                    self.logger.info(
-                        f"Resized start clip to mobile aspect ratio: {start_clip.w}x{start_clip.h}"
-                    )
-
-            if start_clip is not None:
-                # Make start clip silent if requested
-                start_clip = start_clip.without_audio()
-                # Add title to start clip if we have a title
-                if self.args.title:
-                    start_clip = self.title_processor.add_title(
-                        self.args, start_clip, self.args.title
-                    )
-                final_clips.append(start_clip)
-                self.logger.info(f"Added start clip: {start_clip.duration:.2f}s")
+        if timeline["start"]:
+            # Make start clip silent if requested
+            start_clip = self._clip_for_plan_entry(timeline["start"]).without_audio()
+            final_clips.append(start_clip)
+            self.logger.info(f"Added start clip: {start_clip.duration:.2f}s")
 
         # Add main content with audio
         final_clips.append(main_content)
@@ -2096,41 +1930,13 @@ class VideoGenerator:
         print("🎬 Step 6: Adding ending clip...")
 
         # Add closing clip if available
-        if self.closing_file:
-            if self.closing_file.suffix.lower() in {
-                ".jpg",
-                ".jpeg",
-                ".png",
-                ".gif",
-                ".bmp",
-                ".tiff",
-            }:
-                # Handle image file - create static 1-second clip
-                closing_clip = ImageClip(str(self.closing_file)).with_duration(1.0)
-                # Resize image to mobile aspect ratio
-                closing_clip = self._resize_to_mobile_aspect_ratio(closing_clip)
-                self.logger.info(
-                    f"Created static image clip from {self.closing_file.name} (1.0s)"
-                )
-            else:
-                # Handle video file
-                closing_clip = self._safe_load_video_clip(self.closing_file)
-                if closing_clip is None:
-                    self.logger.warning(
-                        f"Skipping corrupted closing clip: {self.closing_file}"
-                    )
-                else:
-                    # Resize closing clip to fit mobile aspect ratio (remove black borders)
-                    closing_clip = self._resize_to_mobile_aspect_ratio(closing_clip)
-                    self.logger.info(
-                        f"Resized closing clip to mobile aspect ratio: {closing_clip.w}x{closing_clip.h}"
-                    )
-
-            if closing_clip is not None:
-                # Make closing clip silent if requested
-                closing_clip = closing_clip.without_audio()
-                final_clips.append(closing_clip)
-                self.logger.info(f"Added closing clip: {closing_clip.duration:.2f}s")
+        if timeline["closing"]:
+            # Make closing clip silent if requested
+            closing_clip = self._clip_for_plan_entry(
+                timeline["closing"]
+            ).without_audio()
+            final_clips.append(closing_clip)
+            self.logger.info(f"Added closing clip: {closing_clip.duration:.2f}s")
 
         # Step 7: Create final video
         self.logger.info("Step 7: Creating final video...")
@@ -2162,15 +1968,25 @@ class VideoGenerator:
 
         self.logger.info(f"Final video duration: {final_clip.duration:.2f}s")
 
-        # Step 7.5: Add body text clips if available
-        if body_text_clips:
-            self.logger.info("Step 7.5: Adding body text clips...")
-            print("📝 Step 7.5: Adding body text clips...")
-            final_clip = CompositeVideoClip([final_clip] + body_text_clips)
+        # Every source is conformed to the canvas, but a clip that failed to
+        # conform is corrected here so it is fixed in the one and only encode
+        canvas_size = (timeline["width"], timeline["height"])
+        if (final_clip.w, final_clip.h) != canvas_size:
+            self.logger.warning(
+                f"Final clip is {final_clip.w}x{final_clip.h}, conforming to {canvas_size[0]}x{canvas_size[1]}"
+            )
+            final_clip = self._resize_to_mobile_aspect_ratio(final_clip)
+
+        # Step 7.5: Blend titles, timestamped subtitles and body text in one flat pass
+        overlay_layers = self._collect_overlay_layers(timeline, body_text_layers)
+        if overlay_layers:
+            self.logger.info("Step 7.5: Adding titles, subtitles and body text...")
+            print("📝 Step 7.5: Adding titles, subtitles and body text...")
+            final_clip = composite_overlays(final_clip, overlay_layers)
             self.logger.info(
-                f"Final video with body text duration: {final_clip.duration:.2f}s"
+                f"Final video with overlays duration: {final_clip.duration:.2f}s"
             )
-            print(f"✅ Body text clips added: {len(body_text_clips)} clips")
+            print(f"✅ Overlay layers added: {len(overlay_layers)} layers")
 
         # Step 7.6: Add background music if specified
         if getattr(self.args, "mp3", None):
@@ -2182,9 +1998,97 @@ class VideoGenerator:
             )
 
         # Write output file
-        output_file = self.project_folder / "output" / "output.mp4"
         self.logger.info(f"Writing video to: {output_file}")
 
+        # Verify final_clip before writing
+        if final_clip is None:
+            raise ValueError("final_clip is None before write_videofile")
+
+        # Test if the final clip can be read
+        try:
+            test_frame = final_clip.get_frame(0.0)
+            if test_frame is None or not isinstance(test_frame, np.ndarray):
+                raise ValueError("Cannot get frame from final_clip")
+        except Exception as frame_error:
+            raise ValueError(f"Cannot read frames from final_clip: {frame_error}")
+        if (final_clip.w, final_clip.h) != canvas_size:
+            raise ValueError(
+                f"final_clip is {final_clip.w}x{final_clip.h}, expected {canvas_size[0]}x{canvas_size[1]}"
+            )
+
+        self.logger.info(
+            f"Final clip validation passed: {final_clip.duration}s, {final_clip.w}x{final_clip.h}"
+        )
+        final_clip = self._with_reader_prefetch(final_clip, timeline)
+
+        # The final audio is only the narration under the main content (start and
+        # closing clips are silent), so MoviePy encodes just the video and narration
+        # and background music are mixed and encoded once by ffmpeg
+        if shutil.which("ffmpeg") and (narration or final_clip.audio is None):
+            self._write_video_with_fused_audio(final_clip, timeline, output_file)
+        else:
+            # Render segments in parallel worker processes when enabled, otherwise in one pass
+            if not self.segment_renderer.render_moviepy(
+                final_clip, timeline, self._open_video_sources(), output_file
+            ):
+                self._write_videofile_with_progress(final_clip, output_file)
+
+            self.logger.info("Video writing completed!")
+
+            # Apply background music using FFmpeg if specified (post-processing approach)
+            self.background_music_processor._apply_background_music_ffmpeg(output_file)
+
+        self.logger.info(f"Video created successfully: {output_file}")
+        self.logger.info(f"Video generation completed successfully: {output_file}")
+        self.logger.info(f"Final video duration: {final_clip.duration:.2f} seconds")
+        self.logger.info(f"Main content duration: {main_content_duration:.2f} seconds")
+        if narration:
+            self.logger.info(f"Audio duration: {narration['duration']:.2f} seconds")
+        self.logger.info(f"Total components: {len(final_clips)}")
+
+        # Clean up
+        final_clip.close()
+        for clip in final_clips:
+            clip.close()
+        if "main_content" in locals():
+            main_content.close()
+
+    def _write_video_with_fused_audio(self, final_clip, timeline, output_file):
+        """Encode the video with MoviePy and its whole audio track in one ffmpeg graph"""
+        renderer = FFmpegRenderer(self.logger, self.args)
+        background_music_info = self.background_music_processor.background_music_info
+        video_clip = final_clip.without_audio()
+
+        # Segments are joined with the audio track rendered from the same graph
+        if self.segment_renderer.render_moviepy(
+            video_clip,
+            timeline,
+            self._open_video_sources(),
+            output_file,
+            renderer=renderer,
+            background_music_info=background_music_info,
+        ):
+            self.logger.info("Video writing completed!")
+            return
+
+        video_file = output_file.with_suffix(".video_only.mp4")
+        try:
+            self._write_videofile_with_progress(video_clip, video_file)
+            self.logger.info("Video writing completed!")
+            print("🎵 Muxing narration and background music...")
+            if renderer.mux_audio(
+                timeline, background_music_info, video_file, output_file
+            ):
+                return
+        finally:
+            video_file.unlink(missing_ok=True)
+
+        self.logger.warning("Audio mux failed, encoding audio with MoviePy")
+        self._write_videofile_with_progress(final_clip, output_file)
+        self.background_music_processor._apply_background_music_ffmpeg(output_file)
+
+    def _write_videofile_with_progress(self, final_clip, output_file):
+        """Write final_clip in a single process while printing estimated progress"""
         # Progress tracking for video writing using file size monitoring
         import threading
 
@@ -2259,22 +2163,6 @@ class VideoGenerator:
 
         # Enable MoviePy's built-in progress bar but also add our own monitoring
 
-        # Verify final_clip before writing
-        if final_clip is None:
-            raise ValueError("final_clip is None before write_videofile")
-
-        # Test if the final clip can be read
-        try:
-            test_frame = final_clip.get_frame(0.0)
-            if test_frame is None or not isinstance(test_frame, np.ndarray):
-                raise ValueError("Cannot get frame from final_clip")
-        except Exception as frame_error:
-            raise ValueError(f"Cannot read frames from final_clip: {frame_error}")
-
-        self.logger.info(
-            f"Final clip validation passed: {final_clip.duration}s, {final_clip.w}x{final_clip.h}"
-        )
-
         final_clip.write_videofile(
             str(output_file),
             codec="libx264",
@@ -2296,39 +2184,6 @@ class VideoGenerator:
         # Wait for progress monitoring to finish
         progress_thread.join(timeout=5)
 
-        self.logger.info("Video writing completed!")
-
-        # Apply background music using FFmpeg if specified (post-processing approach)
-        self.background_music_processor._apply_background_music_ffmpeg(output_file)
-
-        self.logger.info(f"Video created successfully: {output_file}")
-        self.logger.info(f"Video generation completed successfully: {output_file}")
-        self.logger.info(f"Final video duration: {final_clip.duration:.2f} seconds")
-        self.logger.info(f"Main content duration: {main_content_duration:.2f} seconds")
-        if audio_duration:
-            self.logger.info(f"Audio duration: {audio_duration:.2f} seconds")
-        self.logger.info(f"Total components: {len(final_clips)}")
-        self.logger.info(f"Total subtitles: {len(self.subtitles)}")
-
-        # Clean up
-        final_clip.close()
-        for clip in final_clips:
-            clip.close()
-        if "main_content" in locals():
-            main_content.close()
-
-        # Check video aspect ratio and regenerate if not 16:9
-        if self._check_and_regenerate_aspect_ratio(output_file):
-            self.logger.info("Video regenerated with correct 16:9 aspect ratio")
-            print("✅ Video regenerated with correct 16:9 aspect ratio")
-
-        self.logger.info("Video generation process finished.")
-
-        # Show video length after generation
-        self._show_video_length(output_file)
-        if self.args.open:
-            os.system(f"open {output_file}")
-
     def _generate_static_subtitles_only(self):
         """Generate only subtitles and output to console, skipping video creation"""
         self.logger.info("Generating static subtitles...")
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Volcengine TTS WebSocket API, speaking the same
+binary message protocol as AudioGenerator, for offline testing of TTS
+throughput, ordering and retries
+
+Every request is answered with a FrontEndResultServer message holding word
+timings and a tone (0.15s per character) sent as AudioOnlyServer chunks.
+
+Usage:
+    python volcengine_mock_server.py --port 8765 --latency 1.0 --fail-rate 0.2
+    VOLCENGINE_TTS_ENDPOINT=ws://localhost:8765 VOLCENGINE_APP_ID=mock \\
+        VOLCENGINE_ACCESS_TOKEN=mock python main.py ... --gen-voice
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+
+import websockets
+
+from audio_generator import AudioGenerator
+
+MESSAGE = AudioGenerator.VolcengineMessage
+FULL_CLIENT_REQUEST = 0b1
+AUDIO_ONLY_SERVER = 0b1011
+FRONT_END_RESULT_SERVER = 0b1100
+ERROR = 0b1111
+
+# Flags of sequenced messages
+POSITIVE_SEQUENCE = 0b1
+NEGATIVE_SEQUENCE = 0b11
+
+SECONDS_PER_CHAR = 0.15
+CHUNK_SIZE = 4096
+
+
+def synthesize_tone(text):
+    """Return mp3 bytes and word timings of a tone lasting 0.15s per character"""
+    duration = max(len(text), 1) * SECONDS_PER_CHAR
+    audio = subprocess.run(
+        [
+            "ffmpeg",
+            "-v",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            f"sine=frequency=440:duration={duration:.3f}",
+            "-ac",
+            "1",
+            "-ar",
+            "24000",
+            "-f",
+            "mp3",
+            "-",
+        ],
+        capture_output=True,
+        check=True,
+    ).stdout
+    words = [
+        {
+            "word": char,
+            "start_time": round(i * SECONDS_PER_CHAR, 3),
+            "end_time": round((i + 1) * SECONDS_PER_CHAR, 3),
+        }
+        for i, char in enumerate(text)
+    ]
+    return audio, words
+
+
+class MockTTSServer:
+    """Answers TTS requests with simulated latency and failures"""
+
+    def __init__(self, latency=0.5, fail_rate=0.0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.active = 0
+        self.peak = 0
+        self.served = 0
+
+    async def handle(self, websocket, path=None):
+        """Serve one TTS request on a connection"""
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            request = MESSAGE.from_bytes(await websocket.recv())
+            if request.type != FULL_CLIENT_REQUEST:
+                raise ValueError(f"Unexpected message: {request}")
+            text = json.loads(request.payload)["request"]["text"]
+
+            # Simulated synthesis time grows with the text length
+            await asyncio.sleep(self.latency * (1 + len(text) / 50))
+            if random.random() < self.fail_rate:
+                error = MESSAGE(type_value=ERROR, payload=b'{"error": "mock failure"}')
+                await websocket.send(error.marshal())
+                print(f"💥 Failed request: {text}")
+                return
+
+            audio, words = await asyncio.to_thread(synthesize_tone, text)
+            frontend = json.dumps({"words": words}, ensure_ascii=False).encode()
+            await websocket.send(
+                MESSAGE(type_value=FRONT_END_RESULT_SERVER, payload=frontend).marshal()
+            )
+
+            chunks = [audio[i : i + CHUNK_SIZE] for i in range(0, len(audio), CHUNK_SIZE)]
+            for sequence, chunk in enumerate(chunks, start=1):
+                last = sequence == len(chunks)
+                message = MESSAGE(
+                    type_value=AUDIO_ONLY_SERVER,
+                    flag=NEGATIVE_SEQUENCE if last else POSITIVE_SEQUENCE,
+                    sequence=-sequence if last else sequence,
+                    payload=chunk,
+                )
+                await websocket.send(message.marshal())
+
+            self.served += 1
+            print(
+                f"✅ Served #{self.served} ({len(audio)} bytes, {self.active} active, peak {self.peak}): {text}"
+            )
+        finally:
+            self.active -= 1
+
+
+async def serve(host, port, latency, fail_rate):
+    server = MockTTSServer(latency, fail_rate)
+    async with websockets.serve(server.handle, host, port, max_size=10 * 1024 * 1024):
+        print(f"🎙️ Mock Volcengine TTS listening on ws://{host}:{port}")
+        await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Volcengine TTS WebSocket server")
+    parser.add_argument("--host", default="localhost", help="Listen address")
+    parser.add_argument("--port", type=int, default=8765, help="Listen port")
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.5,
+        help="Simulated synthesis time per request in seconds (default: 0.5)",
+    )
+    parser.add_argument(
+        "--fail-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of requests answered with an error (default: 0)",
+    )
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.latency, args.fail_rate))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()